@@ -0,0 +1,392 @@
+"""
+benchmark.py
+Offline benchmark suite for every pipeline stage on synthetic data.
+
+For each scale (1x, 10x, 100x, ...) a synthetic dataset is generated with
+synthetic_data.py and every stage is run in a fresh spawned process, so its time and
+peak memory are not mixed up with the stages before it:
+
+    clean                data cleaning (clean_data.clean_all)
+    feature_engineering  the feature_engineering.py script end to end, with its stage trace
+    cast_crew_parsing    parsing TMDb cast and crew into interned credit matrices (collab_graph.CreditGraph)
+    script_stats         counts and readability indices per script
+    script_dedup         MinHash LSH near-duplicate script detection
+    script_arcs          screenplay parsing and per-scene arc features
+    script_sentiment     corpus-wide sentiment scoring
+    sharded_script_features  script_stats + script_arcs + sentiment through shard_queue.py local workers
+    tokenize             building the BERT token store (skipped if no tokenizer is available offline)
+    train_fast, score_fast       hashed n-gram script model
+    train_forest, score_forest   random forest on IMDb features
+    score_forest_compiled        the same forest through the flat-array evaluator
+
+Results are written as JSON. With --baseline, stages whose wall time or peak memory
+grew by more than the tolerance are flagged and the exit code is 1. A stage that raises
+is recorded as failed with its traceback and the remaining stages still run; the exit
+code is then 1 as well.
+
+Usage:
+    python src/benchmark.py --scales 1 10
+    python src/benchmark.py --scales 1 --baseline data/benchmarks/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import runpy
+import traceback
+import platform
+import argparse
+import datetime
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import write_dataset
+
+src_dir = os.path.dirname(os.path.abspath(__file__))
+benchmarks_dir = os.path.join(src_dir, '..', 'data', 'benchmarks')
+
+STAGES = {}
+
+
+class SkipStage(Exception):
+    """Raised by a stage that cannot run in this environment (e.g. no offline tokenizer)."""
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def stage(name):
+    def register(fn):
+        STAGES[name] = fn
+        return fn
+    return register
+
+
+def script_paths(paths):
+    return sorted(os.path.join(paths['scripts'], f) for f in os.listdir(paths['scripts']) if f.endswith('.txt'))
+
+
+@stage('clean')
+def bench_clean(paths, work_dir, options):
+    from clean_data import clean_all
+
+    clean_all(paths['raw'], os.path.join(paths['data'], 'cleaned'))
+    return sum(len(pd.read_csv(os.path.join(paths['raw'], f), usecols=[0])) for f in os.listdir(paths['raw']))
+
+
+@stage('feature_engineering')
+def bench_feature_engineering(paths, work_dir, options):
+    # The script resolves its data paths relative to its own file, so run a copy placed
+    # next to the synthetic data/ tree; its imports still come from this src/ directory.
+    script_dir = os.path.join(os.path.dirname(paths['data']), 'src', 'feature_engineering')
+    os.makedirs(script_dir, exist_ok=True)
+    script = shutil.copy(os.path.join(src_dir, 'feature_engineering', 'feature_engineering.py'), script_dir)
+    runpy.run_path(script, run_name='__main__')
+    return len(pd.read_csv(os.path.join(paths['processed'], 'imdb_basics_processed.csv'), usecols=[0]))
+
+
+@stage('cast_crew_parsing')
+def bench_cast_crew(paths, work_dir, options):
+    from collab_graph import CreditGraph
+
+    tmdb_data = pd.read_csv(os.path.join(paths['processed'], 'tmdb_data_processed.csv'), usecols=['cast', 'crew'])
+    CreditGraph(tmdb_data)
+    return len(tmdb_data)
+
+
+@stage('script_stats')
+def bench_script_stats(paths, work_dir, options):
+    from text_stats import script_stats
+
+    scripts = script_paths(paths)
+    for path in scripts:
+        script_stats(path)
+    return len(scripts)
+
+
+@stage('script_dedup')
+def bench_script_dedup(paths, work_dir, options):
+    from script_dedup import deduplicate
+
+    _, report = deduplicate(paths['scripts'], cache_file=None)
+    return report['scripts']
+
+
+@stage('script_arcs')
+def bench_script_arcs(paths, work_dir, options):
+    from bulk_sentiment import BulkSentiment
+    from screenplay_parser import script_arc_features
+
+    analyzer = BulkSentiment()
+    scripts = script_paths(paths)
+    for path in scripts:
+        script_arc_features(path, analyzer)
+    return len(scripts)
+
+
+@stage('script_sentiment')
+def bench_script_sentiment(paths, work_dir, options):
+    from bulk_sentiment import score_files
+
+    return len(score_files(script_paths(paths)))
+
+
+@stage('sharded_script_features')
+def bench_sharded_script_features(paths, work_dir, options):
+    from shard_queue import ShardQueue, run_local
+
+    queue_dir = os.path.join(work_dir, 'script_queue')
+    shutil.rmtree(queue_dir, ignore_errors=True)
+    queue = ShardQueue.create(queue_dir, 'script_features', paths['scripts'], n_units=16)
+    run_local(queue_dir, workers=min(os.cpu_count(), 4), poll=0.5)
+    return queue.merge(os.path.join(work_dir, 'sharded_script_features.csv'))
+
+
+def tokenizer_available(name):
+    """Whether the tokenizer's vocab is on disk: a local directory or the Hugging Face cache."""
+    if os.path.isdir(name):
+        return os.path.isfile(os.path.join(name, 'vocab.txt'))
+    from huggingface_hub import try_to_load_from_cache
+
+    return isinstance(try_to_load_from_cache(name, 'vocab.txt'), str)
+
+
+@stage('tokenize')
+def bench_tokenize(paths, work_dir, options):
+    from transformers import BertTokenizer
+    from token_windows import build_token_store
+
+    if not tokenizer_available(options['tokenizer']):
+        raise SkipStage(f"tokenizer '{options['tokenizer']}' not available offline")
+    try:
+        tokenizer = BertTokenizer.from_pretrained(options['tokenizer'], local_files_only=True)
+    except Exception as e:  # a partial cache can fail with TypeError etc., not just OSError
+        raise SkipStage(f"tokenizer '{options['tokenizer']}' could not be loaded offline: {e!r}")
+    build_token_store(paths['scripts'], os.path.join(work_dir, 'token_store'), tokenizer)
+    return len(script_paths(paths))
+
+
+@stage('train_fast')
+def bench_train_fast(paths, work_dir, options):
+    from fast_script_model import FastScriptModel
+
+    labels = pd.read_csv(paths['labels'])
+    model = FastScriptModel().fit(paths['scripts'], labels['script_name'], labels['averageRating'].to_numpy())
+    model.save(os.path.join(work_dir, 'fast_script_model.joblib'))
+    return len(labels)
+
+
+@stage('score_fast')
+def bench_score_fast(paths, work_dir, options):
+    from fast_script_model import FastScriptModel
+
+    labels = pd.read_csv(paths['labels'])
+    model = FastScriptModel.load(os.path.join(work_dir, 'fast_script_model.joblib'))
+    return len(model.predict(paths['scripts'], labels['script_name']))
+
+
+def forest_features(paths):
+    """Numeric IMDb features (runtime, year, votes, genre dummies) and the rating target."""
+    basics = pd.read_csv(os.path.join(paths['processed'], 'imdb_basics_processed.csv'))
+    ratings = pd.read_csv(os.path.join(paths['processed'], 'imdb_ratings_processed.csv'))
+    data = basics.merge(ratings, on='tconst')
+    X = pd.concat([data[['runtimeMinutes', 'startYear', 'numVotes', 'isAdult']].fillna(0),
+                   data['genres'].fillna('').str.get_dummies(sep=',')], axis=1)
+    return X, data['averageRating']
+
+
+@stage('train_forest')
+def bench_train_forest(paths, work_dir, options):
+    import joblib
+    from sklearn.ensemble import RandomForestRegressor
+    from model_trainer import compile_forest
+
+    X, y = forest_features(paths)
+    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=options['jobs'])
+    model.fit(X, y)
+    model_path = os.path.join(work_dir, 'random_forest_model.joblib')
+    joblib.dump(model, model_path)
+    compile_forest(model, os.path.join(work_dir, 'compiled_forest'), model_path=model_path)
+    return len(X)
+
+
+@stage('score_forest')
+def bench_score_forest(paths, work_dir, options):
+    import joblib
+
+    X, _ = forest_features(paths)
+    model = joblib.load(os.path.join(work_dir, 'random_forest_model.joblib'))
+    return len(model.predict(X))
+
+
+@stage('score_forest_compiled')
+def bench_score_forest_compiled(paths, work_dir, options):
+    from model_trainer import CompiledForest
+
+    X, _ = forest_features(paths)
+    model = CompiledForest.load(os.path.join(work_dir, 'compiled_forest'))
+    return len(model.predict(X))
+
+
+def _run_stage(name, paths, work_dir, options):
+    """Runs in a fresh spawned process: time one stage and read this process's peak RSS."""
+    import resource
+    from tracing import current_rss_mb, peak_rss_mb
+
+    rss_start = current_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        rows = STAGES[name](paths, work_dir, options)
+        status, error = 'ok', None
+    except SkipStage as e:
+        rows, status, error = 0, 'skipped', str(e)
+    except Exception:
+        rows, status, error = 0, 'failed', traceback.format_exc()
+    wall = time.perf_counter() - wall_start
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)  # joblib/loky workers
+    result = {
+        'stage': name,
+        'status': status,
+        'wall_seconds': wall,
+        'cpu_seconds': time.process_time() - cpu_start + children.ru_utime + children.ru_stime,
+        'rows': rows,
+        'rows_per_second': rows / wall if rows and wall > 0 else None,
+        'rss_start_mb': rss_start,
+        'peak_rss_mb': peak_rss_mb(),
+        'stage_memory_mb': max(0.0, peak_rss_mb() - rss_start),
+    }
+    if error:
+        result['error'] = error
+    traces = os.path.join(work_dir, 'traces')
+    if status == 'ok' and os.path.isdir(traces):
+        for trace_file in sorted(os.listdir(traces)):
+            with open(os.path.join(traces, trace_file)) as f:
+                result['trace'] = json.load(f)['trace']
+            os.remove(os.path.join(traces, trace_file))
+    return result
+
+
+def run_stages(paths, work_dir, stages, options, repeat=1):
+    """Run each stage `repeat` times in its own process; keep the fastest run."""
+    context = multiprocessing.get_context('spawn')
+    os.environ['TRACE_QUIET'] = '1'
+    os.environ['TRACE_DIR'] = os.path.join(work_dir, 'traces')
+    results = []
+    for name in stages:
+        runs = []
+        for _ in range(repeat):
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    runs.append(executor.submit(_run_stage, name, paths, work_dir, options).result())
+            except Exception as e:  # the worker process died (out of memory, segfault)
+                runs.append({'stage': name, 'status': 'failed', 'wall_seconds': None, 'rows': 0, 'error': repr(e)})
+        ok = [r for r in runs if r['status'] == 'ok']
+        best = min(ok, key=lambda r: r['wall_seconds']) if ok else runs[-1]
+        best['runs_wall_seconds'] = [r['wall_seconds'] for r in runs]
+        results.append(best)
+        if best['status'] == 'ok':
+            log(f"{name:<20} {best['wall_seconds']:8.2f}s  {best['rows']:>9} rows  "
+                f"{best['stage_memory_mb']:8.1f} MB")
+        else:
+            log(f"{name:<20} {best['status']}: {best['error'].strip().splitlines()[-1]}")
+    return results
+
+
+def environment():
+    import sklearn
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'cpu_count': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'sklearn': sklearn.__version__}
+
+
+def compare(results, baseline, time_tolerance=0.25, memory_tolerance=0.25, min_seconds=0.05):
+    """Flag stages that got slower or bigger than the baseline beyond the tolerances.
+
+    Differences under `min_seconds` are ignored so that very short stages do not flag on noise.
+    """
+    reference = {(r['scale'], r['stage']): r for r in baseline['results'] if r['status'] == 'ok'}
+    flags = []
+    for result in results:
+        base = reference.get((result['scale'], result['stage']))
+        if base is None or result['status'] != 'ok':
+            continue
+        time_ratio = result['wall_seconds'] / max(base['wall_seconds'], 1e-9)
+        if time_ratio > 1 + time_tolerance and result['wall_seconds'] - base['wall_seconds'] > min_seconds:
+            flags.append({'scale': result['scale'], 'stage': result['stage'], 'metric': 'wall_seconds',
+                          'baseline': base['wall_seconds'], 'current': result['wall_seconds'], 'ratio': time_ratio})
+        memory_ratio = result['stage_memory_mb'] / max(base['stage_memory_mb'], 1.0)
+        if memory_ratio > 1 + memory_tolerance and result['stage_memory_mb'] - base['stage_memory_mb'] > 1.0:
+            flags.append({'scale': result['scale'], 'stage': result['stage'], 'metric': 'stage_memory_mb',
+                          'baseline': base['stage_memory_mb'], 'current': result['stage_memory_mb'],
+                          'ratio': memory_ratio})
+    return flags
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every pipeline stage on synthetic data.')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per stage; the fastest is kept')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tokenizer', default='bert-base-uncased', help='Tokenizer name or local path')
+    parser.add_argument('--jobs', type=int, default=-1, help='n_jobs for the random forest')
+    parser.add_argument('--work-dir', help='Where synthetic data is generated (default: a temporary directory)')
+    parser.add_argument('--keep-data', action='store_true')
+    parser.add_argument('--output', help='Results JSON (default: data/benchmarks/benchmark_<timestamp>.json)')
+    parser.add_argument('--baseline', help='Earlier results JSON to compare against')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--memory-tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    root = args.work_dir or tempfile.mkdtemp(prefix='movie_benchmark_')
+    options = {'tokenizer': args.tokenizer, 'jobs': args.jobs}
+    results = []
+    try:
+        for scale in args.scales:
+            scale_dir = os.path.join(root, f"scale_{scale:g}x")
+            log(f"Generating synthetic data at {scale:g}x...")
+            start = time.perf_counter()
+            manifest = write_dataset(scale_dir, scale, args.seed)
+            log(f"Generated in {time.perf_counter() - start:.1f}s: {manifest['rows']}")
+            work_dir = os.path.join(scale_dir, 'work')
+            os.makedirs(work_dir, exist_ok=True)
+            for result in run_stages(manifest['paths'], work_dir, args.stages, options, args.repeat):
+                results.append({'scale': scale, 'sizes': manifest['sizes'], **result})
+    finally:
+        if not args.keep_data and not args.work_dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {'created': datetime.datetime.now().isoformat(), 'seed': args.seed,
+              'environment': environment(), 'results': results}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['baseline'] = os.path.abspath(args.baseline)
+        report['regressions'] = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+        for flag in report['regressions']:
+            log(f"REGRESSION {flag['stage']} at {flag['scale']:g}x: {flag['metric']} "
+                f"{flag['baseline']:.2f} -> {flag['current']:.2f} ({flag['ratio']:.2f}x)")
+        if not report['regressions']:
+            log("No regressions against the baseline")
+
+    output = args.output or os.path.join(benchmarks_dir, f"benchmark_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    log(f"Benchmark results saved to '{output}'")
+    failed = [f"{r['stage']} ({r['scale']:g}x)" for r in results if r['status'] == 'failed']
+    if failed:
+        log(f"Failed stages: {', '.join(failed)}")
+    if report.get('regressions') or failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,14 +4,21 @@ Module to clean raw IMDB and TMDB datasets.
 """
 import pandas as pd
 from pathlib import Path
-from config import config
 
 
-def clean_imdb():
+def data_dirs(raw_dir=None, clean_dir=None):
+    """Raw and clean data directories; defaults come from config."""
+    if raw_dir is None or clean_dir is None:
+        from config import config
+        base = Path(__file__).parent
+        raw_dir = raw_dir or base / config['raw_data_path']
+        clean_dir = clean_dir or base / config['clean_data_path']
+    return Path(raw_dir), Path(clean_dir)
+
+
+def clean_imdb(raw_dir=None, clean_dir=None):
     """Clean IMDB basics and ratings datasets."""
-    base = Path(__file__).parent
-    raw_dir = base / config['raw_data_path']
-    clean_dir = base / config['clean_data_path']
+    raw_dir, clean_dir = data_dirs(raw_dir, clean_dir)
     clean_dir.mkdir(parents=True, exist_ok=True)
 
     basics = pd.read_csv(raw_dir / 'imdb_basics.csv')
@@ -32,11 +39,10 @@ def clean_imdb():
     return basics_cleaned, ratings
 
 
-def clean_tmdb():
+def clean_tmdb(raw_dir=None, clean_dir=None):
     """Clean TMDB dataset."""
-    base = Path(__file__).parent
-    raw_dir = base / config['raw_data_path']
-    clean_dir = base / config['clean_data_path']
+    raw_dir, clean_dir = data_dirs(raw_dir, clean_dir)
+    clean_dir.mkdir(parents=True, exist_ok=True)
 
     tmdb = pd.read_csv(raw_dir / 'tmdb_data.csv')
     tmdb_cleaned = tmdb.dropna()
@@ -45,12 +51,12 @@ def clean_tmdb():
     return tmdb_cleaned
 
 
-def clean_all():
+def clean_all(raw_dir=None, clean_dir=None):
     """Run all data cleaning steps."""
     print("Cleaning IMDB data...")
-    clean_imdb()
+    clean_imdb(raw_dir, clean_dir)
     print("Cleaning TMDB data...")
-    clean_tmdb()
+    clean_tmdb(raw_dir, clean_dir)
 
 
 if __name__ == '__main__':
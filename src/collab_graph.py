@@ -0,0 +1,277 @@
+"""
+collab_graph.py
+Interned person IDs and sparse collaboration-graph features from TMDb credits.
+
+Cast and crew are parsed straight out of the stringified TMDb lists with regexes (no
+eval) and every person is interned to an int32 ID, keyed by TMDb person id (the name
+when no id is present). Credits become sparse movie x person incidence matrices:
+all cast, the lead cast (billing order < `lead_size`), directors, and all crew.
+
+Features are sparse matrix products over the whole catalogue:
+- director_lead_collabs: other films in which a director of this film worked with one
+  of its lead actors, summed over director/lead pairs
+- lead_costar_degree_mean / _max: distinct co-stars of the lead cast, from the binary
+  co-star graph Cast^T Cast
+- cast/director_prior_films, cast/director_prior_hit_rate: the track record of the
+  lead cast and directors in films released in earlier years
+- neighbourhood_hit_rate: prior hit rate of the lead cast's earlier co-stars,
+  weighted by how often they worked together
+
+The hit features use the target (`vote_average` >= `hit_threshold`). They only look
+at earlier release years, which keeps the film's own rating out of its features.
+
+Usage:
+    python src/collab_graph.py
+    python src/collab_graph.py --input data/processed/tmdb_data_processed.csv --lead-size 5
+"""
+import os
+import json
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+LEAD_SIZE = 3
+HIT_THRESHOLD = 7.0
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+tmdb_data_path = os.path.join(base_dir, 'data', 'processed', 'tmdb_data_processed.csv')
+features_path = os.path.join(base_dir, 'data', 'features', 'collab_features.csv')
+
+# One token per credit field we use, plus the closing brace that ends each credit dict
+TOKEN_RE = r"""['"](id|name|order|job)['"]:\s*(?:'([^']*)'|"([^"]*)"|(-?\d+))|(\})"""
+CREDIT_FIELDS = ('id', 'name', 'order', 'job')
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+class PersonInterner:
+    """Maps person keys to dense int32 IDs, growing as new people are seen."""
+
+    def __init__(self):
+        self.keys = pd.Index([], dtype=object)
+        self.names = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def intern(self, keys, names=None):
+        """int32 IDs for `keys`; unseen keys are appended in first-seen order."""
+        keys = pd.Index(np.asarray(keys, dtype=object))
+        ids = self.keys.get_indexer(keys)
+        new = ids < 0
+        if new.any():
+            unseen, first = np.unique(keys[new].to_numpy(), return_index=True)
+            order = np.argsort(first)
+            unseen = unseen[order]
+            self.keys = self.keys.append(pd.Index(unseen, dtype=object))
+            if names is not None:
+                new_names = np.asarray(names, dtype=object)[new][first[order]]
+                self.names.extend(new_names.tolist())
+            else:
+                self.names.extend(str(key) for key in unseen)
+            ids = self.keys.get_indexer(keys)
+        return ids.astype(np.int32)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'keys': [str(key) for key in self.keys], 'names': self.names}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        interner = cls()
+        interner.keys = pd.Index(state['keys'], dtype=object)
+        interner.names = state['names']
+        return interner
+
+
+def parse_credits(credits):
+    """Long frame (row, key, name, order, job) from a Series of stringified credit lists.
+
+    A single regex pass tokenizes every row; each field token is assigned to the credit
+    whose closing brace follows it, so no per-credit Python objects are built.
+    """
+    tokens = credits.fillna('').astype(str).reset_index(drop=True).str.findall(TOKEN_RE).explode().dropna()
+    parts = pd.DataFrame(tokens.tolist(), columns=['field', 'single', 'double', 'number', 'close'])
+    close = (parts['close'] == '}').to_numpy()
+    entry = np.cumsum(close) - close
+    n_entries = int(close.sum())
+    value = parts['single'].where(parts['single'] != '', parts['double'])
+    value = value.where(value != '', parts['number']).to_numpy()
+
+    columns = {'row': tokens.index.to_numpy()[close].astype(np.int64)}
+    for field in CREDIT_FIELDS:
+        # Tokens after the last closing brace belong to a truncated credit and are dropped
+        mask = (parts['field'] == field).to_numpy() & (entry < n_entries)
+        column = np.full(n_entries, None, dtype=object)
+        column[entry[mask]] = value[mask]
+        columns[field] = column
+    parsed = pd.DataFrame(columns)
+    parsed = parsed[parsed['name'].notna() & (parsed['name'] != '')]
+    return pd.DataFrame({
+        'row': parsed['row'].to_numpy(),
+        'key': parsed['id'].fillna('name:' + parsed['name']).to_numpy(),
+        'name': parsed['name'].to_numpy(),
+        'order': pd.to_numeric(parsed['order'], errors='coerce').to_numpy(),
+        'job': parsed['job'].to_numpy(),
+    })
+
+
+def incidence(rows, person_ids, n_movies, n_people):
+    """Binary movie x person CSR matrix."""
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, person_ids)),
+                               shape=(n_movies, n_people))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+class CreditGraph:
+    """Movie x person incidence matrices for one TMDb frame, sharing one PersonInterner."""
+
+    def __init__(self, tmdb_data, interner=None, lead_size=LEAD_SIZE):
+        self.interner = interner or PersonInterner()
+        # Positional rows, so any index on the input frame works
+        cast = parse_credits(tmdb_data['cast'].reset_index(drop=True))
+        crew = parse_credits(tmdb_data['crew'].reset_index(drop=True))
+        cast_ids = self.interner.intern(cast['key'], cast['name'])
+        crew_ids = self.interner.intern(crew['key'], crew['name'])
+
+        n_movies, n_people = len(tmdb_data), len(self.interner)
+        lead = (cast['order'] < lead_size).to_numpy()
+        director = (crew['job'] == 'Director').to_numpy()
+        self.cast = incidence(cast['row'].to_numpy(), cast_ids, n_movies, n_people)
+        self.lead = incidence(cast['row'].to_numpy()[lead], cast_ids[lead], n_movies, n_people)
+        self.director = incidence(crew['row'].to_numpy()[director], crew_ids[director], n_movies, n_people)
+        self.crew = incidence(crew['row'].to_numpy(), crew_ids, n_movies, n_people)
+
+    @property
+    def shape(self):
+        return self.cast.shape
+
+
+def _rowsum(matrix):
+    return np.asarray(matrix.sum(axis=1)).ravel()
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1e-12), 0.0)
+
+
+def structural_features(graph):
+    """Catalogue-wide collaboration counts and co-star degrees (no target involved)."""
+    cast, lead, director = graph.cast, graph.lead, graph.director
+    features = {}
+
+    # Row m of D (D^T Cast), masked to the lead cast, sums the films each (director, lead)
+    # pair shares; this film counts once per pair, so subtract |directors| * |leads|
+    director_cast = (director.T @ cast).tocsr()
+    pair_counts = _rowsum((director @ director_cast).multiply(lead))
+    features['director_lead_collabs'] = pair_counts - _rowsum(director) * _rowsum(lead)
+
+    costars = (cast.T @ cast).tocsr()
+    costars.data[:] = 1
+    degree = np.diff(costars.indptr) - (costars.diagonal() > 0)
+    lead_degree = lead.multiply(degree[None, :]).tocsr()
+    n_lead = _rowsum(lead)
+    features['lead_costar_degree_mean'] = _ratio(_rowsum(lead_degree), n_lead)
+    features['lead_costar_degree_max'] = (lead_degree.max(axis=1).toarray().ravel() if lead.shape[1]
+                                          else np.zeros(lead.shape[0]))
+    return pd.DataFrame(features)
+
+
+def prior_hit_features(graph, release_year, hits):
+    """Track-record features from films released in strictly earlier years.
+
+    Movies are processed one release year at a time. Each year's features read the
+    running per-person totals before that year's films are added to them. Movies
+    with no release year are processed last.
+    """
+    cast, lead, director = graph.cast, graph.lead, graph.director
+    n_movies, n_people = graph.shape
+    credited = (cast + director).tocsr()
+    credited.data[:] = 1
+    hits = np.asarray(hits, dtype=np.float64)
+    year = np.asarray(release_year, dtype=np.float64)
+    year = np.where(np.isnan(year), np.inf, year)
+    cast_size = _rowsum(cast)
+
+    person_films = np.zeros(n_people)
+    person_hits = np.zeros(n_people)
+    costar_weight = np.zeros(n_people)
+    costar_rate = np.zeros(n_people)
+    processed = np.zeros(n_movies)
+
+    out = {name: np.zeros(n_movies) for name in (
+        'cast_prior_films', 'cast_prior_hit_rate', 'director_prior_films',
+        'director_prior_hit_rate', 'neighbourhood_hit_rate')}
+    for value in np.unique(year):
+        rows = np.flatnonzero(year == value)
+        lead_rows, director_rows = lead[rows], director[rows]
+
+        lead_films = lead_rows @ person_films
+        out['cast_prior_films'][rows] = lead_films
+        out['cast_prior_hit_rate'][rows] = _ratio(lead_rows @ person_hits, lead_films)
+        director_films = director_rows @ person_films
+        out['director_prior_films'][rows] = director_films
+        out['director_prior_hit_rate'][rows] = _ratio(director_rows @ person_hits, director_films)
+        out['neighbourhood_hit_rate'][rows] = _ratio(lead_rows @ costar_rate, lead_rows @ costar_weight)
+
+        credited_rows = credited[rows]
+        person_films += np.asarray(credited_rows.sum(axis=0)).ravel()
+        person_hits += credited_rows.T @ hits[rows]
+        processed[rows] = 1
+
+        # Co-star sums over earlier films: A r = Cast^T diag(processed) Cast r, minus the
+        # diagonal (each person is their own co-star once per film), without ever
+        # materialising the person x person co-star matrix A
+        cast_films = cast.T @ processed
+        rate = _ratio(person_hits, person_films)
+        costar_weight = cast.T @ (processed * cast_size) - cast_films
+        costar_rate = cast.T @ (processed * (cast @ rate)) - cast_films * rate
+    return pd.DataFrame(out)
+
+
+def collaboration_features(tmdb_data, lead_size=LEAD_SIZE, hit_column='vote_average', hit_threshold=HIT_THRESHOLD,
+                           date_column='release_date', interner=None):
+    """All collaboration features for `tmdb_data`, one row per movie in the same order."""
+    graph = CreditGraph(tmdb_data, interner, lead_size)
+    features = structural_features(graph)
+    if hit_column in tmdb_data.columns and date_column in tmdb_data.columns:
+        years = pd.to_datetime(tmdb_data[date_column], errors='coerce').dt.year.to_numpy()
+        hits = (pd.to_numeric(tmdb_data[hit_column], errors='coerce') >= hit_threshold).to_numpy()
+        features = pd.concat([features, prior_hit_features(graph, years, hits)], axis=1)
+    features.index = tmdb_data.index
+    return features, graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Interned collaboration-graph features from TMDb credits.')
+    parser.add_argument('--input', default=tmdb_data_path)
+    parser.add_argument('--output', default=features_path)
+    parser.add_argument('--lead-size', type=int, default=LEAD_SIZE)
+    parser.add_argument('--hit-threshold', type=float, default=HIT_THRESHOLD)
+    args = parser.parse_args()
+
+    log(f"Loading TMDb data from '{args.input}'...")
+    tmdb_data = pd.read_csv(args.input)
+    features, graph = collaboration_features(tmdb_data, args.lead_size, hit_threshold=args.hit_threshold)
+    log(f"{graph.shape[0]:,} movies, {len(graph.interner):,} interned people, "
+        f"{graph.cast.nnz + graph.crew.nnz:,} credits")
+
+    key_columns = [column for column in ('id', 'imdb_id') if column in tmdb_data.columns]
+    features = pd.concat([tmdb_data[key_columns], features], axis=1)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    features.to_csv(args.output, index=False)
+    graph.interner.save(os.path.splitext(args.output)[0] + '_people.json')
+    log(f"Collaboration features saved to '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""
+headless_eda.py
+Headless EDA over the complete IMDb/TMDb data using pre-aggregated, binned plots.
+
+Unlike perform_eda.py, nothing here caps the row count, draws one marker per row or
+calls plt.show(). Every file is streamed in chunks into fixed-size NumPy aggregates
+(histograms, 2D histograms, hexbin counts and correlation sums), and figures are
+rendered from those aggregates with the non-interactive Agg backend. Memory depends
+on the bin counts, not on the number of rows.
+
+IMDb dumps are sorted by tconst, so basics and ratings are joined with a streaming
+merge join instead of the index-aligned join of unrelated frames.
+
+Usage:
+    python src/eda/headless_eda.py
+"""
+import os
+import ast
+import math
+import time
+import datetime
+from collections import Counter
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import LogNorm
+
+CHUNK_SIZE = 500_000
+
+# Fixed binning for every aggregate
+RATING_BINS = np.linspace(1.0, 10.0, 91)
+LOG_VOTES_RANGE = (0.0, 7.0)
+HEXBIN_GRIDSIZE = 60
+
+CORRELATION_COLUMNS = ['averageRating', 'numVotes', 'log10_numVotes', 'runtimeMinutes', 'startYear']
+
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data/cleaned'))
+processed_data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data/processed'))
+imdb_basics_path = os.path.join(data_dir, 'imdb_basics_cleaned.csv')
+imdb_ratings_path = os.path.join(data_dir, 'imdb_ratings_cleaned.csv')
+tmdb_data_path = os.path.join(data_dir, 'tmdb_data_cleaned.csv')
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def tconst_to_int(tconst):
+    """'tt0111161' -> 111161, vectorized over a Series."""
+    return pd.to_numeric(tconst.str[2:], errors='coerce')
+
+
+class HexbinAggregate:
+    """Hexagonal binning accumulated chunk by chunk, using matplotlib's hexbin lattice."""
+
+    def __init__(self, extent, gridsize=HEXBIN_GRIDSIZE):
+        self.xmin, self.xmax, self.ymin, self.ymax = extent
+        self.nx = gridsize
+        self.ny = max(1, int(gridsize / math.sqrt(3)))
+        self.sx = (self.xmax - self.xmin) / self.nx
+        self.sy = (self.ymax - self.ymin) / self.ny
+        self.counts1 = np.zeros((self.nx + 1) * (self.ny + 1), dtype=np.int64)
+        self.counts2 = np.zeros(self.nx * self.ny, dtype=np.int64)
+
+    def add(self, x, y):
+        keep = np.isfinite(x) & np.isfinite(y)
+        ix = (np.clip(x[keep], self.xmin, self.xmax) - self.xmin) / self.sx
+        iy = (np.clip(y[keep], self.ymin, self.ymax) - self.ymin) / self.sy
+        ix1, iy1 = np.round(ix).astype(int), np.round(iy).astype(int)
+        ix2 = np.minimum(np.floor(ix).astype(int), self.nx - 1)
+        iy2 = np.minimum(np.floor(iy).astype(int), self.ny - 1)
+        d1 = (ix - ix1) ** 2 + 3.0 * (iy - iy1) ** 2
+        d2 = (ix - ix2 - 0.5) ** 2 + 3.0 * (iy - iy2 - 0.5) ** 2
+        on_first = d1 < d2
+        self.counts1 += np.bincount(ix1[on_first] * (self.ny + 1) + iy1[on_first], minlength=len(self.counts1))
+        self.counts2 += np.bincount(ix2[~on_first] * self.ny + iy2[~on_first], minlength=len(self.counts2))
+
+    def centers_and_counts(self):
+        i1, j1 = np.divmod(np.arange(len(self.counts1)), self.ny + 1)
+        i2, j2 = np.divmod(np.arange(len(self.counts2)), self.ny)
+        x = np.concatenate([self.xmin + i1 * self.sx, self.xmin + (i2 + 0.5) * self.sx])
+        y = np.concatenate([self.ymin + j1 * self.sy, self.ymin + (j2 + 0.5) * self.sy])
+        counts = np.concatenate([self.counts1, self.counts2])
+        nonzero = counts > 0
+        return x[nonzero], y[nonzero], counts[nonzero]
+
+    def plot(self, ax):
+        x, y, counts = self.centers_and_counts()
+        hexagon = np.array([[0.5, -0.5], [0.5, 0.5], [0.0, 1.0], [-0.5, 0.5], [-0.5, -0.5], [0.0, -1.0]])
+        hexagon = hexagon * [self.sx, self.sy / 3.0]
+        polygons = hexagon[None, :, :] + np.stack([x, y], axis=1)[:, None, :]
+        collection = PolyCollection(polygons, array=counts, cmap='viridis', edgecolors='face',
+                                    norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)) if len(counts) else None)
+        ax.add_collection(collection)
+        ax.set_xlim(self.xmin, self.xmax)
+        ax.set_ylim(self.ymin, self.ymax)
+        return collection
+
+
+class MomentAggregate:
+    """Sufficient statistics (n, sum, cross-products) for a Pearson correlation matrix."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        k = len(columns)
+        self.n = 0
+        self.sums = np.zeros(k)
+        self.cross = np.zeros((k, k))
+
+    def add(self, values):
+        values = values[np.all(np.isfinite(values), axis=1)]
+        self.n += len(values)
+        self.sums += values.sum(axis=0)
+        self.cross += values.T @ values
+
+    def correlation(self):
+        if self.n < 2:
+            return pd.DataFrame(np.nan, index=self.columns, columns=self.columns)
+        mean = self.sums / self.n
+        cov = self.cross / self.n - np.outer(mean, mean)
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.outer(std, std)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def iter_ratings(path, chunk_size=CHUNK_SIZE):
+    for chunk in pd.read_csv(path, usecols=['tconst', 'averageRating', 'numVotes'], chunksize=chunk_size):
+        chunk['key'] = tconst_to_int(chunk['tconst'])
+        yield chunk.drop(columns='tconst')
+
+
+def iter_basics(path, chunk_size=CHUNK_SIZE):
+    for chunk in pd.read_csv(path, usecols=['tconst', 'genres', 'runtimeMinutes', 'startYear'],
+                             chunksize=chunk_size, dtype={'runtimeMinutes': str, 'startYear': str}):
+        chunk['key'] = tconst_to_int(chunk['tconst'])
+        chunk['runtimeMinutes'] = pd.to_numeric(chunk['runtimeMinutes'], errors='coerce')
+        chunk['startYear'] = pd.to_numeric(chunk['startYear'], errors='coerce')
+        yield chunk.drop(columns='tconst')
+
+
+def check_sorted(chunks, name, key='key'):
+    """Pass chunks through, raising if `key` ever decreases."""
+    last = -np.inf
+    for chunk in chunks:
+        keys = chunk[key].to_numpy()
+        if len(keys) and (keys[0] < last or np.any(np.diff(keys) < 0)):
+            raise ValueError(f"{name} is not sorted by tconst; headless EDA requires sorted dumps")
+        if len(keys):
+            last = keys[-1]
+        yield chunk
+
+
+def merge_join_sorted(left_chunks, right_chunks, key='key'):
+    """Inner-join two chunk streams that are both sorted by `key`, holding only a chunk of each."""
+    right_iter = check_sorted(right_chunks, 'right input', key)
+    right = next(right_iter, None)
+    for left in check_sorted(left_chunks, 'left input', key):
+        if left.empty:
+            continue
+        last_left = left[key].iloc[-1]
+        parts = []
+        # Pull right rows up to this chunk's last key; the remainder waits for the next chunk
+        while right is not None:
+            parts.append(right[right[key] <= last_left])
+            right = right[right[key] > last_left]
+            if not right.empty:
+                break
+            right = next(right_iter, None)
+        overlap = pd.concat(parts) if parts else None
+        if overlap is not None and not overlap.empty:
+            yield left.merge(overlap, on=key, how='inner')
+
+
+def aggregate_ratings(ratings_path, chunk_size=CHUNK_SIZE):
+    """Rating histogram and rating-vs-votes 2D histogram / hexbin, from the full ratings file."""
+    rating_counts = np.zeros(len(RATING_BINS) - 1, dtype=np.int64)
+    vote_edges = np.linspace(*LOG_VOTES_RANGE, 71)
+    hist2d = np.zeros((len(vote_edges) - 1, len(RATING_BINS) - 1), dtype=np.int64)
+    hexbin = HexbinAggregate(extent=(*LOG_VOTES_RANGE, RATING_BINS[0], RATING_BINS[-1]))
+    rows = 0
+    for chunk in iter_ratings(ratings_path, chunk_size):
+        rating = chunk['averageRating'].to_numpy(dtype=float)
+        log_votes = np.log10(chunk['numVotes'].to_numpy(dtype=float).clip(min=1))
+        rating_counts += np.histogram(rating, bins=RATING_BINS)[0]
+        hist2d += np.histogram2d(log_votes, rating, bins=[vote_edges, RATING_BINS])[0].astype(np.int64)
+        hexbin.add(log_votes, rating)
+        rows += len(chunk)
+    return {'rows': rows, 'rating_counts': rating_counts, 'vote_edges': vote_edges,
+            'hist2d': hist2d, 'hexbin': hexbin}
+
+
+def aggregate_basics(basics_path, ratings_path, chunk_size=CHUNK_SIZE):
+    """Genre counts over all titles, and correlation sums over basics joined to ratings by tconst."""
+    genre_counts = Counter()
+
+    def basics_with_genres():
+        for chunk in iter_basics(basics_path, chunk_size):
+            genre_counts.update(chunk['genres'].dropna().str.split(',').explode().value_counts().to_dict())
+            yield chunk
+
+    moments = MomentAggregate(CORRELATION_COLUMNS)
+    joined_rows = 0
+    for joined in merge_join_sorted(basics_with_genres(), iter_ratings(ratings_path, chunk_size)):
+        joined['log10_numVotes'] = np.log10(joined['numVotes'].clip(lower=1))
+        moments.add(joined[CORRELATION_COLUMNS].to_numpy(dtype=float))
+        joined_rows += len(joined)
+    return {'genre_counts': pd.Series(genre_counts).sort_values(ascending=False),
+            'correlation': moments.correlation(), 'joined_rows': joined_rows}
+
+
+def aggregate_cast(tmdb_path, chunk_size=50_000):
+    """Actor appearance counts over the full TMDb credits file."""
+    actor_counts = Counter()
+    for chunk in pd.read_csv(tmdb_path, usecols=['cast'], chunksize=chunk_size):
+        for cast_list in chunk['cast'].dropna():
+            try:
+                actor_counts.update(person.get('name', 'Unknown') for person in ast.literal_eval(cast_list))
+            except (ValueError, SyntaxError):
+                continue
+    return pd.Series(actor_counts, dtype='int64').sort_values(ascending=False)
+
+
+def save_figure(fig, name, out_dir):
+    path = os.path.join(out_dir, name)
+    fig.savefig(path, dpi=110, bbox_inches='tight')
+    plt.close(fig)
+    log(f"Saved '{path}'")
+
+
+def render(ratings_agg, basics_agg, top_actors, out_dir):
+    """Render every figure from the pre-computed aggregates."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.stairs(ratings_agg['rating_counts'], RATING_BINS, fill=True)
+    ax.set_title(f"Distribution of IMDb Average Ratings (n={ratings_agg['rows']:,})")
+    ax.set_xlabel('Average Rating')
+    ax.set_ylabel('Frequency')
+    save_figure(fig, 'imdb_average_ratings_distribution.png', out_dir)
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    mesh = ax.pcolormesh(ratings_agg['vote_edges'], RATING_BINS, ratings_agg['hist2d'].T,
+                         norm=LogNorm(vmin=1, vmax=max(ratings_agg['hist2d'].max(), 1)), cmap='viridis')
+    fig.colorbar(mesh, ax=ax, label='Titles')
+    ax.set_title('IMDb Ratings vs. Number of Votes (2D histogram)')
+    ax.set_xlabel('log10(Number of Votes)')
+    ax.set_ylabel('Average Rating')
+    save_figure(fig, 'imdb_ratings_vs_votes.png', out_dir)
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    collection = ratings_agg['hexbin'].plot(ax)
+    fig.colorbar(collection, ax=ax, label='Titles')
+    ax.set_title('IMDb Ratings vs. Number of Votes (hexbin)')
+    ax.set_xlabel('log10(Number of Votes)')
+    ax.set_ylabel('Average Rating')
+    save_figure(fig, 'imdb_ratings_vs_votes_hexbin.png', out_dir)
+
+    top_genres = basics_agg['genre_counts'].head(10)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.barh(top_genres.index[::-1], top_genres.values[::-1])
+    ax.set_title('Top 10 Genres')
+    ax.set_xlabel('Number of Titles')
+    save_figure(fig, 'top_genres.png', out_dir)
+
+    corr = basics_agg['correlation']
+    fig, ax = plt.subplots(figsize=(12, 8))
+    image = ax.imshow(corr.values, cmap='coolwarm', vmin=-1, vmax=1)
+    ax.set_xticks(range(len(corr)), corr.columns, rotation=45, ha='right')
+    ax.set_yticks(range(len(corr)), corr.index)
+    for i in range(len(corr)):
+        for j in range(len(corr)):
+            ax.text(j, i, f"{corr.values[i, j]:.2f}", ha='center', va='center')
+    fig.colorbar(image, ax=ax)
+    ax.set_title(f"Correlation Heatmap of IMDb Data (n={basics_agg['joined_rows']:,}, joined on tconst)")
+    save_figure(fig, 'imdb_correlation_heatmap.png', out_dir)
+
+    if len(top_actors):
+        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.barh(top_actors.index[::-1], top_actors.values[::-1])
+        ax.set_title(f'Top {len(top_actors)} Actors by Appearance')
+        ax.set_xlabel('Number of Appearances')
+        save_figure(fig, 'top_actors.png', out_dir)
+
+
+def run_headless_eda(basics_path=imdb_basics_path, ratings_path=imdb_ratings_path,
+                     tmdb_path=tmdb_data_path, out_dir=processed_data_dir, chunk_size=CHUNK_SIZE):
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    log("Aggregating IMDb ratings...")
+    ratings_agg = aggregate_ratings(ratings_path, chunk_size)
+    log(f"{ratings_agg['rows']:,} ratings aggregated")
+
+    log("Aggregating IMDb basics (genres, correlations joined on tconst)...")
+    basics_agg = aggregate_basics(basics_path, ratings_path, chunk_size)
+    log(f"{basics_agg['joined_rows']:,} titles joined")
+
+    log("Counting TMDb cast appearances...")
+    top_actors = aggregate_cast(tmdb_path).head(5) if os.path.exists(tmdb_path) else pd.Series(dtype='int64')
+    log(f"Top 5 actors:\n{top_actors}")
+
+    log("Rendering figures...")
+    render(ratings_agg, basics_agg, top_actors, out_dir)
+    log(f"Headless EDA completed in {time.perf_counter() - start:.1f}s")
+    return ratings_agg, basics_agg, top_actors
+
+
+if __name__ == '__main__':
+    run_headless_eda()
@@ -5,6 +5,10 @@ import os
 import datetime
 import numpy as np
 import ast
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from reservoir_sample import sample_csv
 
 # Enhanced logging function with timestamps
 def log(message):
@@ -30,7 +34,9 @@ imdb_ratings = pd.read_csv(imdb_ratings_path)
 log(f"IMDb ratings data loaded with shape: {imdb_ratings.shape}")
 
 log("Loading TMDb data...")
-tmdb_data = pd.read_csv(tmdb_data_path, nrows=150)  # Limiting to 150 rows for efficiency
+# Limiting to 150 rows for efficiency, as a stratified sample (decade x rating band) of the whole file
+tmdb_data, _ = sample_csv(tmdb_data_path, 150, key_column='id', type_column=None,
+                          year_column='release_date', rating_column='vote_average')
 log(f"TMDb data loaded with shape: {tmdb_data.shape}")
 
 # Basic statistics
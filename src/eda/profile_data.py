@@ -0,0 +1,149 @@
+"""
+profile_data.py
+Streaming, mergeable data profile of the full IMDb/TMDb catalogue.
+
+Replaces the in-memory describe(include='all') and the dict-based actor count in
+perform_eda.py. Every file is read once in chunks and folded into sketches (moments,
+quantiles, distinct counts, top-k), including exploded genre and TMDb actor lists.
+Files are profiled in parallel worker processes and each profile is saved as JSON,
+so profiles of partitions or daily delta files can later be merged with --merge.
+
+Usage:
+    python src/eda/profile_data.py
+    python src/eda/profile_data.py --merge data/processed/profile_monday.json data/processed/profile_delta.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+from multiprocessing import Pool
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from sketches import TableProfile, TopK
+
+CHUNK_SIZE = 500_000
+TOP_K_CAPACITY = 1000
+
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data/cleaned'))
+processed_data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data/processed'))
+profile_path = os.path.join(processed_data_dir, 'data_profile.json')
+
+TABLES = {
+    'imdb_basics': os.path.join(data_dir, 'imdb_basics_cleaned.csv'),
+    'imdb_ratings': os.path.join(data_dir, 'imdb_ratings_cleaned.csv'),
+    'tmdb_data': os.path.join(data_dir, 'tmdb_data_cleaned.csv'),
+}
+
+# Matches "'name': 'Tom Hanks'" and "'name': \"Lupita Nyong'o\"" in the stringified cast lists
+CAST_NAME_RE = r"""['"]name['"]:\s*(?:'([^']*)'|"([^"]*)")"""
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def cast_names(cast):
+    """Flatten a Series of stringified cast lists into a Series of actor names, without literal_eval."""
+    names = cast.dropna().astype(str).str.extractall(CAST_NAME_RE)
+    return names[0].fillna(names[1])
+
+
+def genre_counts(genres):
+    """Per-genre counts for a chunk; only the distinct genre combinations are split."""
+    combinations = genres.dropna().astype(str).value_counts()
+    exploded = combinations.index.to_series().str.split(',').explode().str.strip()
+    counts = pd.Series(combinations.reindex(exploded.index).to_numpy(), index=exploded.to_numpy())
+    return counts[counts.index != ''].groupby(level=0).sum()
+
+
+def profile_file(path, chunk_size=CHUNK_SIZE):
+    """Profile one CSV in a single streaming pass. Returns (table profile, {list column: TopK})."""
+    table = TableProfile(TOP_K_CAPACITY)
+    lists = {}
+    for chunk in pd.read_csv(path, chunksize=chunk_size, low_memory=False):
+        table.update(chunk)
+        if 'genres' in chunk.columns:
+            lists.setdefault('genre', TopK(TOP_K_CAPACITY)).update_counts(genre_counts(chunk['genres']))
+        if 'cast' in chunk.columns:
+            lists.setdefault('actor', TopK(TOP_K_CAPACITY)).update(cast_names(chunk['cast']))
+    return table, lists
+
+
+def _profile_task(args):
+    name, path, chunk_size = args
+    start = time.perf_counter()
+    table, lists = profile_file(path, chunk_size)
+    return name, profile_to_dict(table, lists), time.perf_counter() - start
+
+
+def profile_to_dict(table, lists):
+    return {'table': table.to_dict(), 'lists': {name: sketch.to_dict() for name, sketch in lists.items()}}
+
+
+def profile_from_dict(state):
+    return (TableProfile.from_dict(state['table']),
+            {name: TopK.from_dict(sketch) for name, sketch in state['lists'].items()})
+
+
+def merge_profiles(profiles):
+    """Merge saved profile dicts ({table name: profile}) from partitions or daily deltas."""
+    merged = {}
+    for profile in profiles:
+        for name, state in profile.items():
+            table, lists = profile_from_dict(state)
+            if name not in merged:
+                merged[name] = (table, lists)
+                continue
+            merged[name][0].merge(table)
+            for list_name, sketch in lists.items():
+                if list_name in merged[name][1]:
+                    merged[name][1][list_name].merge(sketch)
+                else:
+                    merged[name][1][list_name] = sketch
+    return merged
+
+
+def report(profiles, top=5):
+    for name, (table, lists) in profiles.items():
+        log(f"Profile of {name} ({table.rows:,} rows):\n{table.describe()}")
+        for list_name, sketch in lists.items():
+            log(f"Top {top} {list_name}s in {name} (counts low by at most {sketch.error:,}):\n{sketch.top(top)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming, mergeable profile of the cleaned datasets.')
+    parser.add_argument('--merge', nargs='+', help='Merge previously saved profile JSON files instead of reading data')
+    parser.add_argument('--output', default=profile_path)
+    parser.add_argument('--workers', type=int, default=len(TABLES))
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    start = time.perf_counter()
+
+    if args.merge:
+        saved = []
+        for path in args.merge:
+            with open(path) as f:
+                saved.append(json.load(f))
+        log(f"Merging {len(saved)} saved profiles...")
+        profiles = merge_profiles(saved)
+    else:
+        tasks = [(name, path, args.chunk_size) for name, path in TABLES.items() if os.path.exists(path)]
+        with Pool(max(1, min(args.workers, len(tasks)))) as pool:
+            results = {}
+            for name, state, seconds in pool.imap_unordered(_profile_task, tasks):
+                log(f"Profiled {name} in {seconds:.1f}s")
+                results[name] = state
+        profiles = merge_profiles([results])
+
+    report(profiles)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({name: profile_to_dict(*profile) for name, profile in profiles.items()}, f)
+    log(f"Profile saved to '{args.output}' in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
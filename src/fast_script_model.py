@@ -0,0 +1,175 @@
+"""
+fast_script_model.py
+Fast, non-transformer script model built on hashed word/bigram features.
+
+A HashingVectorizer turns the whole corpus into a sparse matrix in one streaming pass
+(no vocabulary to fit, one script in memory at a time) and a linear regressor is fit
+on top. `benchmark` trains both this model and the BERT-LSTM path on the same script
+features output and reports fit time, predict time and accuracy side by side.
+
+Usage:
+    python src/fast_script_model.py --labels data/script_labels.csv
+    python src/fast_script_model.py --labels data/script_labels.csv --with-bert
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import datetime
+import tempfile
+import numpy as np
+import joblib
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+
+from token_windows import load_labels
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+scripts_dir = os.path.join(base_dir, 'data', 'scripts')
+store_dir = os.path.join(base_dir, 'data', 'processed', 'token_store')
+models_dir = os.path.join(base_dir, 'models', 'fast_script')
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def iter_script_texts(scripts_dir, script_files):
+    """Yield script texts one file at a time."""
+    for script_file in script_files:
+        with open(os.path.join(scripts_dir, script_file), 'r', encoding='utf-8', errors='replace') as f:
+            yield f.read()
+
+
+def make_vectorizer(n_features=2 ** 20):
+    """Word unigram + bigram hashing vectorizer; stateless, so train and predict share it."""
+    return HashingVectorizer(ngram_range=(1, 2), n_features=n_features, alternate_sign=False,
+                             norm='l2', dtype=np.float32)
+
+
+class FastScriptModel:
+    """Hashed n-gram features + ridge regression."""
+
+    def __init__(self, n_features=2 ** 20, alpha=1.0):
+        self.vectorizer = make_vectorizer(n_features)
+        self.regressor = Ridge(alpha=alpha, solver='sparse_cg')
+
+    def transform(self, scripts_dir, script_files):
+        return self.vectorizer.transform(iter_script_texts(scripts_dir, script_files))
+
+    def fit(self, scripts_dir, script_files, y):
+        self.regressor.fit(self.transform(scripts_dir, script_files), y)
+        return self
+
+    def predict(self, scripts_dir, script_files):
+        return self.regressor.predict(self.transform(scripts_dir, script_files))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+
+def evaluate(y_true, y_pred):
+    return {'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred))), 'r2': float(r2_score(y_true, y_pred))}
+
+
+def benchmark_fast(scripts_dir, train_files, test_files, y_train, y_test):
+    """Time fit and predict for the hashed n-gram model."""
+    start = time.perf_counter()
+    model = FastScriptModel().fit(scripts_dir, train_files, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = model.predict(scripts_dir, test_files)
+    predict_seconds = time.perf_counter() - start
+    return model, {'model': 'fast', 'fit_seconds': fit_seconds, 'predict_seconds': predict_seconds,
+                   **evaluate(y_test, predictions)}
+
+
+def benchmark_bert(store_dir, train_files, test_files, y_test, bert_name='bert-base-uncased',
+                   window_size=254, batch_size=16, epochs=1, seed=42):
+    """Time fit and predict for the BERT-LSTM path on the same split, using an existing token store."""
+    # TensorFlow is only needed for this comparison, not for fast mode itself
+    from token_windows import TokenStore, WindowPipeline
+    from script_trainer import ScriptTrainer, build_model, configure_cpu_threads, predict_scripts
+
+    configure_cpu_threads()
+    store = TokenStore(store_dir)
+    index = {name: i for i, name in enumerate(store.scripts)}
+    train_ids = [index[f] for f in train_files if f in index]
+    test_ids = [index[f] for f in test_files if f in index]
+
+    checkpoint_dir = tempfile.mkdtemp(prefix='bert_lstm_benchmark_')
+    try:
+        start = time.perf_counter()
+        pipeline = WindowPipeline(store, window_size=window_size, batch_size=batch_size,
+                                  seed=seed, script_ids=train_ids)
+        model = build_model(bert_name)
+        ScriptTrainer(model, pipeline, checkpoint_dir).train(epochs)
+        fit_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+    start = time.perf_counter()
+    test_pipeline = WindowPipeline(store, window_size=window_size, batch_size=batch_size, script_ids=test_ids)
+    predictions = predict_scripts(model, test_pipeline)
+    predict_seconds = time.perf_counter() - start
+
+    y_true = dict(zip(test_files, y_test))
+    scored = [(y_true[store.scripts[i]], predictions[i]) for i in test_ids if i in predictions]
+    y_true_arr, y_pred_arr = (np.array(col) for col in zip(*scored))
+    return {'model': 'bert_lstm', 'fit_seconds': fit_seconds, 'predict_seconds': predict_seconds,
+            **evaluate(y_true_arr, y_pred_arr)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the fast hashed n-gram script model and benchmark it.')
+    parser.add_argument('--scripts-dir', default=scripts_dir)
+    parser.add_argument('--labels', required=True, help='CSV of script_name and the training target')
+    parser.add_argument('--target-column', default='averageRating',
+                        help='Outcome to predict. sentiment_polarity is derived from the script text '
+                             'itself, so pass it only on purpose')
+    parser.add_argument('--with-bert', action='store_true', help='Also benchmark the BERT-LSTM path')
+    parser.add_argument('--store-dir', default=store_dir)
+    parser.add_argument('--bert-name', default='bert-base-uncased')
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels, args.target_column)
+    script_files = sorted(f for f in labels if os.path.exists(os.path.join(args.scripts_dir, f)))
+    y = np.array([labels[f] for f in script_files])
+    log(f"{len(script_files)} labelled scripts found")
+
+    train_files, test_files, y_train, y_test = train_test_split(
+        script_files, y, test_size=args.test_size, random_state=args.seed)
+
+    log("Benchmarking fast hashed n-gram model...")
+    model, fast_result = benchmark_fast(args.scripts_dir, train_files, test_files, y_train, y_test)
+    results = [fast_result]
+    log(f"Fast model: {fast_result}")
+    model.save(os.path.join(models_dir, 'fast_script_model.joblib'))
+
+    if args.with_bert:
+        log("Benchmarking BERT-LSTM model...")
+        bert_result = benchmark_bert(args.store_dir, train_files, test_files, y_test,
+                                     bert_name=args.bert_name, epochs=args.epochs, seed=args.seed)
+        results.append(bert_result)
+        log(f"BERT-LSTM model: {bert_result}")
+
+    results_path = os.path.join(models_dir, 'script_model_benchmark.json')
+    with open(results_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    log(f"Benchmark results saved to '{results_path}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,16 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 from sklearn.preprocessing import StandardScaler
-from textblob import TextBlob
-import re
 import datetime
-from textstat import textstat
 
-# Enhanced logging function with timestamps
-def log(message):
-    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from bulk_sentiment import BulkSentiment
+from collab_graph import collaboration_features, parse_credits
+from script_dedup import canonical_script_files
+from script_features import script_features as get_script_features
+from tracing import tracer, log, debug_frame
 
 # Set data paths
 data_dir = os.path.join(os.path.dirname(__file__), '../../data/processed')
@@ -18,34 +19,39 @@ os.makedirs(feature_dir, exist_ok=True)
 
 # Load processed data
 log("Loading processed IMDb basics data...")
-imdb_basics = pd.read_csv(os.path.join(data_dir, 'imdb_basics_processed.csv'))
-log("First 15 rows of IMDb basics data loaded:")
-print(imdb_basics.head(15))
+with tracer.span('load_imdb_basics') as span:
+    imdb_basics = pd.read_csv(os.path.join(data_dir, 'imdb_basics_processed.csv'))
+    span.rows_out = len(imdb_basics)
+debug_frame(imdb_basics, "First 15 rows of IMDb basics data loaded:")
 
 log("Loading processed IMDb ratings data...")
-imdb_ratings = pd.read_csv(os.path.join(data_dir, 'imdb_ratings_processed.csv'))
-log("First 15 rows of IMDb ratings data loaded:")
-print(imdb_ratings.head(15))
+with tracer.span('load_imdb_ratings') as span:
+    imdb_ratings = pd.read_csv(os.path.join(data_dir, 'imdb_ratings_processed.csv'))
+    span.rows_out = len(imdb_ratings)
+debug_frame(imdb_ratings, "First 15 rows of IMDb ratings data loaded:")
 
 log("Loading processed TMDb data...")
-tmdb_data = pd.read_csv(os.path.join(data_dir, 'tmdb_data_processed.csv'))
-log("First 15 rows of TMDb data loaded:")
-print(tmdb_data.head(15))
+with tracer.span('load_tmdb') as span:
+    tmdb_data = pd.read_csv(os.path.join(data_dir, 'tmdb_data_processed.csv'))
+    span.rows_out = len(tmdb_data)
+debug_frame(tmdb_data, "First 15 rows of TMDb data loaded:")
 
 log("Loading movie scripts...")
 scripts_dir = os.path.join(os.path.dirname(__file__), '../../data/scripts')
-script_files = [f for f in os.listdir(scripts_dir) if f.endswith('.txt')]
+script_files = canonical_script_files(scripts_dir)  # Near-duplicate drafts are skipped
 
 # Feature Engineering
 
 # 1. Merging IMDb basics and ratings data
 log("Merging IMDb basics and ratings data...")
-imdb_data = pd.merge(imdb_basics, imdb_ratings, on='tconst')
-log("First 15 rows of merged IMDb data:")
-print(imdb_data.head(15))
+with tracer.span('merge_imdb', rows_in=len(imdb_basics)) as span:
+    imdb_data = pd.merge(imdb_basics, imdb_ratings, on='tconst')
+    span.rows_out = len(imdb_data)
+debug_frame(imdb_data, "First 15 rows of merged IMDb data:")
 
 # 2. IMDb Features
 log("Processing IMDb features...")
+imdb_span = tracer.begin('imdb_features', rows_in=len(imdb_data))
 
 # One-hot encoding titleType
 imdb_data = pd.concat([imdb_data, pd.get_dummies(imdb_data['titleType'], prefix='titleType')], axis=1)
@@ -54,9 +60,8 @@ imdb_data = pd.concat([imdb_data, pd.get_dummies(imdb_data['titleType'], prefix=
 scaler = StandardScaler()
 imdb_data['runtimeMinutes_normalized'] = scaler.fit_transform(imdb_data[['runtimeMinutes']].fillna(0))
 
-# One-hot encoding genres
-genres = imdb_data['genres'].str.get_dummies(sep=',')
-imdb_data = pd.concat([imdb_data, genres], axis=1)
+# Genres stay one raw combination string per title ('Comedy,Drama'); model_trainer.py
+# and model_development.py target encode it instead of one-hot encoding every genre
 
 # Extracting and one-hot encoding release season
 def extract_season(start_year):
@@ -77,76 +82,60 @@ def extract_season(start_year):
 imdb_data['releaseSeason'] = imdb_data['startYear'].apply(lambda x: extract_season(x))
 imdb_data = pd.concat([imdb_data, pd.get_dummies(imdb_data['releaseSeason'], prefix='season')], axis=1)
 
-log("First 15 rows of IMDb data after feature processing:")
-print(imdb_data.head(15))
+tracer.end(imdb_span, rows_out=len(imdb_data))
+debug_frame(imdb_data, "First 15 rows of IMDb data after feature processing:")
 
 # 3. TMDb Features
 log("Processing TMDb features...")
-
-# Extracting cast and crew features
-def extract_name_list(data):
-    try:
-        return [person['name'] for person in eval(data)]
-    except:
-        return []
-
-tmdb_data['cast_names'] = tmdb_data['cast'].apply(extract_name_list)
-tmdb_data['crew_names'] = tmdb_data['crew'].apply(extract_name_list)
-
-log("First 15 rows of TMDb data after extracting cast and crew names:")
-print(tmdb_data.head(15))
+tmdb_span = tracer.begin('tmdb_features', rows_in=len(tmdb_data))
+
+# Cast and crew are parsed once, into interned person IDs and sparse credit matrices,
+# and the collaboration-graph features are computed from those
+with tracer.span('collab_graph', rows_in=len(tmdb_data)) as span:
+    collab_features, credit_graph = collaboration_features(tmdb_data)
+    tmdb_data = pd.concat([tmdb_data, collab_features], axis=1)
+    span.rows_out = len(tmdb_data)
+log(f"Collaboration features built over {len(credit_graph.interner):,} interned people")
+
+# Pipe-joined director and writer names, target encoded by model_trainer.py
+with tracer.span('credit_lists', rows_in=len(tmdb_data)) as span:
+    crew_credits = parse_credits(tmdb_data['crew'].reset_index(drop=True))
+    for column, jobs in (('directors', ['Director']), ('writers', ['Screenplay', 'Writer'])):
+        names = crew_credits[crew_credits['job'].isin(jobs)].groupby('row')['name'].agg('|'.join)
+        tmdb_data[column] = names.reindex(range(len(tmdb_data)), fill_value='').to_numpy()
+    span.rows_out = len(tmdb_data)
 
 # Extracting Director Popularity (example logic, customize based on data availability)
 # This is a placeholder as actual director popularity may require external data sources
-tmdb_data['director_popularity'] = tmdb_data['crew_names'].apply(lambda x: len(x))  # Example: number of crew members
+tmdb_data['director_popularity'] = np.bincount(crew_credits['row'], minlength=len(tmdb_data))  # Example: number of crew members
 
-log("First 15 rows of TMDb data after processing director popularity:")
-print(tmdb_data.head(15))
+tracer.end(tmdb_span, rows_out=len(tmdb_data))
+debug_frame(tmdb_data, "First 15 rows of TMDb data after processing director popularity:")
 
 # 4. Script Features
 log("Processing script features...")
+scripts_span = tracer.begin('script_features', rows_in=len(script_files))
+sentiment_analyzer = BulkSentiment()
 
-def get_script_features(script_path):
-    with open(script_path, 'r', encoding='utf-8') as file:
-        text = file.read()
-        
-        # Word Count
-        word_count = len(re.findall(r'\w+', text))
-        
-        # Sentiment Analysis Scores
-        sentiment = TextBlob(text).sentiment
-        
-        # Readability Score using textstat
-        try:
-            flesch_kincaid = textstat.flesch_kincaid_grade(text)
-        except:
-            flesch_kincaid = np.nan
-        
-        # Placeholder for genre indicators or other textual features
-        # Additional feature extraction can be done here
-        
-        return {
-            'word_count': word_count,
-            'sentiment_polarity': sentiment.polarity,
-            'sentiment_subjectivity': sentiment.subjectivity,
-            'flesch_kincaid': flesch_kincaid
-        }
-
-# Process all script files
+# Each script is read once and the same text feeds every consumer: word/sentence/syllable
+# counts and readability indices (including Flesch-Kincaid), scene structure (sentiment
+# trajectory, dialogue ratio, scene count, ...) and whole-script sentiment
 script_features = []
 
 for script_file in script_files:  # Removed limit to process all scripts
-    script_path = os.path.join(scripts_dir, script_file)
-    features = get_script_features(script_path)
-    features['script_name'] = script_file
-    script_features.append(features)
+    with tracer.span('script', rows_in=1) as span:
+        script_path = os.path.join(scripts_dir, script_file)
+        script_features.append(get_script_features(script_path, sentiment_analyzer))
+        span.rows_out = 1
 
 script_features_df = pd.DataFrame(script_features)
-log("First 15 rows of script features:")
-print(script_features_df.head(15))
+tracer.end(scripts_span, rows_out=len(script_features_df))
+
+debug_frame(script_features_df, "First 15 rows of script features:")
 
 # Saving final features
 log("Saving final feature set...")
+save_span = tracer.begin('save')
 
 imdb_features_path = os.path.join(feature_dir, 'imdb_features.csv')
 imdb_data.to_csv(imdb_features_path, index=False)
@@ -159,5 +148,8 @@ log(f"TMDb features saved to '{tmdb_features_path}'")
 script_features_path = os.path.join(feature_dir, 'final_script_features.csv')
 script_features_df.to_csv(script_features_path, index=False)
 log(f"Script features saved to '{script_features_path}'")
+tracer.end(save_span)
 
+tracer.report()
+tracer.export()
 log("Feature engineering completed successfully.")
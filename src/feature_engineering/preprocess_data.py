@@ -1,11 +1,12 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 from sklearn.preprocessing import StandardScaler
 
-# Logging function
-def log(message):
-    print(f"[{pd.Timestamp.now()}] [LOG]: {message}")
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from reservoir_sample import sample_csv
+from tracing import tracer, log, debug_frame
 
 # Define data paths
 base_dir = 'D:\\manav\\Documents\\Engineering\\Masters\\EE8206\\Project\\MovieSuccessPredictor'
@@ -13,10 +14,16 @@ data_dir = os.path.join(base_dir, 'data', 'processed')
 imdb_data_path = os.path.join(data_dir, 'imdb_basics_processed.csv')
 tmdb_data_path = os.path.join(data_dir, 'tmdb_data_processed.csv')
 
-# Load and limit data
-log("Loading IMDb and TMDb data...")
-imdb_data = pd.read_csv(imdb_data_path).head(3000)
-tmdb_data = pd.read_csv(tmdb_data_path).head(150)  # Adjust to 150 for consistency
+# Load a representative subset: seeded stratified samples (type x decade, plus vote band
+# for TMDb) drawn in one streaming pass, instead of the oldest titles at the top of each
+# file. The processed basics file has no usable rating column, so IMDb titles are not
+# banded by rating: a missing or constant rating would put every title in one band.
+log("Sampling IMDb and TMDb data...")
+with tracer.span('load') as span:
+    imdb_data, _ = sample_csv(imdb_data_path, 3000, key_column='tconst', rating_column=None)
+    tmdb_data, _ = sample_csv(tmdb_data_path, 150, key_column='id', type_column=None,
+                              year_column='release_date', rating_column='vote_average')
+    span.rows_out = len(imdb_data) + len(tmdb_data)
 
 log(f"IMDb data loaded with shape: {imdb_data.shape}")
 log(f"TMDb data loaded with shape: {tmdb_data.shape}")
@@ -46,19 +53,27 @@ categorical_columns = [
 
 # Normalizing numerical features
 log("Normalizing numerical features...")
-scaler = StandardScaler()
-combined_data[numerical_columns] = scaler.fit_transform(combined_data[numerical_columns])
+with tracer.span('normalize', rows_in=len(combined_data)) as span:
+    scaler = StandardScaler()
+    combined_data[numerical_columns] = scaler.fit_transform(combined_data[numerical_columns])
+    span.rows_out = len(combined_data)
 log("Normalization completed.")
-print(combined_data[numerical_columns].head(15))
+debug_frame(combined_data[numerical_columns])
 
 # One-hot encoding categorical features
 log("One-hot encoding categorical features...")
-combined_data = pd.get_dummies(combined_data, columns=categorical_columns, drop_first=True)
+with tracer.span('one_hot', rows_in=len(combined_data)) as span:
+    combined_data = pd.get_dummies(combined_data, columns=categorical_columns, drop_first=True)
+    span.rows_out = len(combined_data)
 log("One-hot encoding completed.")
-print(combined_data.head(15))
+debug_frame(combined_data)
 
 # Save preprocessed IMDb and TMDb data
 preprocessed_imdb_tmdb_path = os.path.join(data_dir, 'preprocessed_imdb_tmdb_data.csv')
 log("Saving preprocessed IMDb and TMDb data...")
-combined_data.to_csv(preprocessed_imdb_tmdb_path, index=False)
+with tracer.span('save', rows_in=len(combined_data)):
+    combined_data.to_csv(preprocessed_imdb_tmdb_path, index=False)
 log(f"Preprocessed IMDb and TMDb data saved to '{preprocessed_imdb_tmdb_path}'")
+
+tracer.report()
+tracer.export()
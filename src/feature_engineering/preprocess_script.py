@@ -1,13 +1,14 @@
 import pandas as pd
 import os
+import sys
 from transformers import BertTokenizer
 from keras.preprocessing.sequence import pad_sequences
-from textblob import TextBlob
-import textstat
 
-# Logging function
-def log(message):
-    print(f"[{pd.Timestamp.now()}] [LOG]: {message}")
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from bulk_sentiment import score_files
+from script_dedup import canonical_script_files
+from text_stats import count_text, readability
+from tracing import tracer, log
 
 # Define base directory and data paths
 base_dir = 'D:\\manav\\Documents\\Engineering\\Masters\\EE8206\\Project\\MovieSuccessPredictor'
@@ -19,34 +20,31 @@ os.makedirs(data_dir, exist_ok=True)
 
 # Tokenizer setup for BERT
 log("Setting up BERT tokenizer...")
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
+with tracer.span('load_tokenizer'):
+    tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
 
 # Initialize lists to store extracted features
 script_features = []
 
 # Function to process each script
-def process_script(script_text):
-    log(f"Processing script...")
-
+def process_script(script_text, sentiment):
     # Tokenization and padding
-    log("Tokenizing script text data...")
-    tokens = tokenizer.encode(script_text, add_special_tokens=True)
-    log(f"Tokens: {tokens[:10]}...")  # Print first 10 tokens for brevity
+    with tracer.span('tokenize') as span:
+        tokens = tokenizer.encode(script_text, add_special_tokens=True)
+        span.rows_out = len(tokens)
+    log(f"Tokens: {tokens[:10]}...", debug=True)  # Print first 10 tokens for brevity
 
-    log("Padding tokenized sequences...")
-    max_length = 512
-    tokenized_script_padded = pad_sequences([tokens], maxlen=max_length, padding='post', truncating='post')[0]
-    log(f"Padded tokens: {tokenized_script_padded[:10]}...")  # Print first 10 padded tokens for brevity
+    with tracer.span('pad'):
+        max_length = 512
+        tokenized_script_padded = pad_sequences([tokens], maxlen=max_length, padding='post', truncating='post')[0]
 
-    # Sentiment analysis
-    log("Performing sentiment analysis...")
-    sentiment = TextBlob(script_text).sentiment.polarity
-    log(f"Sentiment: {sentiment}")
+    # Sentiment is scored for the whole corpus up front
+    log(f"Sentiment: {sentiment}", debug=True)
 
     # Readability score
-    log("Calculating readability score...")
-    readability_score = textstat.flesch_reading_ease(script_text)
-    log(f"Readability score: {readability_score}")
+    with tracer.span('readability'):
+        readability_score = readability(count_text(script_text))['flesch_reading_ease']
+    log(f"Readability score: {readability_score}", debug=True)
 
     return {
         'tokenized_script_padded': tokenized_script_padded,
@@ -56,25 +54,35 @@ def process_script(script_text):
 
 # Process each script file in the directory
 log("Loading scripts from directory...")
-for i, script_file in enumerate(os.listdir(scripts_dir)):
-    script_path = os.path.join(scripts_dir, script_file)
-    with open(script_path, 'r', encoding='utf-8') as file:
-        script_text = file.read()
-
-    log(f"Loaded script: {script_file}")
-
-    # Process the script and extract features
-    features = process_script(script_text)
-    script_features.append(features)
-
-    # Print detailed logs for the first 15 scripts
-    if i < 15:
-        log(f"Detailed processing for script {i + 1}:")
-        print(f"File: {script_file}")
-        print(f"Tokens (first 10): {features['tokenized_script_padded'][:10]}")
-        print(f"Sentiment: {features['sentiment']}")
-        print(f"Readability Score: {features['readabilityScore']}")
-        print('-' * 40)
+script_files = canonical_script_files(scripts_dir)  # Near-duplicate drafts are skipped
+
+# Sentiment analysis for every script in one vectorized pass
+log("Performing sentiment analysis...")
+with tracer.span('sentiment', rows_in=len(script_files)) as span:
+    sentiments = score_files([os.path.join(scripts_dir, f) for f in script_files])['polarity'].values
+    span.rows_out = len(sentiments)
+
+with tracer.span('process_scripts', rows_in=len(script_files)) as scripts_span:
+    for i, script_file in enumerate(script_files):
+        with tracer.span('process_script', rows_in=1) as span:
+            script_path = os.path.join(scripts_dir, script_file)
+            with tracer.span('read'):
+                with open(script_path, 'r', encoding='utf-8') as file:
+                    script_text = file.read()
+
+            log(f"Loaded script: {script_file}", debug=True)
+
+            # Process the script and extract features
+            features = process_script(script_text, sentiments[i])
+            script_features.append(features)
+            span.rows_out = 1
+
+        # Detailed logs for the first 15 scripts
+        if i < 15:
+            log(f"Detailed processing for script {i + 1}: file={script_file} "
+                f"tokens={features['tokenized_script_padded'][:10]} sentiment={features['sentiment']} "
+                f"readability={features['readabilityScore']}", debug=True)
+    scripts_span.rows_out = len(script_features)
 
 # Convert the list of features to a DataFrame
 log("Converting extracted features to DataFrame...")
@@ -83,7 +91,10 @@ script_features_df = pd.DataFrame(script_features)
 # Save preprocessed script data
 final_script_features_path = os.path.join(data_dir, 'final_script_features.csv')
 log("Saving final script features data...")
-script_features_df.to_csv(final_script_features_path, index=False)
+with tracer.span('save', rows_in=len(script_features_df)):
+    script_features_df.to_csv(final_script_features_path, index=False)
 log(f"Final script features data saved to '{final_script_features_path}'")
 
+tracer.report()
+tracer.export()
 log("Script data processing completed.")
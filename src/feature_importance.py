@@ -0,0 +1,208 @@
+"""
+feature_importance.py
+Parallel permutation importance report for the Random Forest metadata model.
+
+Permutation importance re-scores the test set once per feature per repeat, so the
+(feature, repeat) tasks are spread across a process pool. The test matrix and target
+are copied once into shared memory. Workers attach to them and load the model from
+disk in their initializer, so each task only sends two integers. A worker permutes
+one column inside a small row block at a time, so no worker ever holds a full
+permuted copy of the test set.
+
+Tasks are queued one repeat at a time. With --time-budget the pool is stopped once the
+budget is spent (after at least one full repeat), and the report records how many
+repeats each feature got. The
+report also includes the tree-native (mean decrease in impurity) importances and
+their spread across trees, and a t-interval on the mean score drop per feature.
+
+Usage:
+    python src/feature_importance.py
+    python src/feature_importance.py --repeats 10 --workers 8 --time-budget 300
+"""
+import os
+import time
+import json
+import argparse
+import warnings
+import datetime
+from multiprocessing import Pool, shared_memory
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.metrics import r2_score
+
+from model_trainer import (final_features_path, model_path, encoder_path, load_features, split_features, load_model,
+                           apply_encoder)
+from target_encoder import TargetEncoder
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+report_dir = os.path.join(base_dir, 'data', 'processed')
+
+BLOCK_ROWS = 16_384
+
+# Workers predict on plain arrays; the column order is the one the model was fit on
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+# Per-worker state, set by _init_worker
+_worker = {}
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def to_shared(array):
+    """Copy `array` into a new shared memory block. Returns (block, shared view)."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    view[...] = array
+    return block, view
+
+
+def _attach(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _init_worker(x_spec, y_spec, model_file, block_rows):
+    x_block, X = _attach(*x_spec)
+    y_block, y = _attach(*y_spec)
+    model = load_model(model_file)
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = 1  # the pool is already the parallelism
+    _worker.update(X=X, y=y, blocks=(x_block, y_block), model=model, block_rows=block_rows)
+
+
+def predict_permuted(model, X, column, permutation, block_rows=BLOCK_ROWS):
+    """Predictions on X with `column` replaced by X[permutation, column], one row block at a time."""
+    predictions = np.empty(len(X), dtype=np.float64)
+    scratch = np.empty((min(block_rows, len(X)), X.shape[1]), dtype=X.dtype)
+    for start in range(0, len(X), block_rows):
+        stop = min(start + block_rows, len(X))
+        block = scratch[:stop - start]
+        block[...] = X[start:stop]
+        block[:, column] = X[permutation[start:stop], column]
+        predictions[start:stop] = model.predict(block)
+    return predictions
+
+
+def _permutation_task(task):
+    column, repeat, seed = task
+    X, y = _worker['X'], _worker['y']
+    permutation = np.random.default_rng([seed, column, repeat]).permutation(len(X))
+    predictions = predict_permuted(_worker['model'], X, column, permutation, _worker['block_rows'])
+    return column, repeat, r2_score(y, predictions)
+
+
+def tree_importances(model):
+    """Mean decrease in impurity and its standard deviation across trees."""
+    per_tree = np.array([tree.feature_importances_ for tree in model.estimators_])
+    return model.feature_importances_, per_tree.std(axis=0)
+
+
+def permutation_importance(model, model_file, X, y, repeats=5, workers=None, seed=42,
+                           time_budget=None, block_rows=BLOCK_ROWS):
+    """Score drops (baseline R^2 minus permuted R^2), shape (n_features, repeats).
+
+    The first repeat always runs in full so every feature gets a score; tasks the
+    time budget cuts off after that are left as NaN.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    baseline = r2_score(y, model.predict(X))
+    n_features = X.shape[1]
+    drops = np.full((n_features, repeats), np.nan)
+    workers = workers or os.cpu_count()
+    start = time.perf_counter()
+
+    x_block, X_shared = to_shared(X)
+    y_block, y_shared = to_shared(y)
+    try:
+        x_spec = (x_block.name, X_shared.shape, X_shared.dtype)
+        y_spec = (y_block.name, y_shared.shape, y_shared.dtype)
+        with Pool(workers, initializer=_init_worker, initargs=(x_spec, y_spec, model_file, block_rows)) as pool:
+            for repeat in range(repeats):
+                round_start = time.perf_counter()
+                tasks = [(column, repeat, seed) for column in range(n_features)]
+                for column, r, score in pool.imap_unordered(_permutation_task, tasks):
+                    drops[column, r] = baseline - score
+                    if repeat and time_budget and time.perf_counter() - start > time_budget:
+                        break
+                now = time.perf_counter()
+                # Leaving the with-block terminates the pool, dropping any tasks still queued
+                if time_budget and now - start + (now - round_start) > time_budget:
+                    if repeat + 1 < repeats:
+                        log(f"Time budget reached after {repeat + 1}/{repeats} repeats ({now - start:.1f}s)")
+                    break
+    finally:
+        del X_shared, y_shared
+        for block in (x_block, y_block):
+            block.close()
+            block.unlink()
+    return baseline, drops
+
+
+def importance_report(feature_names, drops, mdi, mdi_std, confidence=0.95):
+    """One row per feature: permutation mean/std/CI, repeats used, and tree-native importance."""
+    counts = np.sum(~np.isnan(drops), axis=1)
+    mean = np.nanmean(drops, axis=1)
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)  # features with a single repeat have no spread
+        std = np.nanstd(drops, axis=1, ddof=1)
+        half_width = stats.t.ppf(0.5 + confidence / 2, np.maximum(counts - 1, 1)) * std / np.sqrt(counts)
+    half_width = np.where(counts > 1, half_width, np.nan)
+    report = pd.DataFrame({
+        'feature': feature_names,
+        'permutation_mean': mean,
+        'permutation_std': std,
+        'ci_low': mean - half_width,
+        'ci_high': mean + half_width,
+        'repeats': counts,
+        'tree_importance': mdi,
+        'tree_importance_std': mdi_std,
+    })
+    return report.sort_values('permutation_mean', ascending=False).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Permutation and tree-native feature importance for the Random Forest model.')
+    parser.add_argument('--input', default=final_features_path)
+    parser.add_argument('--model', default=model_path)
+    parser.add_argument('--encoder', default=encoder_path, help='Target encoder saved by model_trainer.py, if any')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--time-budget', type=float, default=None, help='Stop launching repeats after this many seconds')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=os.path.join(report_dir, 'feature_importance.csv'))
+    args = parser.parse_args()
+
+    log(f"Loading features from '{args.input}' and model from '{args.model}'...")
+    encoder = TargetEncoder.load(args.encoder) if os.path.exists(args.encoder) else None
+    X, y = load_features(args.input, categorical=list(encoder.mappings_) if encoder else ())
+    _, X_test, _, y_test = split_features(X, y)
+    if encoder:
+        X_test = apply_encoder(X_test, encoder)
+    model = load_model(args.model)
+
+    log(f"Permutation importance for {X_test.shape[1]} features on {len(X_test):,} test rows...")
+    start = time.perf_counter()
+    baseline, drops = permutation_importance(model, args.model, X_test.values, y_test.values, args.repeats,
+                                             args.workers, args.seed, args.time_budget)
+    elapsed = time.perf_counter() - start
+    mdi, mdi_std = tree_importances(model)
+    report = importance_report(list(X_test.columns), drops, mdi, mdi_std)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    report.to_csv(args.output, index=False)
+    with open(os.path.splitext(args.output)[0] + '.json', 'w') as f:
+        json.dump({'baseline_r2': baseline, 'test_rows': len(X_test), 'seconds': elapsed,
+                   'features': report.to_dict(orient='records')}, f, indent=2)
+
+    log(f"Baseline R^2: {baseline:.4f}; permutation importance took {elapsed:.1f}s")
+    log("Top 15 features by permutation importance:")
+    log("\n" + report.head(15).to_string(index=False))
+    log(f"Feature importance report saved to '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+"""
+feature_store.py
+Memory-mapped feature store for serving model-ready features by tconst.
+
+A build materializes the numeric feature matrix as one column-contiguous float32
+file (Fortran order, so each feature column is a contiguous run on disk) plus a
+sorted int64 key file of tconst ids ('tt0111161' -> 111161). Opening a store only
+maps the two files, so cold start takes milliseconds whatever the row count, and
+pages are read on demand.
+
+Lookups are binary searches over the key file. `lookup` fills a caller-owned row
+buffer; `lookup_batch` runs a vectorized binary search whose scratch arrays live in a
+reusable `LookupBuffers`, so a request allocates nothing.
+
+Each build goes into its own directory under versions/ and becomes live when the
+CURRENT pointer file is replaced with os.replace, which is atomic. Readers on the old
+version keep working until they call `refresh()`.
+
+Usage:
+    python src/feature_store.py build --input data/processed/preprocessed_data.csv
+    python src/feature_store.py get tt0111161 tt0068646
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+
+FEATURES_FILE = 'features.f32'
+KEYS_FILE = 'keys.i64'
+META_FILE = 'meta.json'
+CURRENT_FILE = 'CURRENT'
+VERSIONS_DIR = 'versions'
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+store_root = os.path.join(base_dir, 'data', 'feature_store')
+preprocessed_data_path = os.path.join(base_dir, 'data', 'processed', 'preprocessed_data.csv')
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def tconst_key(tconst):
+    """'tt0111161' or 111161 -> 111161."""
+    if isinstance(tconst, str):
+        return int(tconst[2:] if tconst.startswith('tt') else tconst)
+    return int(tconst)
+
+
+def tconst_keys(values):
+    """Vectorized tconst_key over a Series or array; unparseable values become -1."""
+    values = pd.Series(values)
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        values = values.astype(str).str.replace(r'^tt', '', regex=True)
+    return pd.to_numeric(values, errors='coerce').fillna(-1).astype(np.int64).to_numpy()
+
+
+def build_feature_store(input_path, root=store_root, key_column='tconst', feature_columns=None,
+                        chunk_size=200_000, keep_versions=2):
+    """Materialize `input_path` (CSV) as a new store version and make it current.
+
+    Non-numeric columns are skipped unless listed in `feature_columns`; booleans become
+    0/1. Rows with duplicate tconst keep their first occurrence. Returns the version dir.
+    """
+    start = time.perf_counter()
+    keys = tconst_keys(pd.read_csv(input_path, usecols=[key_column])[key_column])
+    if feature_columns is None:
+        sample = pd.read_csv(input_path, nrows=10_000, low_memory=False)
+        feature_columns = [c for c in sample.columns if c != key_column and
+                           (pd.api.types.is_numeric_dtype(sample[c]) or pd.api.types.is_bool_dtype(sample[c]))]
+        skipped = [c for c in sample.columns if c != key_column and c not in feature_columns]
+        if skipped:
+            log(f"Skipping non-numeric columns: {skipped}")
+
+    # Sort by key once; `position[i]` is where input row i lands, -1 for dropped rows
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    keep &= sorted_keys >= 0
+    position = np.full(len(keys), -1, dtype=np.int64)
+    position[order[keep]] = np.arange(int(keep.sum()))
+    if len(keys) - keep.sum():
+        log(f"Dropped {len(keys) - int(keep.sum()):,} rows with duplicate or invalid {key_column}")
+    n_rows, n_cols = int(keep.sum()), len(feature_columns)
+
+    version = f"{datetime.datetime.now():%Y%m%d_%H%M%S_%f}_{os.getpid()}"
+    version_dir = os.path.join(root, VERSIONS_DIR, version)
+    os.makedirs(version_dir)
+    sorted_keys[keep].tofile(os.path.join(version_dir, KEYS_FILE))
+
+    features = np.memmap(os.path.join(version_dir, FEATURES_FILE), dtype=np.float32, mode='w+',
+                         shape=(max(n_rows, 1), max(n_cols, 1)), order='F')
+    offset = 0
+    for chunk in pd.read_csv(input_path, usecols=feature_columns, chunksize=chunk_size, low_memory=False):
+        target = position[offset:offset + len(chunk)]
+        valid = target >= 0
+        values = chunk[feature_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float32)
+        features[target[valid]] = values[valid]
+        offset += len(chunk)
+    features.flush()
+    del features
+
+    with open(os.path.join(version_dir, META_FILE), 'w') as f:
+        json.dump({'columns': feature_columns, 'n_rows': n_rows, 'dtype': 'float32', 'order': 'F',
+                   'key_column': key_column, 'source': os.path.abspath(input_path),
+                   'created': datetime.datetime.now().isoformat()}, f, indent=2)
+
+    publish(root, version)
+    prune(root, keep_versions)
+    log(f"Feature store version {version} built: {n_rows:,} rows x {n_cols} features "
+        f"in {time.perf_counter() - start:.1f}s")
+    return version_dir
+
+
+def publish(root, version):
+    """Atomically point CURRENT at `version`."""
+    tmp_path = os.path.join(root, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def current_version(root):
+    with open(os.path.join(root, CURRENT_FILE)) as f:
+        return f.read().strip()
+
+
+def prune(root, keep=2):
+    """Delete all but the newest `keep` versions, never the current one."""
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    current = current_version(root)
+    for version in sorted(os.listdir(versions_dir))[:-keep or None]:
+        if version != current:
+            shutil.rmtree(os.path.join(versions_dir, version), ignore_errors=True)
+
+
+class LookupBuffers:
+    """Preallocated scratch and output arrays for batched lookups of up to `capacity` keys."""
+
+    def __init__(self, capacity, n_cols):
+        self.capacity = capacity
+        self.query = np.empty(capacity, dtype=np.int64)
+        self.lo = np.empty(capacity, dtype=np.int64)
+        self.hi = np.empty(capacity, dtype=np.int64)
+        self.mid = np.empty(capacity, dtype=np.int64)
+        self.probe = np.empty(capacity, dtype=np.int64)
+        self.probe_keys = np.empty(capacity, dtype=np.int64)
+        self.less = np.empty(capacity, dtype=bool)
+        self.found = np.empty(capacity, dtype=bool)
+        # Fortran order like the store, so each column is filled with one contiguous take
+        self.rows = np.empty((capacity, n_cols), dtype=np.float32, order='F')
+
+
+class FeatureStore:
+    """Read-only view of one store version."""
+
+    def __init__(self, version_dir):
+        self.version_dir = version_dir
+        with open(os.path.join(version_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.columns = self.meta['columns']
+        self.n_rows = self.meta['n_rows']
+        self.keys = np.memmap(os.path.join(version_dir, KEYS_FILE), dtype=np.int64, mode='r', shape=(self.n_rows,)) \
+            if self.n_rows else np.empty(0, dtype=np.int64)
+        self.features = np.memmap(os.path.join(version_dir, FEATURES_FILE), dtype=np.float32, mode='r',
+                                  shape=(max(self.n_rows, 1), max(len(self.columns), 1)), order='F')
+
+    @classmethod
+    def open(cls, root=store_root):
+        """Open the current version of the store under `root`."""
+        store = cls(os.path.join(root, VERSIONS_DIR, current_version(root)))
+        store.root = root
+        return store
+
+    def refresh(self):
+        """Return the store for the current version: self if unchanged, else a newly opened store."""
+        root = getattr(self, 'root', os.path.dirname(os.path.dirname(self.version_dir)))
+        if os.path.basename(self.version_dir) == current_version(root):
+            return self
+        return FeatureStore.open(root)
+
+    def __len__(self):
+        return self.n_rows
+
+    def row_index(self, tconst):
+        """Row of `tconst`, or -1 if it is not in the store."""
+        key = tconst_key(tconst)
+        i = int(np.searchsorted(self.keys, key))
+        return i if i < self.n_rows and self.keys[i] == key else -1
+
+    def lookup(self, tconst, out=None):
+        """Feature row for one title, copied into `out` (float32, len(columns)). None if missing."""
+        i = self.row_index(tconst)
+        if i < 0:
+            return None
+        if out is None:
+            out = np.empty(len(self.columns), dtype=np.float32)
+        out[:] = self.features[i]
+        return out
+
+    def buffers(self, capacity):
+        return LookupBuffers(capacity, len(self.columns))
+
+    def lookup_batch(self, tconsts, buffers):
+        """Look up up to `buffers.capacity` keys with a vectorized binary search.
+
+        `tconsts` is an int64 array of numeric keys (see tconst_keys). Returns
+        (rows, found) views into `buffers`; rows for missing keys hold NaN.
+        """
+        n = len(tconsts)
+        if n > buffers.capacity:
+            raise ValueError(f"Batch of {n} keys exceeds buffer capacity {buffers.capacity}")
+        query, lo, hi, mid = buffers.query[:n], buffers.lo[:n], buffers.hi[:n], buffers.mid[:n]
+        probe, probe_keys = buffers.probe[:n], buffers.probe_keys[:n]
+        less, found, rows = buffers.less[:n], buffers.found[:n], buffers.rows[:n]
+        if self.n_rows == 0:
+            found.fill(False)
+            rows.fill(np.nan)
+            return rows, found
+        query[:] = tconsts
+        lo.fill(0)
+        hi.fill(self.n_rows)
+        # Lower bound: first index with keys[i] >= query, all in the preallocated arrays
+        for _ in range(int(self.n_rows).bit_length()):
+            np.add(lo, hi, out=mid)
+            np.right_shift(mid, 1, out=mid)
+            np.minimum(mid, self.n_rows - 1, out=probe)
+            np.take(self.keys, probe, out=probe_keys, mode='clip')
+            np.less(probe_keys, query, out=less)
+            np.less(lo, hi, out=found)
+            np.logical_and(less, found, out=less)
+            np.add(mid, 1, out=probe)
+            np.copyto(lo, probe, where=less)
+            np.logical_not(less, out=less)
+            np.logical_and(less, found, out=less)
+            np.copyto(hi, mid, where=less)
+        np.minimum(lo, self.n_rows - 1, out=mid)
+        np.take(self.keys, mid, out=probe_keys, mode='clip')
+        np.equal(probe_keys, query, out=found)
+        np.less(lo, self.n_rows, out=less)
+        np.logical_and(found, less, out=found)
+        for j in range(len(self.columns)):
+            np.take(self.features[:, j], mid, out=rows[:, j], mode='clip')
+        np.logical_not(found, out=less)
+        np.copyto(rows, np.nan, where=less[:, None])
+        return rows, found
+
+    def to_frame(self, tconsts):
+        """Convenience DataFrame of features for `tconsts` (allocates; not for the hot path)."""
+        keys = tconst_keys(tconsts)
+        rows, found = self.lookup_batch(keys, self.buffers(len(keys)))
+        frame = pd.DataFrame(rows.copy(), columns=self.columns)
+        frame.insert(0, self.meta['key_column'], pd.Series(tconsts).to_numpy())
+        return frame[found]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the memory-mapped feature store.')
+    parser.add_argument('--root', default=store_root)
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='Materialize a feature CSV as a new store version')
+    build.add_argument('--input', default=preprocessed_data_path)
+    build.add_argument('--key-column', default='tconst')
+    build.add_argument('--keep-versions', type=int, default=2)
+    get = commands.add_parser('get', help='Print the features of one or more titles')
+    get.add_argument('tconsts', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_feature_store(args.input, args.root, args.key_column, keep_versions=args.keep_versions)
+    else:
+        start = time.perf_counter()
+        store = FeatureStore.open(args.root)
+        log(f"Opened {len(store):,} rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+        print(store.to_frame(args.tconsts).T)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,9 +5,8 @@ from sklearn.preprocessing import StandardScaler
 from transformers import BertTokenizer
 from keras.preprocessing.sequence import pad_sequences
 
-# Logging function
-def log(message):
-    print(f"[{pd.Timestamp.now()}] [LOG]: {message}")
+from target_encoder import HIGH_CARDINALITY, TargetEncoder
+from tracing import tracer, log, debug_frame
 
 # Define data paths
 base_dir = 'D:\\manav\\Documents\\Engineering\\Masters\\EE8206\\Project\\MovieSuccessPredictor'
@@ -20,9 +19,11 @@ os.makedirs(data_dir, exist_ok=True)
 # Load final features dataset
 log("Loading final features dataset...")
 try:
-    final_features = pd.read_csv(final_features_path, low_memory=False)
+    with tracer.span('load') as span:
+        final_features = pd.read_csv(final_features_path, low_memory=False)
+        span.rows_out = len(final_features)
     log(f"Final features dataset loaded with shape: {final_features.shape}")
-    print(final_features.head(15))
+    debug_frame(final_features)
 except FileNotFoundError:
     log(f"File not found: {final_features_path}")
     raise
@@ -37,27 +38,50 @@ categorical_columns = [
 
 # Tokenizer setup for BERT
 log("Setting up BERT tokenizer...")
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
+with tracer.span('load_tokenizer'):
+    tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
 
 # Note: Skipping script text processing because the 'script_text' column is not present
 
+# Target encoding high-cardinality text columns (genre combinations, directors, writers)
+# against the raw rating, out of fold so no title sees its own rating; one-hot encoding
+# them would add thousands of sparse columns
+log("Target encoding high-cardinality columns...")
+with tracer.span('target_encode', rows_in=len(final_features)) as span:
+    encoded_columns = [column for column in HIGH_CARDINALITY if column in final_features.columns]
+    encoder = TargetEncoder(encoded_columns)
+    if encoded_columns:
+        encoded = encoder.fit_transform(final_features[encoded_columns], final_features['averageRating'])
+        final_features = pd.concat([final_features.drop(columns=encoded_columns), encoded], axis=1)
+        encoder.save(os.path.join(data_dir, 'target_encoder.json'))
+    span.rows_out = len(final_features)
+log(f"Target encoded columns: {encoded_columns}")
+
 # Normalizing numerical features
 log("Normalizing numerical features...")
-scaler = StandardScaler()
-final_features[numerical_columns] = scaler.fit_transform(final_features[numerical_columns])
+with tracer.span('normalize', rows_in=len(final_features)) as span:
+    scaler = StandardScaler()
+    final_features[numerical_columns] = scaler.fit_transform(final_features[numerical_columns])
+    span.rows_out = len(final_features)
 log("Normalization completed.")
-print(final_features[numerical_columns].head(15))
+debug_frame(final_features[numerical_columns])
 
-# One-hot encoding categorical features
+# One-hot encoding the low-cardinality categorical flags
 log("One-hot encoding categorical features...")
-final_features = pd.get_dummies(final_features, columns=categorical_columns, drop_first=True)
+with tracer.span('one_hot', rows_in=len(final_features)) as span:
+    final_features = pd.get_dummies(final_features, columns=categorical_columns, drop_first=True)
+    span.rows_out = len(final_features)
 log("One-hot encoding completed.")
-print(final_features.head(15))
+debug_frame(final_features)
 
 # Save the preprocessed data for model training
 preprocessed_data_path = os.path.join(data_dir, 'preprocessed_data.csv')
 log("Saving preprocessed data...")
-final_features.to_csv(preprocessed_data_path, index=False)
+with tracer.span('save', rows_in=len(final_features)):
+    final_features.to_csv(preprocessed_data_path, index=False)
 log(f"Preprocessed data saved to '{preprocessed_data_path}'")
 
+tracer.report()
+tracer.export()
+
 log("Data loading and preprocessing completed.")
@@ -0,0 +1,484 @@
+"""
+model_trainer.py
+Random Forest training on the engineered metadata features.
+
+Loads final_features.csv, holds out 40% of titles as the test set, fits a
+RandomForestRegressor and saves it to models/randomforest/random_forest_model.pkl.
+`split_features` puts a title in the test set when the hash of its tconst falls in the
+lowest 40% of the hash range. The split is deterministic, so evaluation and importance
+reports can rebuild the exact test set without saving it. It is also stable across
+dumps: a title keeps its side when other titles are added or removed.
+
+The fitted forest is also compiled into flat NumPy node arrays for all trees back to
+back, already in the layout `predict` walks (packed children with self-looping leaves,
+float32 thresholds), and saved as raw .npy files next to the pickle.
+`CompiledForest.load` memory-maps them, so loading takes milliseconds and the first
+prediction builds nothing. `predict` walks a block of trees for a whole batch at once,
+one level per step, dropping the (row, tree) paths that reached a leaf. It has none of
+scikit-learn's per-call overhead: about 10x faster for 1-100 rows, on par around
+2-3k rows. Beyond BULK_ROWS rows, scikit-learn's compiled traversal is faster, so
+those batches are handed to the pickled model the compiled forest was saved with.
+Predictions are bit-for-bit identical to RandomForestRegressor.predict with n_jobs=1
+at any batch size, and the pickled model is run with n_jobs=1 for that reason. With
+n_jobs > 1, scikit-learn adds the trees in thread completion order, so its results
+can differ in the last bits.
+
+High-cardinality text columns (genre combinations, directors, writers) are target
+encoded with target_encoder.py instead of being dropped. The
+training rows are encoded out of fold, and the test rows use the mapping fitted on
+the training set. The encoder is saved next to the model for inference.
+
+With --refresh, a new dump does not retrain from scratch. Training rows are
+fingerprinted (a hash of features and target), and only training titles that are new
+or changed since the last run are used. `refresh_forest` fits --refresh-trees new
+trees on them with warm start and retires the oldest trees beyond --max-trees. The
+split is stable, so no tree has seen a test title. Test RMSE over the same hash
+partition is compared with the RMSE recorded at the last full retrain. If it has
+drifted by more than --drift-threshold (relative), the refreshed model is discarded
+and the forest is retrained in full.
+
+Usage:
+    python src/model_trainer.py
+    python src/model_trainer.py --n-estimators 300 --max-depth 20
+    python src/model_trainer.py --refresh --refresh-trees 20 --max-trees 300 --drift-threshold 0.1
+"""
+import os
+import json
+import time
+import pickle
+import argparse
+import datetime
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+
+from target_encoder import HIGH_CARDINALITY, TargetEncoder
+
+TARGET = 'averageRating'
+KEY_COLUMN = 'tconst'
+TEST_SIZE = 0.4
+RANDOM_STATE = 42
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+final_features_path = os.path.join(base_dir, 'data', 'processed', 'final_features.csv')
+model_dir = os.path.join(base_dir, 'models', 'randomforest')
+model_path = os.path.join(model_dir, 'random_forest_model.pkl')
+compiled_dir = os.path.join(model_dir, 'compiled')
+encoder_path = os.path.join(model_dir, 'target_encoder.json')
+
+REFRESH_TREES = 20
+MAX_TREES = 300
+DRIFT_THRESHOLD = 0.10
+
+COMPILED_ARRAYS = ('feature', 'threshold', 'children', 'missing_left', 'value', 'roots')
+PREDICT_BATCH_ROWS = 4096
+PREDICT_BLOCK_PAIRS = 40960
+COMPACT_EVERY = 4
+BULK_ROWS = 2048
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def load_features(path=final_features_path, target=TARGET, categorical=()):
+    """Feature matrix (numeric and boolean columns as float64) and the target.
+
+    Columns named in `categorical` that exist in the file are kept as raw strings,
+    for target encoding after the split. Title IDs (KEY_COLUMN), when present, become
+    the index and key the split.
+    """
+    data = pd.read_csv(path, low_memory=False)
+    data = data.dropna(subset=[target])
+    if KEY_COLUMN in data.columns:
+        data = data.set_index(KEY_COLUMN)
+    X = data.drop(columns=[target]).select_dtypes(include=['number', 'bool']).astype(np.float64).fillna(0)
+    categorical = [column for column in categorical if column in data.columns and column != target]
+    if categorical:
+        X = pd.concat([X.drop(columns=categorical, errors='ignore'), data[categorical].astype(object)], axis=1)
+    return X, data[target].astype(np.float64)
+
+
+def target_encode(X_train, y_train, X_test, columns, **params):
+    """Replace `columns` with out-of-fold encodings on train and fitted encodings on test.
+
+    Returns (X_train, X_test, encoder).
+    """
+    columns = [column for column in columns if column in X_train.columns]
+    encoder = TargetEncoder(columns, **params)
+    if not columns:
+        return X_train, X_test, encoder
+    train_encoded = encoder.fit_transform(X_train[columns], y_train)
+    X_train = pd.concat([X_train.drop(columns=columns), train_encoded], axis=1)
+    return X_train, apply_encoder(X_test, encoder), encoder
+
+
+def apply_encoder(X, encoder):
+    """Replace the encoder's columns in X with their fitted encodings."""
+    columns = list(encoder.mappings_)
+    return pd.concat([X.drop(columns=columns), encoder.transform(X[columns])], axis=1)
+
+
+def holdout_rows(X, test_size=TEST_SIZE):
+    """Boolean mask of the test split: a row is a test row when the uint64 hash of its
+    title ID falls in the lowest `test_size` share of the hash range. Each title's side
+    depends on its own ID only. Without IDs the row's features are hashed instead."""
+    if X.index.name == KEY_COLUMN:
+        hashes = pd.util.hash_pandas_object(X.index.to_series(), index=False)
+    else:
+        hashes = pd.util.hash_pandas_object(X, index=False)
+    return hashes.to_numpy() < np.uint64(test_size * 2.0 ** 64)
+
+
+def split_features(X, y, test_size=TEST_SIZE):
+    """X_train, X_test, y_train, y_test, split per title by `holdout_rows`."""
+    test = holdout_rows(X, test_size)
+    return X[~test], X[test], y[~test], y[test]
+
+
+def train_forest(X_train, y_train, n_jobs=-1, **params):
+    """Fit a RandomForestRegressor; `params` override the defaults (e.g. GridSearchCV best_params_)."""
+    params = {'n_estimators': 100, 'random_state': RANDOM_STATE, **params}
+    model = RandomForestRegressor(n_jobs=n_jobs, **params)
+    model.fit(X_train, y_train)
+    return model
+
+
+def row_fingerprints(X, y):
+    """uint64 hash per row of features plus target; a changed title gets a new fingerprint."""
+    return pd.util.hash_pandas_object(X.assign(**{TARGET: y}), index=False).to_numpy()
+
+
+def refresh_forest(model, X_new, y_new, n_trees=REFRESH_TREES, max_trees=MAX_TREES, random_state=None):
+    """Warm-start `n_trees` more trees fitted on (X_new, y_new), then drop the oldest
+    trees so at most `max_trees` remain. Returns the number of trees retired."""
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_trees, random_state=random_state)
+    model.fit(X_new, y_new)
+    model.set_params(warm_start=False)
+    retired = max(len(model.estimators_) - max_trees, 0)
+    if retired:
+        # estimators_ is in fit order, so the head holds the oldest trees
+        model.estimators_ = model.estimators_[retired:]
+        model.set_params(n_estimators=len(model.estimators_))
+    return retired
+
+
+def refresh_paths(path=model_path):
+    """Refresh state JSON and training fingerprints, stored next to the model pickle."""
+    stem = os.path.splitext(path)[0]
+    return stem + '_refresh.json', stem + '_fingerprints.npy'
+
+
+def save_refresh_state(state, fingerprints, path=model_path):
+    state_file, fingerprint_file = refresh_paths(path)
+    with open(state_file, 'w') as f:
+        json.dump(state, f, indent=2)
+    np.save(fingerprint_file, np.unique(fingerprints))
+
+
+def load_refresh_state(path=model_path):
+    """(state, training fingerprints), or (None, None) if the model has no refresh state."""
+    state_file, fingerprint_file = refresh_paths(path)
+    if not (os.path.exists(path) and os.path.exists(state_file) and os.path.exists(fingerprint_file)):
+        return None, None
+    with open(state_file) as f:
+        return json.load(f), np.load(fingerprint_file)
+
+
+def evaluate(model, X_test, y_test):
+    y_pred = model.predict(X_test)
+    return {'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))), 'r2': float(r2_score(y_test, y_pred))}
+
+
+def save_model(model, path=model_path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump(model, f)
+
+
+def load_model(path=model_path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class CompiledForest:
+    """A fitted RandomForestRegressor as contiguous node arrays, laid out for traversal.
+
+    Node i of the concatenated forest splits on `feature[i]` at `threshold[i]` and goes
+    to `children[2 * i]` (left) or `children[2 * i + 1]` (right), as global node
+    indices; a leaf points back to itself on both sides. NaN goes left where
+    `missing_left[i]`, as in scikit-learn. `value[i]` is the leaf prediction, and
+    `roots[t]` is the first node of tree t.
+
+    Thresholds are scikit-learn's float64 ones rounded down to float32: for a float32
+    input x, x <= t exactly when x <= float32_round_down(t), so comparing in float32
+    gives scikit-learn's decisions. `model_path`, when set, is the pickled model that
+    large batches are handed to.
+    """
+
+    def __init__(self, feature, threshold, children, missing_left, value, roots, feature_names=None,
+                 model_path=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.feature_names = feature_names
+        self.model_path = model_path
+        self._model = None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model, model_path=None):
+        if not isinstance(model, RandomForestRegressor) or model.n_outputs_ != 1:
+            raise ValueError("Only single-output RandomForestRegressor models can be compiled")
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        children = []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count) + offset
+            leaf = tree.children_left < 0
+            children.append(np.stack([np.where(leaf, nodes, tree.children_left + offset),
+                                      np.where(leaf, nodes, tree.children_right + offset)], axis=1).ravel())
+        threshold = np.concatenate([tree.threshold for tree in trees])
+        threshold32 = threshold.astype(np.float32)
+        threshold32 = np.where(threshold32 > threshold, np.nextafter(threshold32, np.float32(-np.inf)), threshold32)
+
+        feature_names = getattr(model, 'feature_names_in_', None)
+        return cls(
+            feature=np.concatenate([np.maximum(tree.feature, 0) for tree in trees]).astype(np.intp),
+            threshold=threshold32.astype(np.float32),
+            children=np.concatenate(children).astype(np.intp),
+            missing_left=np.concatenate([tree.missing_go_to_left for tree in trees]).astype(bool),
+            value=np.concatenate([tree.value[:, 0, 0] for tree in trees]).astype(np.float64),
+            roots=offsets.astype(np.intp),
+            feature_names=None if feature_names is None else [str(name) for name in feature_names],
+            model_path=model_path,
+        )
+
+    def save(self, path=compiled_dir):
+        os.makedirs(path, exist_ok=True)
+        for name in COMPILED_ARRAYS:
+            np.save(os.path.join(path, f'{name}.npy'), getattr(self, name))
+        # Stored relative to the compiled directory, so the two can be moved together
+        model_path = os.path.relpath(self.model_path, path) if self.model_path else None
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'n_trees': self.n_trees, 'n_nodes': self.n_nodes, 'feature_names': self.feature_names,
+                       'model_path': model_path}, f)
+
+    @classmethod
+    def load(cls, path=compiled_dir, mmap=True):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None)
+                  for name in COMPILED_ARRAYS}
+        model_path = meta.get('model_path')
+        return cls(feature_names=meta['feature_names'],
+                   model_path=os.path.join(path, model_path) if model_path else None, **arrays)
+
+    def sklearn_model(self):
+        """The pickled model at `model_path` with n_jobs=1, loaded on first use; None without one."""
+        if self._model is None and self.model_path and os.path.exists(self.model_path):
+            # joblib reads both plain pickles and joblib.dump files
+            self._model = joblib.load(self.model_path).set_params(n_jobs=1)
+        return self._model
+
+    def _leaves(self, X, roots):
+        """Leaf reached by every (tree, row) pair for the trees starting at `roots`, shape (len(roots), n_rows).
+
+        All pairs advance one level per step with gathers over the node arrays; finished
+        pairs step in place on their self-looping leaves, and every COMPACT_EVERY levels
+        the pairs that reached a leaf are recorded and dropped.
+        """
+        feature, threshold, children = self.feature, self.threshold, self.children
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        has_nan = bool(np.isnan(flat_X).any())
+        node = np.repeat(np.asarray(roots, dtype=np.intp), n_rows)
+        row_offset = np.tile(np.arange(n_rows, dtype=np.intp) * n_features, len(roots))
+        position = np.arange(len(node))
+        leaves = np.empty(len(node), dtype=np.intp)
+        level = 0
+        while node.size:
+            x = flat_X[row_offset + feature[node]]
+            go_right = x > threshold[node]
+            if has_nan:
+                missing = np.flatnonzero(np.isnan(x))
+                go_right[missing] = ~self.missing_left[node[missing]]
+            node = children[2 * node + go_right]
+            level += 1
+            if level % COMPACT_EVERY == 0:
+                done = children[2 * node] == node
+                if done.any():
+                    leaves[position[done]] = node[done]
+                    keep = ~done
+                    node, row_offset, position = node[keep], row_offset[keep], position[keep]
+        return leaves.reshape(len(roots), n_rows)
+
+    def predict(self, X, batch_rows=PREDICT_BATCH_ROWS, bulk_rows=BULK_ROWS):
+        """Mean leaf value over trees, matching RandomForestRegressor.predict exactly at n_jobs=1.
+
+        More than `bulk_rows` rows are scored by the pickled model when there is one,
+        since scikit-learn's compiled traversal is faster on large batches.
+        """
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names] if self.feature_names else X
+            X = X.to_numpy()
+        # scikit-learn casts inputs to float32 before comparing against the thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) > bulk_rows and self.sklearn_model() is not None:
+            if self.feature_names:
+                X = pd.DataFrame(X, columns=self.feature_names, copy=False)
+            return self.sklearn_model().predict(X)
+        predictions = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), batch_rows):
+            batch = X[start:start + batch_rows]
+            total = np.zeros(len(batch), dtype=np.float64)
+            # A few trees at a time (about PREDICT_BLOCK_PAIRS pairs) keeps their nodes in
+            # cache; trees are still summed one by one, in order, like scikit-learn, so
+            # rounding is identical
+            tree_block = max(1, PREDICT_BLOCK_PAIRS // len(batch))
+            for first in range(0, self.n_trees, tree_block):
+                for tree_values in self.value[self._leaves(batch, self.roots[first:first + tree_block])]:
+                    total += tree_values
+            predictions[start:start + batch_rows] = total / self.n_trees
+        return predictions
+
+
+def compile_forest(model, path=compiled_dir, model_path=None):
+    """Compile a fitted forest to flat arrays and save it; returns the CompiledForest.
+
+    `model_path` is where the same model is pickled, for large batches.
+    """
+    compiled = CompiledForest.from_sklearn(model, model_path)
+    compiled.save(path)
+    return compiled
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the Random Forest metadata model.')
+    parser.add_argument('--input', default=final_features_path)
+    parser.add_argument('--output', default=model_path)
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=None)
+    parser.add_argument('--min-samples-leaf', type=int, default=1)
+    parser.add_argument('--jobs', type=int, default=-1)
+    parser.add_argument('--compiled-output', default=compiled_dir)
+    parser.add_argument('--target-encode', nargs='*', default=list(HIGH_CARDINALITY),
+                        help='High-cardinality columns to target encode (none to skip)')
+    parser.add_argument('--encoder-output', default=encoder_path)
+    parser.add_argument('--refresh', action='store_true', help='Warm-start refresh from new/changed titles')
+    parser.add_argument('--refresh-trees', type=int, default=REFRESH_TREES)
+    parser.add_argument('--max-trees', type=int, default=MAX_TREES, help='Oldest trees beyond this are retired')
+    parser.add_argument('--drift-threshold', type=float, default=DRIFT_THRESHOLD,
+                        help='Relative RMSE increase over the last full retrain that forces one')
+    args = parser.parse_args()
+
+    log(f"Loading features from '{args.input}'...")
+    X, y = load_features(args.input, categorical=args.target_encode)
+    split = {'key': KEY_COLUMN if X.index.name == KEY_COLUMN else 'features', 'test_size': TEST_SIZE}
+    X_train, X_test, y_train, y_test = split_features(X, y)
+    train_prints = row_fingerprints(X_train, y_train)
+
+    if args.refresh:
+        state, known = load_refresh_state(args.output)
+        if state is None:
+            log(f"No refresh state next to '{args.output}'; training from scratch")
+        elif state.get('split') != split:
+            log("Train/test split changed since the last full retrain; training from scratch")
+        elif state['target_encode'] != sorted(c for c in args.target_encode if c in X_train.columns):
+            log("Target-encoded columns changed since the last full retrain; training from scratch")
+        elif refresh(args, state, known, X_train, X_test, y_train, y_test, train_prints):
+            return
+
+    start = time.perf_counter()
+    X_train, X_test, encoder = target_encode(X_train, y_train, X_test, args.target_encode)
+    if encoder.mappings_:
+        encoder.save(args.encoder_output)
+        levels = {column: len(mapping['keys']) for column, mapping in encoder.mappings_.items()}
+        log(f"Target encoded {levels} levels; encoder saved to '{args.encoder_output}'")
+    log(f"Training set: {X_train.shape}, test set: {X_test.shape}")
+
+    model = train_forest(X_train, y_train, n_jobs=args.jobs, n_estimators=args.n_estimators,
+                         max_depth=args.max_depth, min_samples_leaf=args.min_samples_leaf)
+    seconds = time.perf_counter() - start
+    log(f"Random Forest trained in {seconds:.1f}s")
+
+    metrics = evaluate(model, X_test, y_test)
+    log(f"Random Forest Model RMSE: {metrics['rmse']:.4f}, R^2 Score: {metrics['r2']:.4f}")
+    state = {'reference': metrics, 'generation': 0, 'trained': datetime.datetime.now().isoformat(),
+             'full_train_seconds': seconds, 'split': split, 'target_encode': sorted(encoder.mappings_),
+             'refreshes': []}
+    save_outputs(args, model, state, train_prints)
+
+
+def refresh(args, state, known, X_train, X_test, y_train, y_test, train_prints):
+    """Incremental refresh from new and changed training rows. Returns False if a full retrain is needed.
+
+    The split is the stable one the reference RMSE was measured with, so X_test is the
+    same partition of titles and no tree was fitted on any of them.
+    """
+    start = time.perf_counter()
+    new = ~np.isin(train_prints, known)
+    model = load_model(args.output)
+    encoder = TargetEncoder.load(args.encoder_output) if state['target_encode'] else None
+    if encoder:
+        X_train, X_test = apply_encoder(X_train, encoder), apply_encoder(X_test, encoder)
+    columns = list(getattr(model, 'feature_names_in_', X_train.columns))
+    if list(X_train.columns) != columns:
+        log("Feature columns changed since the last full retrain; training from scratch")
+        return False
+
+    generation = state['generation'] + 1
+    retired = 0
+    if new.any():
+        log(f"Refresh {generation}: {int(new.sum()):,} new or changed titles of {len(new):,}")
+        model.set_params(n_jobs=args.jobs)
+        retired = refresh_forest(model, X_train[new], y_train[new], args.refresh_trees, args.max_trees,
+                                 random_state=RANDOM_STATE + generation)
+    else:
+        log(f"Refresh {generation}: no new or changed titles; checking drift only")
+    seconds = time.perf_counter() - start
+
+    metrics = evaluate(model, X_test, y_test)
+    drift = metrics['rmse'] / state['reference']['rmse'] - 1
+    log(f"Refreshed model RMSE: {metrics['rmse']:.4f} (reference {state['reference']['rmse']:.4f}, "
+        f"drift {drift:+.1%}), R^2 Score: {metrics['r2']:.4f}")
+    if drift > args.drift_threshold:
+        log(f"Drift exceeds {args.drift_threshold:.0%}; falling back to a full retrain")
+        return False
+
+    log(f"Refreshed in {seconds:.1f}s ({seconds / state['full_train_seconds']:.0%} of the last full retrain): "
+        f"{len(model.estimators_)} trees, {retired} retired")
+    state['generation'] = generation
+    state['refreshes'] = state['refreshes'][-99:] + [{
+        'generation': generation, 'refreshed': datetime.datetime.now().isoformat(), 'rows': int(new.sum()),
+        'trees': len(model.estimators_), 'retired': retired, 'test_rows': len(y_test), 'seconds': seconds,
+        'drift': drift, **metrics}]
+    save_outputs(args, model, state, np.concatenate([known, train_prints[new]]))
+    return True
+
+
+def save_outputs(args, model, state, fingerprints):
+    save_model(model, args.output)
+    save_refresh_state(state, fingerprints, args.output)
+    log(f"Model saved to '{args.output}'")
+
+    compiled = compile_forest(model, args.compiled_output, model_path=args.output)
+    log(f"Compiled forest ({compiled.n_trees} trees, {compiled.n_nodes:,} nodes) saved to '{args.compiled_output}'")
+
+
+if __name__ == '__main__':
+    main()
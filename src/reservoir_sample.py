@@ -0,0 +1,200 @@
+"""
+reservoir_sample.py
+One-pass stratified reservoir sampling for representative dev subsets.
+
+`.head(n)` / `nrows=n` subsets come from the top of the dumps. The dumps are sorted
+by ID, so those subsets are dominated by the oldest titles. This module draws a
+stratified sample of any size from a full file in one streaming pass instead.
+
+Strata are titleType x decade x rating band. Each row gets a uniform sort key: a
+seeded hash of its ID column when one is given, otherwise a seeded RNG stream in
+file order. Each stratum keeps only the `size` rows with the smallest keys (a
+bottom-k reservoir), so memory is bounded by size x number of strata, whatever the
+file size. At the end the target size is allocated across strata, proportionally
+to their row counts by default, and each stratum contributes its smallest keys. The
+same seed always gives the same sample. With an ID key, samples drawn from
+different files (basics, ratings, TMDb) select the same titles wherever they overlap.
+
+Usage:
+    python src/reservoir_sample.py --input data/processed/imdb_basics_processed.csv --size 3000
+    python src/reservoir_sample.py --input data/raw/title.basics.tsv --sep '\\t' --ratings data/raw/title.ratings.tsv --size 5000
+"""
+import os
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+
+from feature_store import tconst_keys
+
+SEED = 42
+CHUNK_SIZE = 200_000
+RATING_BINS = [-np.inf, 4, 5, 6, 7, 8, np.inf]
+RATING_LABELS = ['<4', '4-5', '5-6', '6-7', '7-8', '8+']
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sample_dir = os.path.join(base_dir, 'data', 'processed', 'samples')
+
+_KEY = '__sample_key'
+_POSITION = '__sample_position'
+_STRATUM = '__sample_stratum'
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def strata_keys(chunk, type_column='titleType', year_column='startYear', rating_column='averageRating'):
+    """'type|decade|rating band' per row. Missing columns collapse to a single level."""
+    n = len(chunk)
+    if type_column and type_column in chunk.columns:
+        kind = chunk[type_column].astype(str).replace({'nan': 'unknown', '\\N': 'unknown'})
+    else:
+        kind = pd.Series('all', index=chunk.index)
+    if year_column and year_column in chunk.columns:
+        # First four characters cover both '1994' and '1994-09-23'
+        year = pd.to_numeric(chunk[year_column].astype(str).str[:4], errors='coerce')
+        decade = (year // 10 * 10).map(lambda d: f'{int(d)}s', na_action='ignore').fillna('unknown')
+    else:
+        decade = pd.Series('all', index=chunk.index)
+    if rating_column and rating_column in chunk.columns:
+        rating = pd.to_numeric(chunk[rating_column], errors='coerce')
+        band = pd.cut(rating, RATING_BINS, labels=RATING_LABELS, right=False).astype(object).fillna('unrated')
+    else:
+        band = pd.Series(['all'] * n, index=chunk.index)
+    return (kind + '|' + decade + '|' + band.astype(str)).to_numpy()
+
+
+def sort_keys(chunk, key_column, seed, rng):
+    """Uniform [0, 1) keys: a seeded hash of `key_column`, or the next draws from `rng`."""
+    if key_column:
+        hashed = pd.util.hash_array(chunk[key_column].astype(str).to_numpy(), hash_key=f'{seed:016d}'[-16:])
+        return (hashed >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+    return rng.random(len(chunk))
+
+
+def allocate(counts, size, allocation='proportional'):
+    """Rows to draw per stratum: largest-remainder proportional, or equal with spill-over."""
+    counts = counts.astype(np.int64)
+    total = int(counts.sum())
+    if size >= total:
+        return counts.copy()
+    if allocation == 'proportional':
+        quota = counts * (size / total)
+        alloc = np.floor(quota).astype(np.int64)
+        remainder = size - int(alloc.sum())
+        alloc.iloc[np.argsort(-(quota - alloc).to_numpy(), kind='stable')[:remainder]] += 1
+        return alloc
+    if allocation == 'equal':
+        alloc = pd.Series(0, index=counts.index, dtype=np.int64)
+        left = size
+        while left > 0:
+            open_strata = counts.index[alloc < counts]
+            share = max(left // len(open_strata), 1)
+            for stratum in open_strata:
+                take = min(share, int(counts[stratum] - alloc[stratum]), left)
+                alloc[stratum] += take
+                left -= take
+                if not left:
+                    break
+        return alloc
+    raise ValueError(f"Unknown allocation '{allocation}'; use 'proportional' or 'equal'")
+
+
+def stratified_sample(chunks, size, seed=SEED, key_column=None, allocation='proportional', strata=strata_keys):
+    """Stratified sample of `size` rows from a stream of DataFrame chunks, in file order.
+
+    Returns (sample, stats), where stats has the population count and sampled rows
+    per stratum.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    counts = pd.Series(dtype=np.int64)
+    position = 0
+    for chunk in chunks:
+        chunk = chunk.copy()
+        chunk[_KEY] = sort_keys(chunk, key_column, seed, rng)
+        chunk[_POSITION] = np.arange(position, position + len(chunk))
+        chunk[_STRATUM] = strata(chunk)
+        position += len(chunk)
+        counts = counts.add(chunk[_STRATUM].value_counts(), fill_value=0)
+
+        # Bottom-k per stratum over what is kept so far plus this chunk
+        merged = chunk if reservoir is None else pd.concat([reservoir, chunk], ignore_index=True)
+        merged = merged.sort_values([_STRATUM, _KEY], kind='stable')
+        reservoir = merged[merged.groupby(_STRATUM, sort=False).cumcount() < size]
+
+    if reservoir is None:
+        return pd.DataFrame(), pd.DataFrame(columns=['population', 'sampled'])
+    alloc = allocate(counts.astype(np.int64), size, allocation)
+    rank = reservoir.groupby(_STRATUM, sort=False).cumcount()
+    sample = reservoir[rank.to_numpy() < alloc.reindex(reservoir[_STRATUM]).to_numpy()]
+    sample = sample.sort_values(_POSITION).drop(columns=[_KEY, _POSITION, _STRATUM]).reset_index(drop=True)
+    stats = pd.DataFrame({'population': counts.astype(np.int64), 'sampled': alloc})
+    stats.index.name = 'stratum'
+    return sample, stats.sort_values('population', ascending=False)
+
+
+def with_ratings(chunks, ratings_path, sep=',', key_column='tconst'):
+    """Attach averageRating from a ratings file to each chunk via a sorted int64 tconst index."""
+    ratings = pd.read_csv(ratings_path, sep=sep, usecols=[key_column, 'averageRating'], na_values=['\\N'])
+    keys = tconst_keys(ratings[key_column])
+    order = np.argsort(keys, kind='stable')
+    keys, values = keys[order], ratings['averageRating'].to_numpy(dtype=np.float32)[order]
+    del ratings
+    for chunk in chunks:
+        if 'averageRating' not in chunk.columns:
+            query = tconst_keys(chunk[key_column])
+            index = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+            found = (keys[index] == query) if len(keys) else np.zeros(len(query), dtype=bool)
+            chunk = chunk.assign(averageRating=np.where(found, values[index] if len(keys) else 0, np.nan))
+        yield chunk
+
+
+def sample_csv(path, size, seed=SEED, key_column=None, allocation='proportional', sep=',', chunk_size=CHUNK_SIZE,
+               ratings_path=None, type_column='titleType', year_column='startYear', rating_column='averageRating'):
+    """Stratified sample of a CSV/TSV file, read in chunks. Returns (sample, stats)."""
+    chunks = pd.read_csv(path, sep=sep, chunksize=chunk_size, low_memory=False)
+    if ratings_path:
+        chunks = with_ratings(chunks, ratings_path, sep)
+
+    def strata(chunk):
+        return strata_keys(chunk, type_column, year_column, rating_column)
+
+    return stratified_sample(chunks, size, seed, key_column, allocation, strata)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seeded, stratified one-pass sample of a large CSV/TSV dump.')
+    parser.add_argument('--input', required=True)
+    parser.add_argument('--size', type=int, required=True)
+    parser.add_argument('--output', default=None, help='Defaults to data/processed/samples/<input>_<size>.csv')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--sep', default=',')
+    parser.add_argument('--key-column', default='tconst', help="ID column hashed for the sort key ('' for an RNG stream)")
+    parser.add_argument('--allocation', choices=['proportional', 'equal'], default='proportional')
+    parser.add_argument('--ratings', default=None, help='IMDb ratings file to stratify raw basics by rating band')
+    parser.add_argument('--type-column', default='titleType')
+    parser.add_argument('--year-column', default='startYear')
+    parser.add_argument('--rating-column', default='averageRating')
+    args = parser.parse_args()
+
+    sep = args.sep.encode().decode('unicode_escape')
+    header = pd.read_csv(args.input, sep=sep, nrows=0).columns
+    key_column = args.key_column if args.key_column in header else None
+    sample, stats = sample_csv(args.input, args.size, args.seed, key_column, args.allocation, sep,
+                               ratings_path=args.ratings, type_column=args.type_column,
+                               year_column=args.year_column, rating_column=args.rating_column)
+
+    output = args.output or os.path.join(
+        sample_dir, f"{os.path.splitext(os.path.basename(args.input))[0]}_{args.size}.csv")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    sample.to_csv(output, index=False)
+    log(f"Sampled {len(sample):,} of {int(stats['population'].sum()):,} rows across {len(stats)} strata")
+    log("Largest strata (population, sampled):")
+    log("\n" + stats.head(15).to_string())
+    log(f"Sample saved to '{output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+screenplay_parser.py
+Streaming screenplay structure parser and per-scene feature arcs.
+
+`parse_scenes` walks a script line by line, recognising sluglines (INT./EXT.),
+character cues and the dialogue blocks under them, and yields one record per scene.
+Only the current scene is ever held in memory. `arc_features` reduces those records
+to a fixed-length vector (sentiment trajectory, dialogue ratio, scene count, ...)
+that can be joined onto the other script features.
+"""
+import re
+import numpy as np
+
+from bulk_sentiment import BulkSentiment
+
+SLUGLINE_RE = re.compile(r'^\s*(?:\d+[A-Z]?\s+)?(?:INT|EXT|INT\.?\s*/\s*EXT|EXT\.?\s*/\s*INT|I/E)[\.\s/-]')
+TRANSITION_RE = re.compile(r'^\s*(?:[A-Z ]+TO:|FADE (?:IN|OUT)[.:]?|DISSOLVE[.:]?|CUT[.:]?|THE END\.?)\s*$')
+CUE_EXTENSION_RE = re.compile(r"\s*\((?:V\.?O\.?|O\.?S\.?|O\.?C\.?|CONT'D|CONT\.?|CONTINUING)\)\s*", re.IGNORECASE)
+INTERIOR_RE = re.compile(r'^\s*(?:\d+[A-Z]?\s+)?(?:INT|I/E)')
+WORD_RE = re.compile(r"\w+(?:'\w+)*")
+
+# Number of equal segments the script is split into for trajectory features
+ARC_SEGMENTS = 5
+
+
+def is_character_cue(line):
+    """A short all-caps line that is not a slugline or transition, e.g. 'JOHN (V.O.)'."""
+    stripped = CUE_EXTENSION_RE.sub('', line).strip()
+    if not stripped or len(stripped) > 40 or len(stripped.split()) > 4:
+        return False
+    if SLUGLINE_RE.match(line) or TRANSITION_RE.match(line):
+        return False
+    return stripped.isupper() and any(c.isalpha() for c in stripped)
+
+
+def iter_lines(path):
+    """Yield lines of a script file without loading it whole."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            yield line.rstrip('\n')
+
+
+def parse_scenes(lines, analyzer=None):
+    """Yield one record per scene from an iterable of script lines.
+
+    Text before the first slugline becomes scene 0 when it holds any words.
+    Each record has the heading, INT/EXT and day/night flags, word counts for action
+    and dialogue, the number of dialogue blocks, the speaking characters, and the
+    scene's sentiment polarity.
+    """
+    analyzer = analyzer or BulkSentiment()
+
+    def new_scene(heading):
+        upper = heading.upper()
+        return {'heading': heading.strip(),
+                'interior': bool(INTERIOR_RE.match(upper)),
+                'night': 'NIGHT' in upper,
+                'action_words': 0, 'dialogue_words': 0, 'dialogue_blocks': 0,
+                'characters': set(), 'text': []}
+
+    def finish(record, index):
+        text = '\n'.join(record.pop('text'))
+        record['polarity'], record['subjectivity'] = analyzer.score_text(text)
+        record['words'] = record['action_words'] + record['dialogue_words']
+        return {'scene': index, **record}
+
+    def has_content(record):
+        return bool(record['heading']) or record['action_words'] + record['dialogue_words'] > 0
+
+    scene = new_scene('')  # preamble before the first slugline
+    index = 0
+    in_dialogue = False
+    for line in lines:
+        if SLUGLINE_RE.match(line):
+            if has_content(scene):
+                yield finish(scene, index)
+                index += 1
+            scene = new_scene(line)
+            in_dialogue = False
+            continue
+
+        stripped = line.strip()
+        if not stripped or TRANSITION_RE.match(line):
+            in_dialogue = False
+            continue
+        if is_character_cue(line):
+            scene['characters'].add(CUE_EXTENSION_RE.sub('', stripped).strip())
+            scene['dialogue_blocks'] += 1
+            in_dialogue = True
+            continue
+
+        n_words = len(WORD_RE.findall(stripped))
+        if in_dialogue:
+            if not (stripped.startswith('(') and stripped.endswith(')')):  # skip parentheticals
+                scene['dialogue_words'] += n_words
+                scene['text'].append(stripped)
+        else:
+            scene['action_words'] += n_words
+            scene['text'].append(stripped)
+
+    if has_content(scene):
+        yield finish(scene, index)
+
+
+def segment_means(values, weights, segments=ARC_SEGMENTS):
+    """Word-weighted mean of `values` over `segments` equal slices of the script's word positions."""
+    weights = np.asarray(weights, dtype=float)
+    values = np.asarray(values, dtype=float)
+    total = weights.sum()
+    if total <= 0:
+        return np.zeros(segments)
+    # Each scene's midpoint position (0..1) in the script decides its segment
+    midpoints = (np.cumsum(weights) - weights / 2) / total
+    segment = np.minimum((midpoints * segments).astype(int), segments - 1)
+    sums = np.bincount(segment, weights=values * weights, minlength=segments)
+    counts = np.bincount(segment, weights=weights, minlength=segments)
+    means = np.divide(sums, counts, out=np.full(segments, np.nan), where=counts > 0)
+    # Segments no scene midpoint falls into take the nearest earlier segment's value
+    valid = counts > 0
+    source = np.maximum.accumulate(np.where(valid, np.arange(segments), -1))
+    source[source < 0] = np.argmax(valid)
+    return means[source]
+
+
+def arc_features(scenes, segments=ARC_SEGMENTS):
+    """Reduce an iterable of scene records to a fixed-length feature dict."""
+    polarity, words, dialogue, interior, night, blocks = [], [], [], [], [], []
+    speaking = {}
+    scene_count = 0
+    for scene in scenes:
+        scene_count += 1
+        polarity.append(scene['polarity'])
+        words.append(scene['words'])
+        dialogue.append(scene['dialogue_words'])
+        interior.append(scene['interior'])
+        night.append(scene['night'])
+        blocks.append(scene['dialogue_blocks'])
+        for character in scene['characters']:
+            speaking[character] = speaking.get(character, 0) + 1
+
+    words = np.asarray(words, dtype=float)
+    total_words = words.sum()
+    polarity = np.asarray(polarity, dtype=float)
+    features = {
+        'scene_count': scene_count,
+        'dialogue_ratio': float(np.sum(dialogue) / total_words) if total_words else 0.0,
+        'mean_scene_words': float(words.mean()) if scene_count else 0.0,
+        'std_scene_words': float(words.std()) if scene_count else 0.0,
+        'dialogue_blocks_per_scene': float(np.mean(blocks)) if scene_count else 0.0,
+        'interior_ratio': float(np.mean(interior)) if scene_count else 0.0,
+        'night_ratio': float(np.mean(night)) if scene_count else 0.0,
+        'speaking_characters': len(speaking),
+        'lead_character_scene_share': max(speaking.values()) / scene_count if speaking else 0.0,
+    }
+
+    arc = segment_means(polarity, words, segments) if scene_count else np.zeros(segments)
+    for i, value in enumerate(arc):
+        features[f'sentiment_arc_{i}'] = float(value)
+    dialogue_arc = segment_means(np.divide(dialogue, words, out=np.zeros_like(words), where=words > 0),
+                                 words, segments) if scene_count else np.zeros(segments)
+    for i, value in enumerate(dialogue_arc):
+        features[f'dialogue_arc_{i}'] = float(value)
+
+    if scene_count > 1 and total_words:
+        position = (np.cumsum(words) - words / 2) / total_words
+        features['sentiment_slope'] = float(np.polyfit(position, polarity, 1, w=np.sqrt(words + 1))[0])
+        features['sentiment_volatility'] = float(np.std(np.diff(polarity)))
+    else:
+        features['sentiment_slope'] = 0.0
+        features['sentiment_volatility'] = 0.0
+    features['sentiment_min'] = float(polarity.min()) if scene_count else 0.0
+    features['sentiment_max'] = float(polarity.max()) if scene_count else 0.0
+    features['sentiment_end_minus_start'] = float(arc[-1] - arc[0])
+    return features
+
+
+def script_arc_features(path, analyzer=None):
+    """Parse one script file in a single streaming pass and return its arc features."""
+    return arc_features(parse_scenes(iter_lines(path), analyzer))
@@ -0,0 +1,342 @@
+"""
+script_dedup.py
+Near-duplicate screenplay detection with MinHash and LSH banding.
+
+Both scrapers write into data/scripts, and IMSDb often hosts several drafts of the
+same film, so the same screenplay can be tokenized, scored and trained on more than
+once. This stage finds those near-duplicates before any NLP work runs:
+
+1. Each script is streamed in blocks, normalized to lowercase words, and every
+   `shingle_size`-word shingle is hashed. A MinHash signature (`num_perm` minima of
+   independent hash functions) is folded block by block, so memory stays flat.
+2. Signatures are cut into bands. Scripts that share any band bucket become candidate
+   pairs, so comparisons grow with the number of near-duplicates, not with n^2. Bands
+   are sized so a pair at the threshold becomes a candidate with 99% probability.
+3. Candidates whose estimated Jaccard similarity reaches `threshold` are merged with
+   union-find. Each cluster keeps one canonical script, the longest draft.
+
+The canonical list is written to data/processed/canonical_scripts.txt and the clusters
+to script_dedup_report.json; `canonical_script_files` reads the report so later stages
+skip the duplicates. Signatures are cached by file
+size and mtime, so a rerun only hashes new or changed scripts.
+
+Usage:
+    python src/script_dedup.py
+    python src/script_dedup.py --threshold 0.8 --workers 4
+"""
+import os
+import re
+import json
+import time
+import argparse
+import datetime
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+THRESHOLD = 0.7
+RECALL = 0.99
+BLOCK_SIZE = 1 << 20
+SHINGLE_BATCH = 8192
+MAX_HASH = np.uint64((1 << 61) - 1)
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+scripts_dir = os.path.join(base_dir, 'data', 'scripts')
+processed_data_dir = os.path.join(base_dir, 'data', 'processed')
+canonical_list_path = os.path.join(processed_data_dir, 'canonical_scripts.txt')
+report_path = os.path.join(processed_data_dir, 'script_dedup_report.json')
+cache_path = os.path.join(processed_data_dir, 'script_minhash_cache.npz')
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def hash_permutations(num_perm=NUM_PERM, seed=1):
+    """Coefficients (a, b) of the multiply-shift hashes h(x) = (a * x + b) mod 2^64 >> 3."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingle_hashes(words, shingle_size=SHINGLE_SIZE):
+    """64-bit hashes of every run of `shingle_size` consecutive words."""
+    if len(words) < shingle_size:
+        words = words + [''] * (shingle_size - len(words)) if words else []
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    word_hashes = pd.util.hash_array(np.asarray(words, dtype=object))
+    n = len(words) - shingle_size + 1
+    combined = np.zeros(n, dtype=np.uint64)
+    for j in range(shingle_size):
+        # Order-sensitive mix of the k word hashes; overflow wraps mod 2^64 by design
+        combined = (combined * np.uint64(0x100000001B3)) ^ word_hashes[j:j + n]
+    return combined
+
+
+def update_signature(signature, hashes, a, b):
+    """Fold shingle hashes into the running MinHash signature (in place)."""
+    for start in range(0, len(hashes), SHINGLE_BATCH):
+        block = hashes[start:start + SHINGLE_BATCH]
+        # The product wraps mod 2^64; the high bits are the well-mixed ones, so drop the low 3
+        values = (np.outer(a, block) + b[:, None]) >> np.uint64(3)
+        np.minimum(signature, values.min(axis=1), out=signature)
+    return signature
+
+
+def script_signature(path, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, block_size=BLOCK_SIZE):
+    """Stream one script and return (MinHash signature, word count).
+
+    The signature is None for a script with no words: it has no shingles, so there is
+    nothing to estimate similarity from.
+    """
+    a, b = hash_permutations(num_perm)
+    signature = np.full(num_perm, MAX_HASH, dtype=np.uint64)
+    carry = []
+    n_words = 0
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        tail = ''
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            block = tail + block
+            cut = max(block.rfind(' '), block.rfind('\n'))
+            if cut < 0:
+                tail = block
+                continue
+            tail = block[cut + 1:]
+            words = WORD_RE.findall(block[:cut + 1].lower())
+            n_words += len(words)
+            # Keep the last shingle_size - 1 words so shingles spanning blocks are not lost
+            words = carry + words
+            update_signature(signature, shingle_hashes(words, shingle_size), a, b)
+            carry = words[-(shingle_size - 1):] if shingle_size > 1 else []
+        words = WORD_RE.findall(tail.lower())
+        n_words += len(words)
+        if words or not n_words:
+            update_signature(signature, shingle_hashes(carry + words, shingle_size), a, b)
+    return (signature if n_words else None), n_words
+
+
+def _signature_task(args):
+    path, num_perm, shingle_size = args
+    signature, n_words = script_signature(path, num_perm, shingle_size)
+    return signature, n_words
+
+
+def choose_bands(num_perm, threshold, recall=RECALL):
+    """(bands, rows) with bands * rows == num_perm: the fewest bands (fewest candidate pairs)
+    that still make a pair at Jaccard `threshold` a candidate with probability >= `recall`.
+
+    A pair at similarity s shares some band with probability 1 - (1 - s^rows)^bands. Putting
+    that S-curve's midpoint at the threshold would miss about half the pairs just above it.
+    """
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    enough = [(b, r) for b, r in options if 1 - (1 - threshold ** r) ** b >= recall]
+    return enough[0] if enough else options[-1]
+
+
+def candidate_pairs(signatures, bands, rows):
+    """Pairs of row indices that share at least one LSH band bucket."""
+    pairs = set()
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        buckets = {}
+        for i, key in enumerate(map(bytes, block)):
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            if len(members) > 1:
+                for x in range(len(members)):
+                    for y in range(x + 1, len(members)):
+                        pairs.add((members[x], members[y]))
+    return pairs
+
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, x, y):
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+
+def load_cache(path, num_perm, shingle_size):
+    if not path or not os.path.exists(path):
+        return {}
+    cache = np.load(path, allow_pickle=False)
+    if int(cache['num_perm']) != num_perm or int(cache['shingle_size']) != shingle_size:
+        return {}
+    return {name: (size, mtime, words, signature) for name, size, mtime, words, signature in
+            zip(cache['names'].tolist(), cache['sizes'].tolist(), cache['mtimes'].tolist(),
+                cache['words'].tolist(), cache['signatures'])}
+
+
+def save_cache(path, names, stats, signatures, words, num_perm, shingle_size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, names=np.array(names), sizes=np.array([s[0] for s in stats], dtype=np.int64),
+             mtimes=np.array([s[1] for s in stats]), words=np.array(words, dtype=np.int64),
+             signatures=signatures, num_perm=num_perm, shingle_size=shingle_size)
+
+
+def compute_signatures(scripts_dir, script_files, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE,
+                       workers=1, cache=None):
+    """Signatures and word counts for `script_files`, reusing cached ones whose size and mtime match."""
+    cache = cache or {}
+    signatures = np.empty((len(script_files), num_perm), dtype=np.uint64)
+    words = np.zeros(len(script_files), dtype=np.int64)
+    stats = []
+    todo = []
+    for i, name in enumerate(script_files):
+        st = os.stat(os.path.join(scripts_dir, name))
+        stats.append((st.st_size, st.st_mtime))
+        cached = cache.get(name)
+        if cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime:
+            words[i], signatures[i] = cached[2], cached[3]
+        else:
+            todo.append(i)
+
+    tasks = [(os.path.join(scripts_dir, script_files[i]), num_perm, shingle_size) for i in todo]
+    if workers > 1 and len(tasks) > 1:
+        with Pool(workers) as pool:
+            results = pool.map(_signature_task, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+    else:
+        results = map(_signature_task, tasks)
+    for i, (signature, n_words) in zip(todo, results):
+        # A script without shingles keeps an all-MAX_HASH row, which find_clusters skips
+        signatures[i], words[i] = (MAX_HASH if signature is None else signature), n_words
+    return signatures, words, stats, len(todo)
+
+
+def find_clusters(signatures, threshold=THRESHOLD):
+    """Near-duplicate clusters as lists of row indices (singletons omitted), plus the pair count checked.
+
+    Rows that are all MAX_HASH (scripts with no shingles) share every band bucket, so
+    they are left out of banding and union-find rather than clustered together.
+    """
+    bands, rows = choose_bands(signatures.shape[1], threshold)
+    keep = np.flatnonzero((signatures != MAX_HASH).any(axis=1)).tolist()
+    pairs = {(keep[x], keep[y]) for x, y in candidate_pairs(signatures[keep], bands, rows)}
+    union_find = UnionFind(len(signatures))
+    for x, y in pairs:
+        if np.mean(signatures[x] == signatures[y]) >= threshold:
+            union_find.union(x, y)
+    clusters = {}
+    for i in range(len(signatures)):
+        clusters.setdefault(union_find.find(i), []).append(i)
+    return [members for members in clusters.values() if len(members) > 1], len(pairs)
+
+
+def deduplicate(scripts_dir=scripts_dir, threshold=THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE,
+                workers=1, cache_file=cache_path):
+    """Find near-duplicate clusters in `scripts_dir`. Returns (canonical file list, report dict)."""
+    start = time.perf_counter()
+    script_files = sorted(f for f in os.listdir(scripts_dir) if f.endswith('.txt'))
+    cache = load_cache(cache_file, num_perm, shingle_size)
+    signatures, words, stats, hashed = compute_signatures(scripts_dir, script_files, num_perm, shingle_size,
+                                                          workers, cache)
+    if cache_file:
+        save_cache(cache_file, script_files, stats, signatures, words, num_perm, shingle_size)
+    signature_seconds = time.perf_counter() - start
+
+    clusters, n_pairs = find_clusters(signatures, threshold)
+    sizes = np.array([s[0] for s in stats], dtype=np.int64)
+    dropped = set()
+    cluster_report = []
+    for members in clusters:
+        # The longest draft is the canonical one; ties go to the first file name
+        canonical = max(members, key=lambda i: (words[i], -i))
+        duplicates = [i for i in members if i != canonical]
+        dropped.update(duplicates)
+        cluster_report.append({
+            'canonical': script_files[canonical],
+            'duplicates': [script_files[i] for i in duplicates],
+            'similarity': {script_files[i]: float(np.mean(signatures[i] == signatures[canonical])) for i in duplicates},
+        })
+
+    canonical_files = [f for i, f in enumerate(script_files) if i not in dropped]
+    dropped_idx = sorted(dropped)
+    n = len(script_files)
+    report = {
+        'scripts_dir': os.path.abspath(scripts_dir),
+        'scripts': n,
+        'canonical_scripts': len(canonical_files),
+        'duplicates_removed': len(dropped_idx),
+        'clusters': cluster_report,
+        'threshold': threshold,
+        'num_perm': num_perm,
+        'shingle_size': shingle_size,
+        'candidate_pairs_checked': n_pairs,
+        'all_pairs': n * (n - 1) // 2,
+        'signatures_computed': hashed,
+        'signatures_from_cache': n - hashed,
+        'work_saved': {
+            'scripts_fraction': len(dropped_idx) / n if n else 0.0,
+            'bytes_skipped': int(sizes[dropped_idx].sum()) if dropped_idx else 0,
+            'bytes_fraction': float(sizes[dropped_idx].sum() / sizes.sum()) if dropped_idx else 0.0,
+            'words_skipped': int(words[dropped_idx].sum()) if dropped_idx else 0,
+        },
+        'seconds': {'signatures': signature_seconds, 'total': time.perf_counter() - start},
+    }
+    return canonical_files, report
+
+
+def canonical_script_files(scripts_dir=scripts_dir, report_file=report_path):
+    """Script file names downstream stages should process: every script minus the
+    duplicates found by the last dedup run over the same directory. Scripts scraped
+    after that run are kept until dedup runs again."""
+    script_files = sorted(f for f in os.listdir(scripts_dir) if f.endswith('.txt'))
+    if not report_file or not os.path.exists(report_file):
+        return script_files
+    with open(report_file) as f:
+        report = json.load(f)
+    if os.path.abspath(report['scripts_dir']) != os.path.abspath(scripts_dir):
+        return script_files
+    duplicates = {name for cluster in report['clusters'] for name in cluster['duplicates']}
+    return [name for name in script_files if name not in duplicates]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find near-duplicate scripts and keep one canonical script per cluster.')
+    parser.add_argument('--scripts-dir', default=scripts_dir)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='Jaccard similarity for near-duplicates')
+    parser.add_argument('--num-perm', type=int, default=NUM_PERM)
+    parser.add_argument('--shingle-size', type=int, default=SHINGLE_SIZE)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--output', default=canonical_list_path)
+    parser.add_argument('--report', default=report_path)
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    canonical_files, report = deduplicate(args.scripts_dir, args.threshold, args.num_perm, args.shingle_size,
+                                          args.workers, None if args.no_cache else cache_path)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        f.write('\n'.join(canonical_files) + '\n')
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    saved = report['work_saved']
+    log(f"{report['scripts']} scripts, {len(report['clusters'])} near-duplicate clusters, "
+        f"{report['duplicates_removed']} duplicates removed")
+    log(f"Work saved downstream: {saved['scripts_fraction']:.1%} of scripts, "
+        f"{saved['bytes_fraction']:.1%} of bytes ({saved['words_skipped']:,} words)")
+    log(f"Checked {report['candidate_pairs_checked']:,} candidate pairs instead of {report['all_pairs']:,}")
+    log(f"Canonical script list saved to '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+script_features.py
+Every per-script feature from a single read of each file.
+
+text_stats, screenplay_parser and bulk_sentiment can each stream a script on their own,
+but calling all three reads every file three times. `script_features` reads a script
+once and hands the same text to all three consumers: word/sentence/syllable counts and
+readability indices, scene arc features, and whole-script sentiment. Only one script is
+held in memory at a time.
+
+BulkSentiment.score_text scores a single document with the same terms and weights as
+BulkSentiment.score, so the sentiment columns match score_files up to float rounding.
+"""
+import os
+import pandas as pd
+
+from bulk_sentiment import BulkSentiment
+from screenplay_parser import arc_features, parse_scenes
+from text_stats import count_text, stats_from_counts
+
+
+def read_script(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def script_features(path, analyzer=None):
+    """Text statistics, arc features and sentiment for one script file, read once."""
+    analyzer = analyzer or BulkSentiment()
+    text = read_script(path)
+    features = stats_from_counts(count_text(text))
+    features.update(arc_features(parse_scenes(text.split('\n'), analyzer)))
+    features['script_name'] = os.path.basename(path)
+    features['sentiment_polarity'], features['sentiment_subjectivity'] = analyzer.score_text(text)
+    return features
+
+
+def script_feature_frame(paths, analyzer=None):
+    """One row of script features per path, in the order of `paths`."""
+    analyzer = analyzer or BulkSentiment()
+    return pd.DataFrame([script_features(path, analyzer) for path in paths])
@@ -0,0 +1,219 @@
+"""
+script_trainer.py
+CPU training loop for the BERT-LSTM script model.
+
+Token windows stream from a memory-mapped token store (see token_windows.py) into a
+BERT encoder followed by a bidirectional LSTM head. Supports gradient accumulation
+and checkpoint/resume, and reports throughput in windows/sec.
+
+Usage:
+    python src/script_trainer.py --build-store --labels data/script_labels.csv
+    python src/script_trainer.py --epochs 3 --accumulation-steps 4
+"""
+import os
+import time
+import argparse
+import datetime
+import numpy as np
+import tensorflow as tf
+from transformers import BertTokenizer, TFBertModel
+from tf_keras.layers import Dense, LSTM, Input, Dropout, Bidirectional
+from tf_keras.models import Model
+from tf_keras.optimizers import Adam
+from tf_keras.losses import MeanSquaredError
+
+from token_windows import TokenStore, WindowPipeline, build_token_store, load_labels
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+scripts_dir = os.path.join(base_dir, 'data', 'scripts')
+store_dir = os.path.join(base_dir, 'data', 'processed', 'token_store')
+checkpoint_dir = os.path.join(base_dir, 'models', 'bert_lstm')
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def configure_cpu_threads(intra_op_threads=None, inter_op_threads=2):
+    """Use every core for op-level parallelism; keep inter-op small to avoid oversubscription."""
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads or os.cpu_count() or 1)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def build_model(bert_name='bert-base-uncased', lstm_units=64, dropout=0.2, freeze_bert=True):
+    """BERT encoder -> BiLSTM -> regression head, accepting variable-length windows."""
+    input_ids = Input(shape=(None,), dtype=tf.int32, name='input_ids')
+    attention_mask = Input(shape=(None,), dtype=tf.int32, name='attention_mask')
+
+    bert = TFBertModel.from_pretrained(bert_name)
+    bert.trainable = not freeze_bert
+    sequence_output = bert(input_ids, attention_mask=attention_mask).last_hidden_state
+
+    mask = tf.cast(attention_mask, tf.bool)
+    x = Bidirectional(LSTM(lstm_units))(sequence_output, mask=mask)
+    x = Dropout(dropout)(x)
+    output = Dense(1, name='score')(x)
+    return Model(inputs=[input_ids, attention_mask], outputs=output)
+
+
+def predict_scripts(model, pipeline):
+    """Average window predictions per script. Returns {script index: prediction}."""
+    sums, counts = {}, {}
+    for script_ids, input_ids, attention_mask in pipeline.iter_ordered():
+        predictions = model([input_ids, attention_mask], training=False).numpy()[:, 0]
+        for script_id, prediction in zip(script_ids, predictions):
+            sums[script_id] = sums.get(script_id, 0.0) + float(prediction)
+            counts[script_id] = counts.get(script_id, 0) + 1
+    return {script_id: sums[script_id] / counts[script_id] for script_id in sums}
+
+
+class ScriptTrainer:
+    """Custom training loop with gradient accumulation and resumable checkpoints."""
+
+    def __init__(self, model, pipeline, checkpoint_dir, learning_rate=2e-5,
+                 accumulation_steps=1, max_checkpoints=3):
+        self.model = model
+        self.pipeline = pipeline
+        self.accumulation_steps = accumulation_steps
+        self.optimizer = Adam(learning_rate=learning_rate)
+        self.loss_fn = MeanSquaredError()
+
+        self.epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.batch_in_epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.accumulated = [tf.Variable(tf.zeros_like(v), trainable=False)
+                            for v in model.trainable_variables]
+
+        self.checkpoint = tf.train.Checkpoint(model=model, optimizer=self.optimizer,
+                                              epoch=self.epoch, batch_in_epoch=self.batch_in_epoch)
+        self.manager = tf.train.CheckpointManager(self.checkpoint, checkpoint_dir, max_to_keep=max_checkpoints)
+
+    def restore(self):
+        """Resume from the latest checkpoint, if any. Returns True when a checkpoint was restored."""
+        if self.manager.latest_checkpoint:
+            self.checkpoint.restore(self.manager.latest_checkpoint)
+            log(f"Resumed from {self.manager.latest_checkpoint} "
+                f"(epoch {int(self.epoch)}, batch {int(self.batch_in_epoch)})")
+            return True
+        return False
+
+    @tf.function(input_signature=[
+        tf.TensorSpec([None, None], tf.int32),
+        tf.TensorSpec([None, None], tf.int32),
+        tf.TensorSpec([None], tf.float32),
+    ], reduce_retracing=True)
+    def accumulate_step(self, input_ids, attention_mask, targets):
+        with tf.GradientTape() as tape:
+            predictions = tf.squeeze(self.model([input_ids, attention_mask], training=True), axis=-1)
+            loss = self.loss_fn(targets, predictions) / self.accumulation_steps
+        gradients = tape.gradient(loss, self.model.trainable_variables)
+        for acc, grad in zip(self.accumulated, gradients):
+            if grad is not None:
+                acc.assign_add(grad)
+        return loss * self.accumulation_steps
+
+    @tf.function
+    def apply_accumulated(self):
+        self.optimizer.apply_gradients(zip(self.accumulated, self.model.trainable_variables))
+        for acc in self.accumulated:
+            acc.assign(tf.zeros_like(acc))
+
+    def train(self, epochs, checkpoint_every=200, log_every=20):
+        """Train until `epochs` complete, checkpointing every `checkpoint_every` optimizer steps."""
+        self.restore()
+        steps_since_checkpoint = 0
+        while int(self.epoch) < epochs:
+            epoch = int(self.epoch)
+            skip = int(self.batch_in_epoch)
+            num_batches = self.pipeline.num_batches(epoch)
+            log(f"Epoch {epoch + 1}/{epochs}: {num_batches} batches ({skip} already done)")
+
+            windows, losses = 0, []
+            start = last_log = time.perf_counter()
+            last_windows = 0
+            micro_step = 0
+            for input_ids, attention_mask, targets in self.pipeline.iter_epoch(epoch, skip_batches=skip):
+                loss = self.accumulate_step(input_ids, attention_mask, targets)
+                losses.append(float(loss))
+                windows += len(targets)
+                micro_step += 1
+                self.batch_in_epoch.assign_add(1)
+
+                # Accumulated gradients are only applied on full groups, so a checkpoint
+                # never captures a partially accumulated step.
+                if micro_step % self.accumulation_steps == 0:
+                    self.apply_accumulated()
+                    steps_since_checkpoint += 1
+                    if steps_since_checkpoint >= checkpoint_every:
+                        self.manager.save()
+                        steps_since_checkpoint = 0
+
+                if micro_step % log_every == 0:
+                    # Report throughput over the last interval so warm-up does not mask the steady state
+                    now = time.perf_counter()
+                    log(f"Batch {int(self.batch_in_epoch)}/{num_batches} - loss {np.mean(losses[-log_every:]):.4f} "
+                        f"- {(windows - last_windows) / (now - last_log):.1f} windows/sec")
+                    last_log, last_windows = now, windows
+
+            if micro_step % self.accumulation_steps:
+                self.apply_accumulated()
+            elapsed = time.perf_counter() - start
+            log(f"Epoch {epoch + 1} done - mean loss {np.mean(losses) if losses else float('nan'):.4f} "
+                f"- {windows / max(elapsed, 1e-9):.1f} windows/sec")
+
+            self.epoch.assign_add(1)
+            self.batch_in_epoch.assign(0)
+            self.manager.save()
+            steps_since_checkpoint = 0
+        return self.model
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the BERT-LSTM script model on CPU.')
+    parser.add_argument('--scripts-dir', default=scripts_dir)
+    parser.add_argument('--store-dir', default=store_dir)
+    parser.add_argument('--checkpoint-dir', default=checkpoint_dir)
+    parser.add_argument('--build-store', action='store_true', help='(Re)tokenize scripts into the token store first')
+    parser.add_argument('--labels', help='CSV of script_name and the training target')
+    parser.add_argument('--target-column', default='averageRating',
+                        help='Outcome to predict. sentiment_polarity is derived from the script text '
+                             'itself, so pass it only on purpose')
+    parser.add_argument('--bert-name', default='bert-base-uncased')
+    parser.add_argument('--window-size', type=int, default=254)
+    parser.add_argument('--stride', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--accumulation-steps', type=int, default=1)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--learning-rate', type=float, default=2e-5)
+    parser.add_argument('--lstm-units', type=int, default=64)
+    parser.add_argument('--fine-tune-bert', action='store_true')
+    parser.add_argument('--checkpoint-every', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    configure_cpu_threads()
+    tf.random.set_seed(args.seed)
+
+    if args.build_store:
+        if not args.labels:
+            parser.error('--build-store requires --labels')
+        log("Building token store...")
+        tokenizer = BertTokenizer.from_pretrained(args.bert_name)
+        labels = load_labels(args.labels, args.target_column)
+        store = build_token_store(args.scripts_dir, args.store_dir, tokenizer, labels)
+    else:
+        store = TokenStore(args.store_dir)
+
+    pipeline = WindowPipeline(store, window_size=args.window_size, stride=args.stride,
+                              batch_size=args.batch_size, seed=args.seed)
+    log(f"{pipeline.num_windows} training windows from {len(store)} scripts")
+
+    log("Building BERT-LSTM model...")
+    model = build_model(args.bert_name, lstm_units=args.lstm_units, freeze_bert=not args.fine_tune_bert)
+    trainer = ScriptTrainer(model, pipeline, args.checkpoint_dir, learning_rate=args.learning_rate,
+                            accumulation_steps=args.accumulation_steps)
+    trainer.train(args.epochs, checkpoint_every=args.checkpoint_every)
+    log("BERT-LSTM training completed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,631 @@
+"""
+shard_queue.py
+Sharded, file-queue-based execution of the script NLP stages across processes or nodes.
+
+`init` splits the script corpus into work units by content hash (a script always lands
+in the same unit, whatever the file listing order) and writes them to a queue directory
+on a shared filesystem. Any number of `work` processes, on any number of machines, then
+pull units from it:
+
+- A worker claims a unit by creating leases/<unit>.lease with O_CREAT | O_EXCL, which
+  only one creator can win.
+- While the unit runs, a heartbeat thread touches the lease every `heartbeat` seconds.
+- A lease whose mtime is older than `lease_timeout` belongs to a crashed or stalled
+  worker. Another worker takes it over by atomically renaming it away and claiming
+  the unit again. If the renamed file's token or mtime is not the one it judged
+  expired (a faster worker took over first, or a late heartbeat arrived), the lease
+  is put back and the unit left alone. A unit that keeps killing workers is marked
+  failed after `max_attempts` claims.
+- Output is written to a temporary file and os.replace'd into output/, and only then is
+  done/<unit> created. A unit is either finished or it will be redone. Every stage is
+  a pure function of its unit's files, so a unit that runs twice writes the same bytes.
+
+`merge` combines the partial outputs in sorted script-name order, so the result does
+not depend on which worker ran which unit. Stages:
+
+    script_features   text stats, scene arcs and sentiment (feature_engineering.get_script_features)
+    process_script    BERT tokens padded to 512, sentiment and readability (preprocess_script.process_script)
+    tokenize          the memory-mapped token store used by script_trainer.py
+
+Lease expiry compares file mtimes with this machine's clock, so on a shared filesystem
+`lease_timeout` should be far larger than the clock skew between nodes.
+
+Usage:
+    python src/shard_queue.py init --queue /shared/queue --stage script_features --units 64
+    python src/shard_queue.py work --queue /shared/queue          # on every node, as many as wanted
+    python src/shard_queue.py status --queue /shared/queue
+    python src/shard_queue.py merge --queue /shared/queue --output data/features/final_script_features.csv
+    python src/shard_queue.py local --stage tokenize --workers 4 --output data/processed/token_store
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import socket
+import hashlib
+import argparse
+import datetime
+import tempfile
+import threading
+import traceback
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+from script_dedup import canonical_script_files
+
+LEASE_TIMEOUT = 300.0
+HEARTBEAT = 30.0
+POLL = 5.0
+MAX_ATTEMPTS = 3
+MAX_LENGTH = 512
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+scripts_dir = os.path.join(base_dir, 'data', 'scripts')
+
+STAGES = {}
+
+# Per-process caches for expensive stage resources (tokenizer, sentiment lexicon)
+_resources = {}
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}", flush=True)
+
+
+def stage(name):
+    """Register `run(paths, options, out_prefix)`; stages without a @merger merge as CSV tables."""
+    def register(run):
+        STAGES[name] = {'run': run, 'merge': None}
+        return run
+    return register
+
+
+def merger(name):
+    def register(merge):
+        STAGES[name]['merge'] = merge
+        return merge
+    return register
+
+
+def atomic_write(path, write):
+    """Call write(tmp_path), then move the file into place in one step."""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        write(tmp_path)
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(path, data, **kwargs):
+    """atomic_write `data` as JSON."""
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, **kwargs)
+    atomic_write(path, write)
+
+
+def content_hash(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------- stages
+
+def _resource(key, factory):
+    if key not in _resources:
+        _resources[key] = factory()
+    return _resources[key]
+
+
+def _tokenizer(options):
+    from transformers import BertTokenizer
+    name = options.get('tokenizer', 'bert-base-uncased')
+    return _resource(('tokenizer', name), lambda: BertTokenizer.from_pretrained(name))
+
+
+def _sentiment():
+    from bulk_sentiment import BulkSentiment
+    return _resource('sentiment', BulkSentiment)
+
+
+def _write_table(frame, out_prefix):
+    atomic_write(out_prefix + '.csv', lambda tmp: frame.to_csv(tmp, index=False))
+
+
+@stage('script_features')
+def run_script_features(paths, options, out_prefix):
+    from script_features import script_feature_frame
+
+    _write_table(script_feature_frame(paths, _sentiment()), out_prefix)
+
+
+@stage('process_script')
+def run_process_script(paths, options, out_prefix):
+    from bulk_sentiment import score_files
+    from text_stats import count_text, readability
+
+    tokenizer = _tokenizer(options)
+    max_length = options.get('max_length', MAX_LENGTH)
+    sentiments = score_files(paths, _sentiment())['polarity'].values
+    rows = []
+    for path, sentiment in zip(paths, sentiments):
+        with open(path, 'r', encoding='utf-8') as f:
+            script_text = f.read()
+        tokens = tokenizer.encode(script_text, add_special_tokens=True)[:max_length]
+        # Same as pad_sequences(padding='post', truncating='post') with its int32 default
+        padded = np.zeros(max_length, dtype=np.int32)
+        padded[:len(tokens)] = tokens
+        rows.append({
+            'script_name': os.path.basename(path),
+            'tokenized_script_padded': padded,
+            'sentiment': sentiment,
+            'readabilityScore': readability(count_text(script_text))['flesch_reading_ease'],
+        })
+    _write_table(pd.DataFrame(rows), out_prefix)
+
+
+@stage('tokenize')
+def run_tokenize(paths, options, out_prefix):
+    from token_windows import iter_file_tokens
+
+    tokenizer = _tokenizer(options)
+    chunk_chars = options.get('chunk_chars', 100_000)
+    pieces, lengths = [], []
+    for path in paths:
+        ids = [chunk for chunk in iter_file_tokens(path, tokenizer, chunk_chars)]
+        ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.uint16)
+        pieces.append(ids)
+        lengths.append(len(ids))
+    tokens = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.uint16)
+    atomic_write(out_prefix + '.tokens.npy', lambda tmp: np.save(tmp, tokens))
+    index = {'scripts': [os.path.basename(path) for path in paths], 'lengths': lengths}
+    write_json(out_prefix + '.json', index)
+
+
+def merge_tables(queue, output, options):
+    """Concatenate every unit's CSV and sort by script name."""
+    frames = [pd.read_csv(queue.output_prefix(unit) + '.csv') for unit in queue.unit_ids()]
+    merged = pd.concat(frames, ignore_index=True).sort_values('script_name', kind='stable')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    merged.to_csv(output, index=False)
+    return len(merged)
+
+
+@merger('tokenize')
+def merge_tokenize(queue, output, options):
+    """Write one token store, scripts in name order, streaming slices out of each unit's memmap."""
+    from token_windows import TOKENS_FILE, load_labels, write_store_index
+
+    entries = []
+    for unit in queue.unit_ids():
+        with open(queue.output_prefix(unit) + '.json') as f:
+            index = json.load(f)
+        starts = np.concatenate([[0], np.cumsum(index['lengths'])[:-1]]).astype(np.int64)
+        entries.extend((name, unit, int(start), int(length))
+                       for name, start, length in zip(index['scripts'], starts, index['lengths']))
+    entries.sort()
+
+    os.makedirs(output, exist_ok=True)
+    offsets = np.zeros(len(entries) + 1, dtype=np.int64)
+    unit_tokens = {}
+    with open(os.path.join(output, TOKENS_FILE), 'wb') as out:
+        for i, (name, unit, start, length) in enumerate(entries):
+            if unit not in unit_tokens:
+                unit_tokens[unit] = np.load(queue.output_prefix(unit) + '.tokens.npy', mmap_mode='r')
+            np.asarray(unit_tokens[unit][start:start + length], dtype=np.uint16).tofile(out)
+            offsets[i + 1] = offsets[i] + length
+    labels = load_labels(options['labels'], options['target']) if options.get('labels') else None
+    write_store_index(output, [entry[0] for entry in entries], offsets, labels)
+    return len(entries)
+
+
+# ---------------------------------------------------------------- queue
+
+class Lease:
+    """A claimed unit. The heartbeat thread keeps the lease file's mtime fresh."""
+
+    def __init__(self, queue, unit, worker, token, attempt):
+        self.queue = queue
+        self.unit = unit
+        self.worker = worker
+        self.token = token
+        self.attempt = attempt
+        self.path = queue.lease_path(unit)
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def owned(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f).get('token') == self.token
+        except (OSError, ValueError):
+            return False
+
+    def _beat(self, interval):
+        while not self._stop.wait(interval):
+            if not self.owned():
+                self.lost.set()
+                return
+            try:
+                os.utime(self.path)
+            except OSError:
+                self.lost.set()
+                return
+
+    def start_heartbeat(self, interval):
+        self._thread = threading.Thread(target=self._beat, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop_heartbeat(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def release(self):
+        self.stop_heartbeat()
+        if self.owned():
+            os.remove(self.path)
+
+
+class ShardQueue:
+    """A work queue that is just a directory: manifest, units, leases, done markers, outputs."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        with open(os.path.join(self.root, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+
+    @classmethod
+    def create(cls, root, stage_name, scripts_dir=scripts_dir, n_units=64, options=None,
+               lease_timeout=LEASE_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+        if stage_name not in STAGES:
+            raise ValueError(f"Unknown stage '{stage_name}'; choose from {sorted(STAGES)}")
+        if os.path.exists(os.path.join(root, 'manifest.json')):
+            raise FileExistsError(f"'{root}' already holds a queue")
+        for sub in ('units', 'leases', 'done', 'failed', 'output'):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+        units = {}
+        for script_file in canonical_script_files(scripts_dir):
+            digest = content_hash(os.path.join(scripts_dir, script_file))
+            unit = f'unit_{int(digest[:8], 16) % n_units:05d}'
+            units.setdefault(unit, []).append({'file': script_file, 'sha1': digest})
+        for unit, files in units.items():
+            files.sort(key=lambda entry: entry['file'])
+            with open(os.path.join(root, 'units', unit + '.json'), 'w') as f:
+                json.dump({'unit': unit, 'files': files}, f)
+
+        manifest = {
+            'stage': stage_name,
+            'scripts_dir': os.path.abspath(scripts_dir),
+            'units': sorted(units),
+            'scripts': sum(len(files) for files in units.values()),
+            'options': options or {},
+            'lease_timeout': lease_timeout,
+            'max_attempts': max_attempts,
+            'created': datetime.datetime.now().isoformat(),
+        }
+        write_json(os.path.join(root, 'manifest.json'), manifest, indent=2)
+        return cls(root)
+
+    def unit_ids(self):
+        return self.manifest['units']
+
+    def lease_path(self, unit):
+        return os.path.join(self.root, 'leases', unit + '.lease')
+
+    def done_path(self, unit):
+        return os.path.join(self.root, 'done', unit + '.json')
+
+    def failed_path(self, unit):
+        return os.path.join(self.root, 'failed', unit + '.json')
+
+    def output_prefix(self, unit):
+        return os.path.join(self.root, 'output', unit)
+
+    def unit_files(self, unit):
+        with open(os.path.join(self.root, 'units', unit + '.json')) as f:
+            return [entry['file'] for entry in json.load(f)['files']]
+
+    def is_finished(self, unit):
+        return os.path.exists(self.done_path(unit)) or os.path.exists(self.failed_path(unit))
+
+    def _lease_age(self, unit):
+        try:
+            return time.time() - os.stat(self.lease_path(unit)).st_mtime
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _read_lease(path):
+        """(mtime_ns, lease record) of a lease file; the record is {} if it is unreadable."""
+        stat = os.stat(path)
+        try:
+            with open(path) as f:
+                return stat.st_mtime_ns, json.load(f)
+        except (OSError, ValueError):
+            return stat.st_mtime_ns, {}
+
+    def acquire(self, unit, worker):
+        """Claim `unit`, taking over an expired lease if there is one. Returns a Lease or None."""
+        if self.is_finished(unit):
+            return None
+        path = self.lease_path(unit)
+        attempt = 1
+        try:
+            mtime_ns, record = self._read_lease(path)
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns is not None:
+            age = time.time() - mtime_ns / 1e9
+            if age < self.manifest['lease_timeout']:
+                return None
+            # Expired: rename it away; exactly one contender's rename succeeds
+            stale = f'{path}.expired.{uuid.uuid4().hex}'
+            try:
+                os.rename(path, stale)
+            except FileNotFoundError:
+                return None
+            # Between the check and the rename another worker may have taken the lease over
+            # or its owner may have sent a heartbeat; then the file moved is not the one
+            # judged expired, and it goes back unless a newer lease already took its place
+            if self._read_lease(stale) != (mtime_ns, record):
+                try:
+                    os.link(stale, path)
+                except FileExistsError:
+                    pass
+                os.remove(stale)
+                return None
+            attempt = record.get('attempt', 1) + 1
+            os.remove(stale)
+            log(f"{worker}: lease on {unit} expired ({age:.0f}s without heartbeat); reclaiming")
+            if attempt > self.manifest['max_attempts']:
+                self._write_failed(unit, worker, attempt - 1, 'lease expired on every attempt (worker crash?)')
+                return None
+
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'worker': worker, 'host': socket.gethostname(), 'pid': os.getpid(), 'token': token,
+                       'attempt': attempt, 'acquired': datetime.datetime.now().isoformat()}, f)
+        if self.is_finished(unit):  # finished between the check above and the claim
+            os.remove(path)
+            return None
+        return Lease(self, unit, worker, token, attempt)
+
+    def complete(self, lease, seconds):
+        record = {'unit': lease.unit, 'worker': lease.worker, 'attempt': lease.attempt, 'seconds': seconds,
+                  'finished': datetime.datetime.now().isoformat()}
+        write_json(self.done_path(lease.unit), record)
+        lease.release()
+
+    def _write_failed(self, unit, worker, attempt, error):
+        record = {'unit': unit, 'worker': worker, 'attempt': attempt, 'error': error,
+                  'failed': datetime.datetime.now().isoformat()}
+        write_json(self.failed_path(unit), record, indent=2)
+
+    def fail(self, lease, error):
+        self._write_failed(lease.unit, lease.worker, lease.attempt, error)
+        lease.release()
+
+    def requeue_failed(self):
+        """Clear failure markers so failed units are picked up again."""
+        units = [unit for unit in self.unit_ids() if os.path.exists(self.failed_path(unit))]
+        for unit in units:
+            os.remove(self.failed_path(unit))
+        return units
+
+    def status(self):
+        counts = {'done': 0, 'failed': 0, 'leased': 0, 'expired': 0, 'pending': 0}
+        for unit in self.unit_ids():
+            if os.path.exists(self.done_path(unit)):
+                counts['done'] += 1
+            elif os.path.exists(self.failed_path(unit)):
+                counts['failed'] += 1
+            else:
+                age = self._lease_age(unit)
+                if age is None:
+                    counts['pending'] += 1
+                elif age < self.manifest['lease_timeout']:
+                    counts['leased'] += 1
+                else:
+                    counts['expired'] += 1
+        return counts
+
+    def merge(self, output, allow_partial=False):
+        status = self.status()
+        if status['done'] != len(self.unit_ids()) and not allow_partial:
+            raise RuntimeError(f"Queue is not finished: {status}")
+        queue = self
+        if allow_partial:
+            queue = _DoneView(self)
+        merge = STAGES[self.manifest['stage']]['merge'] or merge_tables
+        return merge(queue, output, self.manifest['options'])
+
+
+class _DoneView:
+    """A ShardQueue restricted to its finished units, for partial merges."""
+
+    def __init__(self, queue):
+        self._queue = queue
+
+    def unit_ids(self):
+        return [unit for unit in self._queue.unit_ids() if os.path.exists(self._queue.done_path(unit))]
+
+    def output_prefix(self, unit):
+        return self._queue.output_prefix(unit)
+
+
+def work(root, worker=None, heartbeat=HEARTBEAT, poll=POLL, wait=True, crash_after=None):
+    """Process units until every unit is done or failed. Returns the number of units this worker ran.
+
+    `crash_after` (for testing) hard-exits the process halfway through that many
+    units, leaving a lease behind exactly as a killed node would.
+    """
+    queue = ShardQueue(root)
+    worker = worker or f'{socket.gethostname()}-{os.getpid()}'
+    stage_info = STAGES[queue.manifest['stage']]
+    options = queue.manifest['options']
+    units = queue.unit_ids()
+    # Start at a worker-specific offset so workers do not all race for the same unit
+    offset = int(hashlib.sha1(worker.encode()).hexdigest()[:8], 16) % max(len(units), 1)
+    order = units[offset:] + units[:offset]
+    processed = 0
+
+    while True:
+        claimed = False
+        for unit in order:
+            lease = queue.acquire(unit, worker)
+            if lease is None:
+                continue
+            claimed = True
+            lease.start_heartbeat(heartbeat)
+            start = time.perf_counter()
+            try:
+                paths = [os.path.join(queue.manifest['scripts_dir'], f) for f in queue.unit_files(unit)]
+                if crash_after is not None and processed >= crash_after:
+                    log(f"{worker}: simulating a crash while holding {unit}")
+                    os._exit(1)
+                stage_info['run'](paths, options, queue.output_prefix(unit))
+            except Exception:
+                error = traceback.format_exc()
+                log(f"{worker}: {unit} failed:\n{error}")
+                queue.fail(lease, error)
+                continue
+            if lease.lost.is_set():
+                # Someone else reclaimed it; their output is identical, so just move on
+                lease.stop_heartbeat()
+                log(f"{worker}: lost the lease on {unit}; leaving it to the new owner")
+                continue
+            queue.complete(lease, time.perf_counter() - start)
+            processed += 1
+            log(f"{worker}: finished {unit} ({len(paths)} scripts, {time.perf_counter() - start:.1f}s)")
+
+        status = queue.status()
+        if status['pending'] + status['leased'] + status['expired'] == 0:
+            break
+        if not claimed:
+            if not wait:
+                break
+            # Remaining units are held by live workers; wait for them to finish or expire
+            time.sleep(poll)
+    log(f"{worker}: no work left; processed {processed} units")
+    return processed
+
+
+def _work_process(root, worker, heartbeat, poll, crash_after):
+    work(root, worker, heartbeat, poll, crash_after=crash_after)
+
+
+def run_local(root, workers=4, heartbeat=HEARTBEAT, poll=POLL, crash_after=None):
+    """Run `workers` spawned worker processes against one queue and wait for them.
+
+    With `crash_after`, worker 0 crashes mid-unit so the others' lease recovery is exercised.
+    """
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    for i in range(workers):
+        crash = crash_after if i == 0 else None
+        process = context.Process(target=_work_process, args=(root, f'local-{i}', heartbeat, poll, crash))
+        process.start()
+        processes.append(process)
+    for process in processes:
+        process.join()
+    return [process.exitcode for process in processes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded, file-queue-based execution of the script NLP stages.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def queue_args(p, create=False):
+        p.add_argument('--queue', required=not create,
+                       default=None if not create else os.path.join(tempfile.gettempdir(), 'script_queue'))
+        if create:
+            p.add_argument('--stage', choices=sorted(STAGES), required=True)
+            p.add_argument('--scripts-dir', default=scripts_dir)
+            p.add_argument('--units', type=int, default=64)
+            p.add_argument('--tokenizer', default='bert-base-uncased')
+            p.add_argument('--labels', default=None, help='Script features CSV with targets (tokenize stage)')
+            p.add_argument('--target', default='sentiment')
+            p.add_argument('--lease-timeout', type=float, default=LEASE_TIMEOUT)
+            p.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+
+    def worker_args(p):
+        p.add_argument('--heartbeat', type=float, default=HEARTBEAT)
+        p.add_argument('--poll', type=float, default=POLL)
+        p.add_argument('--crash-after', type=int, default=None, help='Testing: crash after this many units')
+
+    queue_args(sub.add_parser('init', help='Split the corpus into units and create the queue'), create=True)
+    work_parser = sub.add_parser('work', help='Pull and process units until the queue is drained')
+    queue_args(work_parser)
+    work_parser.add_argument('--worker-id', default=None)
+    worker_args(work_parser)
+    queue_args(sub.add_parser('status', help='Count done / leased / expired / pending / failed units'))
+    requeue_parser = sub.add_parser('requeue', help='Retry failed units')
+    queue_args(requeue_parser)
+    merge_parser = sub.add_parser('merge', help='Merge unit outputs in script-name order')
+    queue_args(merge_parser)
+    merge_parser.add_argument('--output', required=True)
+    merge_parser.add_argument('--partial', action='store_true', help='Merge whatever units are done')
+    local_parser = sub.add_parser('local', help='init + N local workers + merge, on one machine')
+    queue_args(local_parser, create=True)
+    local_parser.add_argument('--workers', type=int, default=4)
+    local_parser.add_argument('--output', required=True)
+    worker_args(local_parser)
+    args = parser.parse_args()
+
+    if args.command in ('init', 'local'):
+        options = {'tokenizer': args.tokenizer, 'labels': args.labels, 'target': args.target}
+        if args.command == 'local' and os.path.exists(args.queue):
+            shutil.rmtree(args.queue)
+        queue = ShardQueue.create(args.queue, args.stage, args.scripts_dir, args.units, options,
+                                  args.lease_timeout, args.max_attempts)
+        log(f"Queue '{args.queue}': {queue.manifest['scripts']} scripts in {len(queue.unit_ids())} units "
+            f"for stage '{args.stage}'")
+        if args.command == 'init':
+            return
+        exit_codes = run_local(args.queue, args.workers, args.heartbeat, args.poll, args.crash_after)
+        log(f"Workers exited with codes {exit_codes}")
+        args.partial = False
+    elif args.command == 'work':
+        work(args.queue, args.worker_id, args.heartbeat, args.poll, crash_after=args.crash_after)
+        return
+    elif args.command == 'status':
+        queue = ShardQueue(args.queue)
+        log(f"Stage '{queue.manifest['stage']}', {len(queue.unit_ids())} units: {queue.status()}")
+        return
+    elif args.command == 'requeue':
+        log(f"Requeued {ShardQueue(args.queue).requeue_failed()}")
+        return
+
+    queue = ShardQueue(args.queue)
+    status = queue.status()
+    if status['failed']:
+        log(f"{status['failed']} units failed; see '{os.path.join(queue.root, 'failed')}' "
+            f"(retry with `requeue`, or merge the rest with --partial)")
+        if not args.partial:
+            sys.exit(1)
+    rows = queue.merge(args.output, allow_partial=args.partial)
+    log(f"Merged {rows} scripts into '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,410 @@
+"""
+sketches.py
+Mergeable streaming summaries for data profiling.
+
+Each sketch is updated one chunk at a time with vectorized NumPy/pandas operations and
+has a `merge` that combines two partial sketches built on disjoint parts of the data
+(parallel workers, daily delta files) into the sketch of the combined data:
+
+    Moments         count, mean, variance, skewness, kurtosis, min, max (Chan/Pebay pairwise update)
+    QuantileSketch  quantiles with bounded relative error (DDSketch log-spaced buckets)
+    HyperLogLog     approximate distinct count (registers merged by element-wise max)
+    TopK            heavy hitters (Misra-Gries mergeable summary)
+
+Moments merge exactly up to floating point rounding, QuantileSketch and HyperLogLog
+merge to exactly the sketch a single pass would have produced, and TopK keeps the
+Misra-Gries guarantee (each count is underestimated by at most `error` <= n / (k + 1)).
+Every sketch round-trips through `to_dict` / `from_dict` as plain JSON.
+"""
+import math
+import numpy as np
+import pandas as pd
+
+
+class Moments:
+    """Count, mean and central moments up to the fourth, plus min and max."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+        chunk = Moments()
+        chunk.n = len(values)
+        chunk.mean = float(values.mean())
+        delta = values - chunk.mean
+        chunk.m2 = float(np.dot(delta, delta))
+        chunk.m3 = float(np.sum(delta ** 3))
+        chunk.m4 = float(np.sum(delta ** 4))
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        return self.merge(chunk)
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+        n_a, n_b = self.n, other.n
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        delta_n = delta / n
+        m2 = self.m2 + other.m2 + delta * delta_n * n_a * n_b
+        m3 = (self.m3 + other.m3 + delta * delta_n ** 2 * n_a * n_b * (n_a - n_b)
+              + 3.0 * delta_n * (n_a * other.m2 - n_b * self.m2))
+        m4 = (self.m4 + other.m4
+              + delta * delta_n ** 3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+              + 6.0 * delta_n ** 2 * (n_a * n_a * other.m2 + n_b * n_b * self.m2)
+              + 4.0 * delta_n * (n_a * other.m3 - n_b * self.m3))
+        self.n, self.mean, self.m2, self.m3, self.m4 = n, self.mean + delta_n * n_b, m2, m3, m4
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def summary(self):
+        """describe()-style statistics; std uses the sample (n - 1) denominator like pandas."""
+        if self.n == 0:
+            return {'count': 0, 'mean': math.nan, 'std': math.nan, 'min': math.nan, 'max': math.nan,
+                    'skew': math.nan, 'kurtosis': math.nan}
+        variance = self.m2 / (self.n - 1) if self.n > 1 else math.nan
+        population_variance = self.m2 / self.n
+        return {
+            'count': self.n,
+            'mean': self.mean,
+            'std': math.sqrt(variance) if self.n > 1 else math.nan,
+            'min': self.min,
+            'max': self.max,
+            'skew': (self.m3 / self.n) / population_variance ** 1.5 if population_variance > 0 else math.nan,
+            'kurtosis': (self.m4 / self.n) / population_variance ** 2 - 3.0 if population_variance > 0 else math.nan,
+        }
+
+    def to_dict(self):
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2, 'm3': self.m3, 'm4': self.m4,
+                'min': self.min if self.n else None, 'max': self.max if self.n else None}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls()
+        sketch.__dict__.update(state)
+        if sketch.n == 0:
+            sketch.min, sketch.max = math.inf, -math.inf
+        return sketch
+
+
+class QuantileSketch:
+    """DDSketch: quantiles with relative error `relative_accuracy`, from log-spaced bucket counts.
+
+    Values map to bucket ceil(log_gamma(|x|)), kept separately for positive and negative
+    values, so the bucket count grows with the log of the value range rather than with
+    the number of rows. Merging adds bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.005):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.n = 0
+
+    def _keys(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    @staticmethod
+    def _add_counts(store, keys):
+        unique, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(unique.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.zeros += int(np.count_nonzero(values == 0))
+        self._add_counts(self.positive, self._keys(values[values > 0]))
+        self._add_counts(self.negative, self._keys(-values[values < 0]))
+        return self
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge quantile sketches with different relative accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zeros += other.zeros
+        self.n += other.n
+        return self
+
+    def quantiles(self, qs):
+        """Estimate each quantile in `qs` (0..1). Returns NaN for an empty sketch."""
+        if self.n == 0:
+            return [math.nan for _ in qs]
+        negative_keys = sorted(self.negative, reverse=True)
+        positive_keys = sorted(self.positive)
+        # Bucket values in ascending order: negatives (largest magnitude first), zero, positives
+        values = np.concatenate([
+            -2.0 * self.gamma ** np.array(negative_keys, dtype=float) / (self.gamma + 1),
+            [0.0],
+            2.0 * self.gamma ** np.array(positive_keys, dtype=float) / (self.gamma + 1),
+        ])
+        counts = np.concatenate([
+            [self.negative[k] for k in negative_keys], [self.zeros], [self.positive[k] for k in positive_keys],
+        ])
+        cumulative = np.cumsum(counts)
+        ranks = np.asarray(qs, dtype=float) * (self.n - 1)
+        return values[np.searchsorted(cumulative, ranks, side='right')].tolist()
+
+    def to_dict(self):
+        return {'relative_accuracy': self.relative_accuracy, 'zeros': self.zeros, 'n': self.n,
+                'positive': {str(k): v for k, v in self.positive.items()},
+                'negative': {str(k): v for k, v in self.negative.items()}}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state['relative_accuracy'])
+        sketch.zeros, sketch.n = state['zeros'], state['n']
+        sketch.positive = {int(k): v for k, v in state['positive'].items()}
+        sketch.negative = {int(k): v for k, v in state['negative'].items()}
+        return sketch
+
+
+class HyperLogLog:
+    """Approximate distinct count with 2**precision registers (~1.04 / sqrt(2**precision) error)."""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values):
+        values = pd.Series(values).dropna()
+        if len(values) == 0:
+            return self
+        hashes = self._hash(values.to_numpy())
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        width = 64 - self.precision
+        rest = (hashes & np.uint64((1 << width) - 1)).astype(np.float64)  # exact: width <= 53 bits
+        _, bit_length = np.frexp(rest)
+        rank = np.where(rest > 0, width + 1 - bit_length, width + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    @staticmethod
+    def _hash(values):
+        """64-bit hashes with numbers canonicalized, so 5, 5.0 and np.int32(5) count once.
+
+        pandas' hash is deterministic across processes and runs, unlike Python's hash(), but
+        it hashes the raw bytes: the same number read as int in one chunk and as float in
+        another (a column that gained a NaN) would otherwise be two distinct values.
+        """
+        if values.dtype.kind in 'biu':
+            return pd.util.hash_array(values.astype(np.int64))
+        if values.dtype.kind != 'f':
+            return pd.util.hash_array(values)
+        values = values.astype(np.float64)
+        integral = (np.floor(values) == values) & (np.abs(values) < 2.0 ** 63)
+        hashes = pd.util.hash_array(values)
+        hashes[integral] = pd.util.hash_array(values[integral].astype(np.int64))
+        return hashes
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and empty:
+            estimate = self.m * math.log(self.m / empty)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {'precision': self.precision, 'registers': self.registers.tolist()}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state['precision'])
+        sketch.registers = np.asarray(state['registers'], dtype=np.uint8)
+        return sketch
+
+
+class TopK:
+    """Misra-Gries heavy hitters with at most `capacity` counters.
+
+    Any value occurring more than n / (capacity + 1) times is guaranteed to be kept, and
+    each kept count is low by at most `error`. A chunk is first counted exactly with
+    value_counts and then merged, so counters are combined with index-aligned pandas
+    arithmetic instead of a Python loop over rows.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.n = 0
+        self.error = 0
+
+    def _reduce(self):
+        if len(self.counts) <= self.capacity:
+            return
+        values = self.counts.to_numpy()
+        # Subtract the (capacity + 1)-th largest count and drop everything that reaches zero
+        cut = int(np.partition(values, len(values) - self.capacity - 1)[len(values) - self.capacity - 1])
+        self.error += cut
+        self.counts = self.counts[self.counts > cut] - cut
+
+    def update(self, values):
+        values = pd.Series(values).dropna()
+        if len(values) == 0:
+            return self
+        return self.update_counts(values.value_counts(sort=False))
+
+    def update_counts(self, counts):
+        """Add exact counts for a chunk, given as a Series of count per value."""
+        chunk = TopK(self.capacity)
+        chunk.counts = counts[counts > 0].astype('int64')
+        chunk.n = int(chunk.counts.sum())
+        return self.merge(chunk)
+
+    def merge(self, other):
+        if self.counts.empty:
+            self.counts = other.counts.copy()
+        elif not other.counts.empty:
+            self.counts = self.counts.add(other.counts, fill_value=0).astype('int64')
+        self.n += other.n
+        self.error += other.error
+        self._reduce()
+        return self
+
+    def top(self, k=10):
+        """The `k` most frequent values as a Series, largest first (ties broken by value)."""
+        order = sorted(zip(self.counts.index, self.counts.to_numpy().tolist()),
+                       key=lambda item: (-item[1], str(item[0])))[:k]
+        return pd.Series([count for _, count in order], index=[key for key, _ in order], dtype='int64')
+
+    def to_dict(self):
+        return {'capacity': self.capacity, 'n': self.n, 'error': self.error,
+                'counts': [[key, count] for key, count in zip(self.counts.index.tolist(), self.counts.tolist())]}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state['capacity'])
+        sketch.n, sketch.error = state['n'], state['error']
+        sketch.counts = pd.Series({key: count for key, count in state['counts']}, dtype='int64')
+        return sketch
+
+
+SKETCH_TYPES = {cls.__name__: cls for cls in (Moments, QuantileSketch, HyperLogLog, TopK)}
+
+
+class ColumnProfile:
+    """All sketches for one column: moments and quantiles when numeric, distinct count and top-k always."""
+
+    QUANTILES = (0.25, 0.5, 0.75)
+
+    def __init__(self, numeric, top_k_capacity=1000):
+        self.numeric = numeric
+        self.rows = 0
+        self.missing = 0
+        self.sketches = {'distinct': HyperLogLog(), 'top': TopK(top_k_capacity)}
+        if numeric:
+            self.sketches['moments'] = Moments()
+            self.sketches['quantiles'] = QuantileSketch()
+
+    def update(self, series):
+        self.rows += len(series)
+        self.missing += int(series.isna().sum())
+        self.sketches['distinct'].update(series)
+        self.sketches['top'].update(series)
+        if self.numeric:
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+            self.sketches['moments'].update(values)
+            self.sketches['quantiles'].update(values)
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.missing += other.missing
+        for name, sketch in self.sketches.items():
+            sketch.merge(other.sketches[name])
+        return self
+
+    def summary(self, k=5):
+        top = self.sketches['top'].top(1)
+        result = {'rows': self.rows, 'missing': self.missing, 'unique': self.sketches['distinct'].count(),
+                  'top': top.index[0] if len(top) else None, 'freq': int(top.iloc[0]) if len(top) else 0}
+        if self.numeric:
+            result.update(self.sketches['moments'].summary())
+            quantiles = self.sketches['quantiles'].quantiles(self.QUANTILES)
+            result.update({f"{int(q * 100)}%": v for q, v in zip(self.QUANTILES, quantiles)})
+        return result
+
+    def to_dict(self):
+        return {'numeric': self.numeric, 'rows': self.rows, 'missing': self.missing,
+                'sketches': {name: {'type': type(s).__name__, 'state': s.to_dict()}
+                             for name, s in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, state):
+        profile = cls(state['numeric'])
+        profile.rows, profile.missing = state['rows'], state['missing']
+        profile.sketches = {name: SKETCH_TYPES[s['type']].from_dict(s['state'])
+                            for name, s in state['sketches'].items()}
+        return profile
+
+
+class TableProfile:
+    """Column profiles for a whole table, built chunk by chunk and mergeable across partitions."""
+
+    def __init__(self, top_k_capacity=1000):
+        self.top_k_capacity = top_k_capacity
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for column in chunk.columns:
+            if column not in self.columns:
+                numeric = pd.api.types.is_numeric_dtype(chunk[column]) and not pd.api.types.is_bool_dtype(chunk[column])
+                self.columns[column] = ColumnProfile(numeric, self.top_k_capacity)
+            self.columns[column].update(chunk[column])
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for column, profile in other.columns.items():
+            if column in self.columns:
+                self.columns[column].merge(profile)
+            else:
+                self.columns[column] = profile
+        return self
+
+    def describe(self):
+        """A describe(include='all')-like frame, one column per profiled column."""
+        return pd.DataFrame({column: profile.summary() for column, profile in self.columns.items()})
+
+    def to_dict(self):
+        return {'top_k_capacity': self.top_k_capacity, 'rows': self.rows,
+                'columns': {column: profile.to_dict() for column, profile in self.columns.items()}}
+
+    @classmethod
+    def from_dict(cls, state):
+        profile = cls(state['top_k_capacity'])
+        profile.rows = state['rows']
+        profile.columns = {column: ColumnProfile.from_dict(s) for column, s in state['columns'].items()}
+        return profile
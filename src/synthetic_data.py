@@ -0,0 +1,280 @@
+"""
+synthetic_data.py
+Synthetic IMDb, TMDb and screenplay data at a configurable scale, generated offline.
+
+The generators mimic the shapes the pipeline depends on rather than exact values:
+skewed title-type and genre mixes, release years bunched toward the present,
+per-type runtimes, a heavy-tailed vote count, stringified TMDb cast/crew lists whose
+names follow a Zipf law (so a few people appear very often), and screenplays with
+sluglines, character cues, parentheticals and transitions. Each screenplay has a
+hidden mood that biases its word choice and drives its label, so script models have
+something to learn.
+
+`write_dataset` lays the files out like the repository's data/ tree:
+
+    <out>/data/raw/{imdb_basics,imdb_ratings,tmdb_data}.csv
+    <out>/data/processed/{imdb_basics,imdb_ratings,tmdb_data}_processed.csv
+    <out>/data/scripts/*.txt
+    <out>/data/script_labels.csv
+
+Usage:
+    python src/synthetic_data.py --scale 10 --out /tmp/synthetic
+"""
+import os
+import json
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+
+# Row counts at scale 1; every size is multiplied by the scale factor
+BASE_SIZES = {'titles': 20_000, 'tmdb_movies': 1_000, 'scripts': 20}
+
+TITLE_TYPES = {
+    'tvEpisode': 0.70, 'short': 0.09, 'movie': 0.08, 'video': 0.03, 'tvSeries': 0.03, 'tvMovie': 0.03,
+    'tvMiniSeries': 0.01, 'tvSpecial': 0.01, 'videoGame': 0.01, 'tvShort': 0.01,
+}
+# (median minutes, log-normal sigma) by title type
+RUNTIMES = {'movie': (95, 0.25), 'tvMovie': (88, 0.2), 'short': (12, 0.6), 'tvEpisode': (30, 0.45),
+            'tvSeries': (40, 0.4), 'tvMiniSeries': (50, 0.4), 'video': (60, 0.6), 'tvSpecial': (60, 0.4),
+            'videoGame': (0, 0), 'tvShort': (8, 0.5)}
+GENRES = ['Drama', 'Comedy', 'Documentary', 'Talk-Show', 'Reality-TV', 'Romance', 'Family', 'Animation',
+          'Action', 'Crime', 'News', 'Adventure', 'Music', 'Thriller', 'Game-Show', 'Horror', 'Mystery',
+          'Fantasy', 'Short', 'Biography', 'History', 'Sport', 'Sci-Fi', 'Adult', 'Musical', 'War',
+          'Western', 'Film-Noir']
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David',
+               'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah',
+               'Carlos', 'Aiko', 'Priya', 'Wei', 'Olga', 'Kwame', 'Lupita', "D'Arcy", 'Zoe', 'Hiro']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+              'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Taylor', 'Moore', 'Jackson', 'Lee',
+              "O'Brien", 'Nyong\'o', 'Kim', 'Chen', 'Singh', 'Ivanova', 'Mensah', 'Tanaka', 'Rossi', 'Dubois']
+CREW_JOBS = [('Director', 'Directing'), ('Screenplay', 'Writing'), ('Producer', 'Production'),
+             ('Director of Photography', 'Camera'), ('Editor', 'Editing'), ('Original Music Composer', 'Sound'),
+             ('Casting', 'Production'), ('Production Design', 'Art'), ('Costume Design', 'Costume & Make-Up')]
+
+TITLE_WORDS = ('night day last first dark light love war city house road river king queen man woman '
+               'story return secret world blood fire water dream star heart ghost shadow summer winter').split()
+COMMON_WORDS = ('the a an and of to in it is was he she they we you his her their that this with on at '
+                'from for but not what there here up down out into over back then now just door room car '
+                'looks walks turns says takes stands sits opens hand eyes face window table phone gun street').split()
+POSITIVE_WORDS = 'good great happy beautiful lovely wonderful best perfect warm bright kind gentle proud free'.split()
+NEGATIVE_WORDS = 'bad terrible awful dark cold angry sad worst wrong dead ugly cruel afraid broken'.split()
+MODIFIERS = 'very really quite extremely too so'.split()
+LOCATIONS = ['HOUSE', 'KITCHEN', 'STREET', 'OFFICE', 'CAR', 'BAR', 'POLICE STATION', 'APARTMENT', 'FOREST',
+             'HOSPITAL', 'ROOFTOP', 'DINER', 'WAREHOUSE', 'BEACH']
+TRANSITIONS = ['CUT TO:', 'DISSOLVE TO:', 'SMASH CUT TO:', 'MATCH CUT TO:']
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def zipf_choice(rng, n_items, size, exponent=1.1):
+    """Indices in [0, n_items) with Zipf-like popularity (index 0 most common)."""
+    weights = 1.0 / np.arange(1, n_items + 1) ** exponent
+    return rng.choice(n_items, size=size, p=weights / weights.sum())
+
+
+def make_titles(rng, n):
+    lengths = rng.integers(1, 4, n)
+    words = np.array(TITLE_WORDS)[rng.integers(0, len(TITLE_WORDS), size=(n, 3))].tolist()
+    return [' '.join(row[:k]).title() for row, k in zip(words, lengths.tolist())]
+
+
+def make_imdb_basics(n, rng):
+    """IMDb title.basics-like frame, sorted by tconst like the real dump."""
+    tconst_ids = np.cumsum(rng.integers(1, 4, size=n)) + 1
+    types = rng.choice(list(TITLE_TYPES), size=n, p=np.array(list(TITLE_TYPES.values())))
+    # Release years bunch toward the present with a long tail back to 1890
+    years = np.clip(2025 - rng.gamma(2.0, 10.0, size=n), 1890, 2025).astype(int).astype(float)
+    years[rng.random(n) < 0.02] = np.nan
+
+    runtimes = np.full(n, np.nan)
+    for title_type, (median, sigma) in RUNTIMES.items():
+        mask = types == title_type
+        if median:
+            runtimes[mask] = np.maximum(1, np.round(median * rng.lognormal(0, sigma, mask.sum())))
+    runtimes[rng.random(n) < 0.3] = np.nan  # runtime is often missing in IMDb
+
+    n_genres = rng.choice([1, 2, 3], size=n, p=[0.55, 0.3, 0.15])
+    genre_ids = zipf_choice(rng, len(GENRES), size=(n, 3), exponent=1.0)
+    genres = np.array([','.join(sorted({GENRES[g] for g in row[:k]}))
+                       for row, k in zip(genre_ids.tolist(), n_genres.tolist())], dtype=object)
+    genres[rng.random(n) < 0.03] = None
+
+    titles = make_titles(rng, n)
+    return pd.DataFrame({
+        'tconst': [f"tt{i:07d}" for i in tconst_ids],
+        'titleType': types,
+        'primaryTitle': titles,
+        'originalTitle': titles,
+        'isAdult': (rng.random(n) < 0.01).astype(int),
+        'startYear': years,
+        'endYear': np.nan,
+        'runtimeMinutes': runtimes,
+        'genres': genres,
+    })
+
+
+def make_imdb_ratings(basics, rng, coverage=0.35):
+    """IMDb title.ratings-like frame for a random subset of titles, still sorted by tconst."""
+    rated = np.sort(rng.choice(len(basics), size=int(len(basics) * coverage), replace=False))
+    n = len(rated)
+    return pd.DataFrame({
+        'tconst': basics['tconst'].to_numpy()[rated],
+        'averageRating': np.round(np.clip(rng.normal(6.9, 1.3, n), 1.0, 10.0), 1),
+        # Pareto tail: most titles have a handful of votes, a few have millions
+        'numVotes': np.minimum(5 + (rng.pareto(1.1, n) * 20).astype(np.int64), 3_000_000),
+    })
+
+
+def make_people(rng, n):
+    first = np.array(FIRST_NAMES)[rng.integers(0, len(FIRST_NAMES), n)]
+    last = np.array(LAST_NAMES)[rng.integers(0, len(LAST_NAMES), n)]
+    suffix = rng.integers(0, max(1, n // 400), n)  # keep names mostly unique at large scale
+    return [f"{f} {l}" + (f" {s}" if s else '') for f, l, s in zip(first, last, suffix)]
+
+
+def make_tmdb(n, rng, basics=None):
+    """TMDb-like frame with stringified cast and crew lists (Zipf-distributed people)."""
+    people = make_people(rng, max(2_000, n * 5))
+    cast_sizes = rng.integers(5, 25, n)
+    crew_sizes = rng.integers(5, 30, n)
+    cast_people = zipf_choice(rng, len(people), cast_sizes.sum())
+    crew_people = zipf_choice(rng, len(people), crew_sizes.sum())
+    crew_jobs = rng.integers(0, len(CREW_JOBS), crew_sizes.sum())
+
+    cast, crew = [], []
+    cast_offset = crew_offset = 0
+    for size_cast, size_crew in zip(cast_sizes.tolist(), crew_sizes.tolist()):
+        cast.append(repr([{'cast_id': order, 'character': f"Character {order}", 'id': int(p),
+                           'name': people[p], 'order': order}
+                          for order, p in enumerate(cast_people[cast_offset:cast_offset + size_cast].tolist())]))
+        crew.append(repr([{'department': CREW_JOBS[j][1], 'id': int(p), 'job': CREW_JOBS[j][0], 'name': people[p]}
+                          for p, j in zip(crew_people[crew_offset:crew_offset + size_crew].tolist(),
+                                          crew_jobs[crew_offset:crew_offset + size_crew].tolist())]))
+        cast_offset += size_cast
+        crew_offset += size_crew
+
+    budget = np.where(rng.random(n) < 0.4, 0, np.round(rng.lognormal(16.5, 1.2, n), -3)).astype(np.int64)
+    imdb_ids = (basics['tconst'].sample(n, replace=len(basics) < n, random_state=int(rng.integers(1 << 31))).to_numpy()
+                if basics is not None else [f"tt{i:07d}" for i in rng.integers(1, 9_999_999, n)])
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1) * 7,
+        'imdb_id': imdb_ids,
+        'title': make_titles(rng, n),
+        'release_date': pd.to_datetime('1950-01-01') + pd.to_timedelta(rng.integers(0, 27_000, n), unit='D'),
+        'budget': budget,
+        'revenue': np.where(budget > 0, (budget * rng.lognormal(0.5, 1.0, n)).astype(np.int64), 0),
+        'popularity': np.round(rng.lognormal(1.5, 1.1, n), 3),
+        'vote_average': np.round(np.clip(rng.normal(6.2, 1.1, n), 0, 10), 1),
+        'vote_count': (rng.pareto(1.2, n) * 30).astype(np.int64),
+        'runtime': np.maximum(1, np.round(rng.normal(105, 20, n))).astype(int),
+        'cast': cast,
+        'crew': crew,
+    })
+
+
+def make_script_text(rng, mood, scenes=None):
+    """Screenplay-like text; `mood` in [-1, 1] tilts positive vs negative word choice."""
+    scenes = scenes or int(np.clip(rng.lognormal(np.log(110), 0.3), 30, 300))
+    characters = [name.upper() for name in make_people(rng, int(rng.integers(4, 12)))]
+    lead_weights = 1.0 / np.arange(1, len(characters) + 1)
+    lead_weights /= lead_weights.sum()
+    p_positive = 0.5 + 0.4 * mood
+
+    def sentence(n_words):
+        words = np.array(COMMON_WORDS)[rng.integers(0, len(COMMON_WORDS), n_words)].tolist()
+        for i in np.nonzero(rng.random(n_words) < 0.15)[0].tolist():
+            pool = POSITIVE_WORDS if rng.random() < p_positive else NEGATIVE_WORDS
+            word = pool[int(rng.integers(len(pool)))]
+            words[i] = f"{MODIFIERS[int(rng.integers(len(MODIFIERS)))]} {word}" if rng.random() < 0.2 else word
+        return ' '.join(words).capitalize() + ('.' if rng.random() < 0.8 else rng.choice(['!', '?', '...']))
+
+    lines = ['FADE IN:', '']
+    for number in range(1, scenes + 1):
+        place = 'INT.' if rng.random() < 0.65 else 'EXT.'
+        time_of_day = 'NIGHT' if rng.random() < 0.35 else 'DAY'
+        lines += [f"{place} {LOCATIONS[int(rng.integers(len(LOCATIONS)))]} - {time_of_day}", '']
+        for _ in range(int(rng.integers(1, 6))):
+            lines += [' '.join(sentence(int(rng.integers(6, 18))) for _ in range(int(rng.integers(1, 4)))), '']
+            cue = characters[rng.choice(len(characters), p=lead_weights)]
+            lines.append(' ' * 20 + cue + (' (V.O.)' if rng.random() < 0.05 else ''))
+            if rng.random() < 0.15:
+                lines.append(' ' * 15 + '(beat)')
+            lines += [' ' * 10 + sentence(int(rng.integers(3, 15))) for _ in range(int(rng.integers(1, 3)))]
+            lines.append('')
+        if rng.random() < 0.3:
+            lines += [' ' * 40 + TRANSITIONS[int(rng.integers(len(TRANSITIONS)))], '']
+    lines += ['FADE OUT.', '', 'THE END']
+    return '\n'.join(lines)
+
+
+def write_scripts(scripts_dir, n, rng):
+    """Write `n` screenplay files; returns the labels frame (script_name, mood, sentiment_polarity, averageRating)."""
+    os.makedirs(scripts_dir, exist_ok=True)
+    rows = []
+    for i in range(n):
+        mood = float(rng.uniform(-1, 1))
+        name = f"script_{i:05d}.txt"
+        with open(os.path.join(scripts_dir, name), 'w', encoding='utf-8') as f:
+            f.write(make_script_text(rng, mood))
+        rows.append({'script_name': name, 'mood': mood,
+                     'sentiment_polarity': float(np.clip(0.3 * mood + rng.normal(0, 0.05), -1, 1))})
+    labels = pd.DataFrame(rows)
+    # The outcome script models train on; drawn after the texts so they stay the same
+    labels['averageRating'] = np.clip(6 + 1.5 * labels['mood'] + rng.normal(0, 0.5, n), 1, 10).round(1)
+    return labels
+
+
+def write_dataset(out_dir, scale=1, seed=42):
+    """Generate every dataset at `scale` x BASE_SIZES under `out_dir`. Returns the manifest."""
+    rng = np.random.default_rng(seed)
+    data_dir = os.path.join(out_dir, 'data')
+    raw_dir = os.path.join(data_dir, 'raw')
+    processed_dir = os.path.join(data_dir, 'processed')
+    scripts_dir = os.path.join(data_dir, 'scripts')
+    for directory in (raw_dir, processed_dir, scripts_dir):
+        os.makedirs(directory, exist_ok=True)
+    sizes = {name: max(1, int(round(size * scale))) for name, size in BASE_SIZES.items()}
+
+    log(f"Generating {sizes['titles']:,} IMDb titles...")
+    basics = make_imdb_basics(sizes['titles'], rng)
+    ratings = make_imdb_ratings(basics, rng)
+    log(f"Generating {sizes['tmdb_movies']:,} TMDb movies...")
+    tmdb = make_tmdb(sizes['tmdb_movies'], rng, basics)
+
+    frames = {'imdb_basics': basics, 'imdb_ratings': ratings, 'tmdb_data': tmdb}
+    for name, frame in frames.items():
+        frame.to_csv(os.path.join(raw_dir, f"{name}.csv"), index=False)
+        frame.to_csv(os.path.join(processed_dir, f"{name}_processed.csv"), index=False)
+
+    log(f"Generating {sizes['scripts']:,} screenplays...")
+    labels = write_scripts(scripts_dir, sizes['scripts'], rng)
+    labels_path = os.path.join(data_dir, 'script_labels.csv')
+    labels.to_csv(labels_path, index=False)
+
+    manifest = {
+        'scale': scale, 'seed': seed, 'sizes': sizes,
+        'rows': {name: len(frame) for name, frame in frames.items()},
+        'paths': {'data': data_dir, 'raw': raw_dir, 'processed': processed_dir,
+                  'scripts': scripts_dir, 'labels': labels_path},
+    }
+    with open(os.path.join(data_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic IMDb/TMDb/screenplay data.')
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--scale', type=float, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    manifest = write_dataset(args.out, args.scale, args.seed)
+    log(f"Synthetic data written to '{manifest['paths']['data']}': {manifest['rows']}")
+
+
+if __name__ == '__main__':
+    main()
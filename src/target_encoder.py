@@ -0,0 +1,250 @@
+"""
+target_encoder.py
+Vectorized out-of-fold target encoding for high-cardinality categorical columns.
+
+Columns like genre combinations, directors and writers have thousands to hundreds of
+thousands of levels. One-hot encoding them makes the matrix
+very wide. This encoder replaces each column with dense smoothed target means instead:
+
+    encoding(level) = (sum of y for the level + m * prior) / (count of the level + m)
+
+Levels with few titles shrink toward the prior mean, controlled by the smoothing
+strength `m`. On the training set every row is encoded out of fold. Rows are split into
+`n_folds` folds, and each row only sees the target statistics of the other folds, so a
+title's own rating never leaks into its features. All statistics are bincount
+reductions over factorized codes: one pass per column, with no Python loop over levels
+or rows.
+
+Multi-valued columns (e.g. 'Nolan|Spielberg') are split on their separator and each
+value is encoded separately. The row then gets the mean (`<column>_te`) and the
+maximum (`<column>_te_max`) of its values' encodings. Rows without any value get the
+prior. The fitted statistics are saved as JSON so the same mapping is used at
+inference time.
+
+Usage:
+    python src/target_encoder.py --input data/processed/final_features.csv --columns genres directors
+"""
+import os
+import json
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+
+SMOOTHING = 20.0
+N_FOLDS = 5
+RANDOM_STATE = 42
+MULTI_VALUE_SEP = '|'
+
+# High-cardinality columns and their separators (None: the whole string is one level,
+# so 'Comedy,Drama' is encoded as a genre combination)
+HIGH_CARDINALITY = {
+    'genres': None,
+    'directors': MULTI_VALUE_SEP,
+    'writers': MULTI_VALUE_SEP,
+}
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+final_features_path = os.path.join(base_dir, 'data', 'processed', 'final_features.csv')
+encoder_path = os.path.join(base_dir, 'models', 'randomforest', 'target_encoder.json')
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def explode_levels(values, sep=None):
+    """(row positions, level strings) for every non-empty value in a column.
+
+    Distinct cell strings are factorized first and only those are split, then
+    expanded back to rows by index arithmetic. A level listed twice in one cell
+    counts once for that row.
+    """
+    cell_codes, cells = pd.factorize(pd.Series(values).reset_index(drop=True).astype(object))
+    cells = pd.Series(cells, dtype=object).astype(str)
+    n_cells = len(cells)
+    if sep:
+        cells = cells.str.split(sep, regex=False).explode().str.strip()
+    pieces = pd.DataFrame({'cell': cells.index.to_numpy(), 'level': cells.to_numpy()})
+    pieces = pieces[(pieces['level'] != '') & (pieces['level'] != '\\N')]
+    if sep:
+        pieces = pieces.drop_duplicates()
+
+    # pieces are grouped by cell; row r owns pieces[starts[c]:starts[c] + counts[c]], c = its cell code
+    counts = np.bincount(pieces['cell'].to_numpy(), minlength=n_cells)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    valid = cell_codes >= 0  # factorize gives NaN cells code -1
+    row_ids = np.flatnonzero(valid)
+    per_row = counts[cell_codes[valid]]
+    rows = np.repeat(row_ids, per_row).astype(np.int64)
+    within = np.arange(len(rows)) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+    piece_index = np.repeat(starts[cell_codes[valid]], per_row) + within
+    return rows, pieces['level'].to_numpy()[piece_index]
+
+
+def row_mean_max(rows, encodings, n_rows, fill):
+    """Mean and max of `encodings` grouped by row; rows without levels get `fill`."""
+    counts = np.bincount(rows, minlength=n_rows)
+    sums = np.bincount(rows, weights=encodings, minlength=n_rows)
+    fill = np.broadcast_to(np.asarray(fill, dtype=np.float64), (n_rows,))
+    mean = np.where(counts > 0, sums / np.maximum(counts, 1), fill)
+    maximum = np.full(n_rows, -np.inf)
+    np.maximum.at(maximum, rows, encodings)
+    return mean, np.where(counts > 0, maximum, fill)
+
+
+class TargetEncoder:
+    """Smoothed target means per level, out of fold on the training set."""
+
+    def __init__(self, columns=None, smoothing=SMOOTHING, n_folds=N_FOLDS, random_state=RANDOM_STATE):
+        columns = HIGH_CARDINALITY if columns is None else columns
+        if not isinstance(columns, dict):
+            columns = {column: HIGH_CARDINALITY.get(column) for column in columns}
+        self.columns = columns
+        self.smoothing = float(smoothing)
+        self.n_folds = int(n_folds)
+        self.random_state = random_state
+        self.prior_ = None
+        self.mappings_ = {}
+
+    def output_columns(self, column):
+        return [f'{column}_te', f'{column}_te_max'] if self.columns[column] else [f'{column}_te']
+
+    def _encode(self, sums, counts, prior):
+        return (sums + self.smoothing * prior) / (counts + self.smoothing)
+
+    def fold_ids(self, n_rows):
+        """Balanced random fold per row, reproducible from `random_state`."""
+        return np.random.default_rng(self.random_state).permutation(n_rows) % self.n_folds
+
+    def _fit_column(self, column, rows, levels, y):
+        """Store whole-set statistics for one column; returns each entry's level code."""
+        codes, keys = pd.factorize(levels)
+        self.mappings_[column] = {
+            'keys': pd.Index(keys, dtype=object),
+            'sum': np.bincount(codes, weights=y[rows], minlength=len(keys)),
+            'count': np.bincount(codes, minlength=len(keys)).astype(np.float64),
+        }
+        return codes
+
+    def fit(self, X, y):
+        y = np.asarray(y, dtype=np.float64)
+        self.prior_ = float(y.mean())
+        self.mappings_ = {}
+        for column, sep in self.columns.items():
+            self._fit_column(column, *explode_levels(X[column], sep), y)
+        return self
+
+    def transform(self, X):
+        """Encode with the statistics of the whole fitted set (for validation and inference)."""
+        n_rows = len(X)
+        out = {}
+        for column, sep in self.columns.items():
+            mapping = self.mappings_[column]
+            rows, levels = explode_levels(X[column], sep)
+            codes = mapping['keys'].get_indexer(levels)
+            seen = codes >= 0
+            # Unseen levels have no statistics, so they encode to the prior
+            encodings = np.full(len(codes), self.prior_)
+            encodings[seen] = self._encode(mapping['sum'][codes[seen]], mapping['count'][codes[seen]], self.prior_)
+            self._store(out, column, rows, encodings, n_rows, self.prior_)
+        return pd.DataFrame(out, index=X.index)
+
+    def fit_transform(self, X, y):
+        """Fit on (X, y) and return out-of-fold encodings for the same rows."""
+        y = np.asarray(y, dtype=np.float64)
+        self.prior_ = float(y.mean())
+        self.mappings_ = {}
+        n_rows = len(X)
+        folds = self.fold_ids(n_rows)
+        fold_count = np.bincount(folds, minlength=self.n_folds).astype(np.float64)
+        fold_sum = np.bincount(folds, weights=y, minlength=self.n_folds)
+        # Prior of the other folds, per fold
+        fold_prior = (y.sum() - fold_sum) / np.maximum(n_rows - fold_count, 1)
+
+        out = {}
+        for column, sep in self.columns.items():
+            rows, levels = explode_levels(X[column], sep)
+            codes = self._fit_column(column, rows, levels, y)
+            mapping = self.mappings_[column]
+            n_keys = len(mapping['keys'])
+            entry_fold = folds[rows]
+            # Per (fold, level) statistics; out of fold = whole set minus own fold
+            cell = entry_fold * n_keys + codes
+            in_fold_sum = np.bincount(cell, weights=y[rows], minlength=self.n_folds * n_keys)
+            in_fold_count = np.bincount(cell, minlength=self.n_folds * n_keys)
+            oof_sum = mapping['sum'][codes] - in_fold_sum[cell]
+            oof_count = mapping['count'][codes] - in_fold_count[cell]
+            encodings = self._encode(oof_sum, oof_count, fold_prior[entry_fold])
+            self._store(out, column, rows, encodings, n_rows, fold_prior[folds])
+        return pd.DataFrame(out, index=X.index)
+
+    def _store(self, out, column, rows, encodings, n_rows, fill):
+        mean, maximum = row_mean_max(rows, encodings, n_rows, fill)
+        out[f'{column}_te'] = mean
+        if self.columns[column]:
+            out[f'{column}_te_max'] = maximum
+
+    def save(self, path=encoder_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        state = {
+            'columns': self.columns,
+            'smoothing': self.smoothing,
+            'n_folds': self.n_folds,
+            'random_state': self.random_state,
+            'prior': self.prior_,
+            'mappings': {column: {'keys': [str(key) for key in mapping['keys']],
+                                  'sum': mapping['sum'].tolist(),
+                                  'count': mapping['count'].astype(np.int64).tolist()}
+                         for column, mapping in self.mappings_.items()},
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path=encoder_path):
+        with open(path) as f:
+            state = json.load(f)
+        encoder = cls(state['columns'], state['smoothing'], state['n_folds'], state['random_state'])
+        encoder.prior_ = state['prior']
+        encoder.mappings_ = {column: {'keys': pd.Index(mapping['keys'], dtype=object),
+                                      'sum': np.asarray(mapping['sum'], dtype=np.float64),
+                                      'count': np.asarray(mapping['count'], dtype=np.float64)}
+                             for column, mapping in state['mappings'].items()}
+        return encoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Out-of-fold smoothed target encoding of high-cardinality columns.')
+    parser.add_argument('--input', default=final_features_path)
+    parser.add_argument('--target', default='averageRating')
+    parser.add_argument('--columns', nargs='+', default=list(HIGH_CARDINALITY))
+    parser.add_argument('--smoothing', type=float, default=SMOOTHING)
+    parser.add_argument('--folds', type=int, default=N_FOLDS)
+    parser.add_argument('--output', default=None, help='Defaults to <input>_target_encoded.csv')
+    parser.add_argument('--encoder', default=encoder_path)
+    args = parser.parse_args()
+
+    header = pd.read_csv(args.input, nrows=0).columns
+    columns = [column for column in args.columns if column in header]
+    missing = sorted(set(args.columns) - set(columns))
+    if missing:
+        log(f"Skipping columns not in '{args.input}': {missing}")
+    if not columns:
+        raise ValueError(f"None of {args.columns} are in '{args.input}'")
+
+    data = pd.read_csv(args.input, usecols=columns + [args.target], dtype={c: str for c in columns})
+    data = data.dropna(subset=[args.target])
+    encoder = TargetEncoder(columns, args.smoothing, args.folds)
+    encoded = encoder.fit_transform(data[columns], data[args.target])
+    for column in columns:
+        log(f"{column}: {len(encoder.mappings_[column]['keys']):,} levels -> {encoder.output_columns(column)}")
+
+    output = args.output or os.path.splitext(args.input)[0] + '_target_encoded.csv'
+    encoded.to_csv(output, index=False)
+    encoder.save(args.encoder)
+    log(f"Out-of-fold encodings for {len(encoded):,} rows saved to '{output}', encoder to '{args.encoder}'")
+
+
+if __name__ == '__main__':
+    main()
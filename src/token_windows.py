@@ -0,0 +1,224 @@
+"""
+token_windows.py
+Memory-mapped token storage and the streaming window pipeline for the BERT-LSTM script model.
+
+Scripts are tokenized once into a flat uint16 token file plus a small offset index.
+Training then reads fixed-size windows straight out of the memory map, so the corpus
+is never loaded into RAM.
+"""
+import os
+import json
+import queue
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+from script_dedup import canonical_script_files
+
+TOKENS_FILE = 'tokens.bin'
+INDEX_FILE = 'index.npz'
+META_FILE = 'meta.json'
+
+# BERT special token ids (bert-base-uncased)
+PAD_ID = 0
+CLS_ID = 101
+SEP_ID = 102
+
+
+def log(message):
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def iter_file_tokens(path, tokenizer, chunk_chars=100_000):
+    """Yield uint16 token ids for one script, tokenized in line-aligned chunks of ~`chunk_chars`."""
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_chars)
+            if not chunk:
+                break
+            # Extend to the end of the current line so no word is split
+            chunk += f.readline()
+            yield np.asarray(tokenizer.encode(chunk, add_special_tokens=False), dtype=np.uint16)
+
+
+def write_store_index(store_dir, script_files, offsets, labels=None):
+    """Write the offset index and metadata that sit next to tokens.bin."""
+    labels = labels or {}
+    targets = np.array([labels.get(script_file, np.nan) for script_file in script_files], dtype=np.float32)
+    np.savez(os.path.join(store_dir, INDEX_FILE), offsets=offsets, targets=targets)
+    with open(os.path.join(store_dir, META_FILE), 'w') as f:
+        json.dump({'scripts': list(script_files), 'num_tokens': int(offsets[-1])}, f)
+
+
+def build_token_store(scripts_dir, store_dir, tokenizer, labels=None, chunk_chars=100_000):
+    """Tokenize every script into a memory-mappable token file.
+
+    Scripts are read and tokenized in chunks of roughly `chunk_chars` characters
+    (split on line boundaries) and appended to disk, so memory stays flat no matter
+    how large the corpus is. `labels` maps script file name -> float target; scripts
+    without a label get NaN and are skipped by the pipeline.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    script_files = canonical_script_files(scripts_dir)
+
+    offsets = np.zeros(len(script_files) + 1, dtype=np.int64)
+    tokens_path = os.path.join(store_dir, TOKENS_FILE)
+
+    with open(tokens_path, 'wb') as out:
+        for i, script_file in enumerate(script_files):
+            n_tokens = 0
+            for ids in iter_file_tokens(os.path.join(scripts_dir, script_file), tokenizer, chunk_chars):
+                ids.tofile(out)
+                n_tokens += len(ids)
+            offsets[i + 1] = offsets[i] + n_tokens
+            if (i + 1) % 100 == 0:
+                log(f"Tokenized {i + 1}/{len(script_files)} scripts ({offsets[i + 1]} tokens)")
+
+    write_store_index(store_dir, script_files, offsets, labels)
+    log(f"Token store written to '{store_dir}': {len(script_files)} scripts, {offsets[-1]} tokens")
+    return TokenStore(store_dir)
+
+
+def load_labels(labels_path, target_column, key_column='script_name'):
+    """Read a {script file name: target} mapping from a script features CSV."""
+    labels = pd.read_csv(labels_path, usecols=[key_column, target_column])
+    labels = labels.dropna(subset=[target_column])
+    return dict(zip(labels[key_column], labels[target_column].astype(float)))
+
+
+class TokenStore:
+    """Read-only view over a token store written by build_token_store."""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        index = np.load(os.path.join(store_dir, INDEX_FILE))
+        self.offsets = index['offsets']
+        self.targets = index['targets']
+        with open(os.path.join(store_dir, META_FILE)) as f:
+            self.scripts = json.load(f)['scripts']
+        tokens_path = os.path.join(store_dir, TOKENS_FILE)
+        if self.offsets[-1] > 0:
+            self.tokens = np.memmap(tokens_path, dtype=np.uint16, mode='r')
+        else:
+            self.tokens = np.zeros(0, dtype=np.uint16)
+
+    def __len__(self):
+        return len(self.scripts)
+
+    def window_spans(self, window_size, stride=None):
+        """Return (start, length, script index) rows for every window of every labelled script."""
+        stride = stride or window_size
+        lengths = np.diff(self.offsets)
+        labelled = np.flatnonzero(~np.isnan(self.targets) & (lengths > 0))
+        counts = np.maximum(1, -(-(lengths[labelled] - window_size) // stride) + 1)
+        counts[lengths[labelled] <= window_size] = 1
+
+        script_idx = np.repeat(labelled, counts)
+        # Position of each window within its script: 0, 1, 2, ... per script
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        pos = np.arange(len(script_idx)) - first
+        rel_start = pos * stride
+        starts = self.offsets[script_idx] + rel_start
+        window_len = np.minimum(window_size, lengths[script_idx] - rel_start)
+        return np.stack([starts, window_len, script_idx], axis=1).astype(np.int64)
+
+
+class WindowPipeline:
+    """Shuffling, length-bucketing, prefetching batch iterator over a TokenStore.
+
+    Each window is wrapped as [CLS] tokens [SEP] and padded only to the longest
+    length of its bucket. Batch order for an epoch is a pure function of
+    (seed, epoch), so a run can resume mid-epoch by skipping batches without
+    touching the token file.
+    """
+
+    def __init__(self, store, window_size=510, stride=None, batch_size=16,
+                 bucket_boundaries=(64, 128, 256), seed=42, prefetch=4, script_ids=None):
+        self.store = store
+        self.window_size = window_size
+        self.batch_size = batch_size
+        self.seed = seed
+        self.prefetch = prefetch
+        self.spans = store.window_spans(window_size, stride)
+        if script_ids is not None:
+            self.spans = self.spans[np.isin(self.spans[:, 2], script_ids)]
+        self.boundaries = np.array(sorted(b for b in bucket_boundaries if b < window_size) + [window_size])
+
+    @property
+    def num_windows(self):
+        return len(self.spans)
+
+    def epoch_batches(self, epoch):
+        """Return the list of span-index arrays making up each batch of `epoch`."""
+        rng = np.random.default_rng([self.seed, epoch])
+        order = rng.permutation(len(self.spans))
+        buckets = np.searchsorted(self.boundaries, self.spans[order, 1])
+
+        batches = []
+        for b in range(len(self.boundaries)):
+            members = order[buckets == b]
+            batches.extend(np.array_split(members, range(self.batch_size, len(members), self.batch_size)))
+        batches = [batch for batch in batches if len(batch)]
+        return [batches[i] for i in rng.permutation(len(batches))]
+
+    def num_batches(self, epoch=0):
+        return len(self.epoch_batches(epoch))
+
+    def make_batch(self, span_ids):
+        """Copy the windows for `span_ids` out of the memory map into padded arrays."""
+        spans = self.spans[span_ids]
+        seq_len = int(spans[:, 1].max()) + 2
+        input_ids = np.full((len(spans), seq_len), PAD_ID, dtype=np.int32)
+        attention_mask = np.zeros((len(spans), seq_len), dtype=np.int32)
+        tokens = self.store.tokens
+        for row, (start, length, _) in enumerate(spans):
+            input_ids[row, 0] = CLS_ID
+            input_ids[row, 1:length + 1] = tokens[start:start + length]
+            input_ids[row, length + 1] = SEP_ID
+            attention_mask[row, :length + 2] = 1
+        targets = self.store.targets[spans[:, 2]]
+        return input_ids, attention_mask, targets
+
+    def iter_ordered(self):
+        """Yield (script indices, input ids, attention mask) in storage order, for inference."""
+        for start in range(0, len(self.spans), self.batch_size):
+            span_ids = np.arange(start, min(start + self.batch_size, len(self.spans)))
+            input_ids, attention_mask, _ = self.make_batch(span_ids)
+            yield self.spans[span_ids, 2], input_ids, attention_mask
+
+    def iter_epoch(self, epoch, skip_batches=0):
+        """Yield batches for `epoch`, materialized by a background thread."""
+        batches = self.epoch_batches(epoch)[skip_batches:]
+        buffer = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def producer():
+            try:
+                for span_ids in batches:
+                    if stop.is_set():
+                        return
+                    buffer.put(self.make_batch(span_ids))
+            except BaseException as e:
+                buffer.put(e)
+            finally:
+                buffer.put(done)
+
+        worker = threading.Thread(target=producer, daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            # Drain so the producer is never left blocked on a full queue
+            while worker.is_alive():
+                try:
+                    buffer.get(timeout=0.1)
+                except queue.Empty:
+                    pass
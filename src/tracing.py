@@ -0,0 +1,274 @@
+"""
+tracing.py
+Shared stage tracing: nested spans with timing, throughput and memory numbers.
+
+Each stage of a script is wrapped in a span:
+
+    from tracing import tracer, log, debug_frame
+
+    with tracer.span('load_ratings') as span:
+        ratings = pd.read_csv(path)
+        span.rows_out = len(ratings)
+    debug_frame(ratings, "First 15 rows of IMDb ratings data loaded:")
+
+Spans nest, and repeated spans with the same name under the same parent (one per
+script in a loop, say) are folded into one node with a call count. Each node records
+wall and CPU seconds, rows in/out, rows per second, the change in resident memory and
+the process's peak RSS. `tracer.export(path)` writes the tree as JSON and `tracer.report()`
+logs a table.
+
+Environment variables:
+    TRACE_QUIET=1             drop debug_frame() output and log(..., debug=True) messages
+    TRACE_PROFILE=<span>      profile every call of that span
+    TRACE_PROFILER=sample     use the low-overhead sampling profiler instead of cProfile
+    TRACE_DIR=<dir>           where export() and profiler output go (default data/traces)
+"""
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import datetime
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+trace_dir = os.environ.get('TRACE_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'traces')))
+
+
+def current_rss_mb():
+    """Current resident set size in MB (Linux /proc; 0 where unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+
+def peak_rss_mb():
+    """High-water mark of the process's resident set size in MB."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10  # bytes on macOS, KB on Linux
+
+
+class SamplingProfiler:
+    """Samples one thread's stack every `interval` seconds from a background thread.
+
+    Much cheaper than cProfile on tight loops; reports how often each function was on
+    the stack (cumulative) and at the top of it (self).
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.self_counts = Counter()
+        self.stack_counts = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self, thread_id):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.self_counts[self._label(frame)] += 1
+            seen = set()
+            while frame is not None:
+                label = self._label(frame)
+                if label not in seen:
+                    self.stack_counts[label] += 1
+                    seen.add(label)
+                frame = frame.f_back
+
+    @staticmethod
+    def _label(frame):
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+    def enable(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(threading.get_ident(),), daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        self._stop.set()
+        self._thread.join()
+
+    def top(self, n=20):
+        total = max(self.samples, 1)
+        return [{'function': label, 'cumulative': count / total, 'self': self.self_counts[label] / total}
+                for label, count in self.stack_counts.most_common(n)]
+
+
+class Span:
+    """Accumulated measurements for one named stage (all calls under the same parent)."""
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.children = {}
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.rss_delta_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self.profiler = None
+
+    @property
+    def rows_per_second(self):
+        rows = self.rows_in or self.rows_out
+        return rows / self.wall_seconds if rows and self.wall_seconds > 0 else None
+
+    def to_dict(self):
+        result = {
+            'name': self.name,
+            'calls': self.calls,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'rows_per_second': self.rows_per_second,
+            'rss_delta_mb': self.rss_delta_mb,
+            'peak_rss_mb': self.peak_rss_mb,
+            'children': [child.to_dict() for child in self.children.values()],
+        }
+        if isinstance(self.profiler, SamplingProfiler):
+            result['profile'] = self.profiler.top()
+        return result
+
+
+class SpanCall:
+    """Handle for one call of a span, used to report the rows it consumed and produced."""
+
+    def __init__(self, node, rows_in=None):
+        self.node = node
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.rss_start = current_rss_mb()
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+
+
+class Tracer:
+    """Collects a tree of spans for one process run."""
+
+    def __init__(self, quiet=None, profile_span=None, profiler=None, output_dir=trace_dir):
+        self.quiet = os.environ.get('TRACE_QUIET', '') not in ('', '0') if quiet is None else quiet
+        self.profile_span = profile_span if profile_span is not None else os.environ.get('TRACE_PROFILE')
+        self.profiler = profiler or os.environ.get('TRACE_PROFILER', 'cprofile')
+        self.output_dir = output_dir
+        self.root = Span('run')
+        self._stack = [self.root]
+        self.started = datetime.datetime.now()
+
+    def _make_profiler(self):
+        return SamplingProfiler() if self.profiler == 'sample' else cProfile.Profile()
+
+    def begin(self, name, rows_in=None):
+        """Open a span without a with-block (for flat scripts); close it with end()."""
+        parent = self._stack[-1]
+        node = parent.children.get(name)
+        if node is None:
+            node = parent.children[name] = Span(name, parent)
+        call = SpanCall(node, rows_in)
+        self._stack.append(node)
+        if name == self.profile_span:
+            if node.profiler is None:
+                node.profiler = self._make_profiler()
+            node.profiler.enable()
+        return call
+
+    def end(self, call, rows_out=None):
+        node = call.node
+        if self._stack[-1] is not node:
+            raise RuntimeError(f"Span '{node.name}' ended while '{self._stack[-1].name}' is still open")
+        if node.profiler is not None and node.name == self.profile_span:
+            node.profiler.disable()
+        node.wall_seconds += time.perf_counter() - call.wall_start
+        node.cpu_seconds += time.process_time() - call.cpu_start
+        node.rss_delta_mb += current_rss_mb() - call.rss_start
+        node.peak_rss_mb = max(node.peak_rss_mb, peak_rss_mb())
+        node.calls += 1
+        node.rows_in += call.rows_in or 0
+        node.rows_out += (rows_out if rows_out is not None else call.rows_out) or 0
+        self._stack.pop()
+
+    @contextmanager
+    def span(self, name, rows_in=None):
+        """Time a stage. Set `.rows_out` (and `.rows_in` if not passed) on the yielded handle."""
+        call = self.begin(name, rows_in)
+        try:
+            yield call
+        finally:
+            self.end(call)
+
+    def to_dict(self):
+        self.root.wall_seconds = sum(child.wall_seconds for child in self.root.children.values())
+        self.root.cpu_seconds = sum(child.cpu_seconds for child in self.root.children.values())
+        self.root.peak_rss_mb = peak_rss_mb()
+        self.root.calls = 1
+        return {'started': self.started.isoformat(), 'argv': sys.argv, 'trace': self.root.to_dict()}
+
+    def _walk(self, node=None, depth=0):
+        node = node or self.root
+        for child in node.children.values():
+            yield child, depth
+            yield from self._walk(child, depth + 1)
+
+    def export(self, path=None):
+        """Write the span tree as JSON, plus a .prof / .txt file for a profiled span."""
+        if path is None:
+            script = os.path.splitext(os.path.basename(sys.argv[0] or 'run'))[0] or 'run'
+            path = os.path.join(self.output_dir, f"{script}_{self.started:%Y%m%d_%H%M%S}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        for node, _ in self._walk():
+            if isinstance(node.profiler, cProfile.Profile):
+                prof_path = os.path.splitext(path)[0] + f"_{node.name}.prof"
+                node.profiler.dump_stats(prof_path)
+                with open(os.path.splitext(prof_path)[0] + '.txt', 'w') as f:
+                    pstats.Stats(node.profiler, stream=f).sort_stats('cumulative').print_stats(30)
+        log(f"Trace saved to '{path}'")
+        return path
+
+    def report(self):
+        """Log one line per span: calls, wall/CPU seconds, rows, rows/sec and memory."""
+        lines = [f"{'stage':<40} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'rows out':>10} {'rows/s':>10} "
+                 f"{'dRSS MB':>8} {'peak MB':>8}"]
+        for node, depth in self._walk():
+            rate = '-' if node.rows_per_second is None else f"{node.rows_per_second:.0f}"
+            lines.append(f"{'  ' * depth + node.name:<40} {node.calls:>6} {node.wall_seconds:>9.3f} "
+                         f"{node.cpu_seconds:>9.3f} {node.rows_out:>10} {rate:>10} "
+                         f"{node.rss_delta_mb:>8.1f} {node.peak_rss_mb:>8.1f}")
+        log("Stage timings:\n" + '\n'.join(lines))
+
+
+tracer = Tracer()
+
+
+def log(message, debug=False):
+    """Timestamped log line. Debug messages are dropped in quiet mode."""
+    if debug and tracer.quiet:
+        return
+    print(f"[{datetime.datetime.now()}] [LOG]: {message}")
+
+
+def debug_frame(frame, message=None, n=15):
+    """Print the first `n` rows of a DataFrame unless in quiet mode."""
+    if tracer.quiet:
+        return
+    if message:
+        log(message)
+    print(frame.head(n))
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules live flat under src/ and import each other by name, as the scripts do
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
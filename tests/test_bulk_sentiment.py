@@ -0,0 +1,55 @@
+import pytest
+from textblob import TextBlob
+
+from bulk_sentiment import BulkSentiment, tokenize
+
+CORPUS = [
+    "It isn't bad at all.",
+    "I don't like it :)",
+    "This is not good.",
+    "She's really not happy :(",
+    "DON'T BE SAD. IT'S WONDERFUL.",
+    "You can't be serious... that's terrible :-(",
+    "I never liked him. He wasn't very kind.",
+    "Great xD",
+    "What a lovely day ;)",
+    "It's not a good idea, is it? No.",
+    "He doesn't seem very nice, but she's a truly great friend <3",
+    "That isn't really what I'd call beautiful.",
+    "INT. KITCHEN - NIGHT\nJOHN (V.O.)\nWell, I'd say it's pretty good. Not great, but good.",
+    "We won't lose this -- it's the best thing that's ever happened to us.",
+]
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return BulkSentiment()
+
+
+def test_contractions_are_not_negations():
+    assert tokenize("It isn't bad") == ['it', 'is', 'n', 't', 'bad']
+    assert tokenize("DON'T") == ['don', 't']
+
+
+@pytest.mark.parametrize('text', CORPUS)
+def test_score_text_matches_textblob(analyzer, text):
+    reference = TextBlob(text).sentiment
+    polarity, subjectivity = analyzer.score_text(text)
+    assert polarity == pytest.approx(reference.polarity, abs=0.02)
+    assert subjectivity == pytest.approx(reference.subjectivity, abs=0.02)
+
+
+def test_corpus_scores_match_textblob(analyzer):
+    # One document made of the whole corpus, plus each text on its own
+    texts = CORPUS + ['\n'.join(CORPUS * 20)]
+    scores = analyzer.score(texts)
+    for text, (polarity, subjectivity) in zip(texts, scores.itertuples(index=False)):
+        reference = TextBlob(text).sentiment
+        assert polarity == pytest.approx(reference.polarity, abs=0.02)
+        assert subjectivity == pytest.approx(reference.subjectivity, abs=0.02)
+
+
+def test_contraction_keeps_textblob_sign(analyzer):
+    polarity, _ = analyzer.score_text("It isn't bad at all.")
+    assert polarity < 0
+    assert polarity == pytest.approx(TextBlob("It isn't bad at all.").sentiment.polarity)
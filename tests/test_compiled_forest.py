@@ -0,0 +1,82 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from model_trainer import COMPILED_ARRAYS, CompiledForest, compile_forest, save_model
+
+
+@pytest.fixture(scope='module')
+def forest_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(3000, 8)), columns=[f"f{i}" for i in range(8)])
+    X['year'] = rng.integers(1950, 2024, len(X)).astype(float)
+    X.loc[rng.random(len(X)) < 0.1, 'f1'] = np.nan  # trained with missing values
+    y = X['f0'] * 2 + X['f1'].fillna(0) ** 2 + (X['year'] > 2000) + rng.normal(scale=0.3, size=len(X))
+    model = RandomForestRegressor(n_estimators=30, random_state=0, n_jobs=1).fit(X[:2000], y[:2000])
+    return model, X[2000:]
+
+
+def test_predictions_are_bit_identical(forest_data, tmp_path):
+    model, X_test = forest_data
+    X_test = X_test.copy()
+    X_test.iloc[::7, 3] = np.nan  # missing where training had none
+    X_test.iloc[::11, 0] = np.float32(model.estimators_[0].tree_.threshold[0])  # exactly on a split
+    expected = model.predict(X_test)
+
+    compiled = compile_forest(model, str(tmp_path / 'compiled'))
+    loaded = CompiledForest.load(str(tmp_path / 'compiled'))
+    assert np.array_equal(compiled.predict(X_test), expected)
+    assert np.array_equal(loaded.predict(X_test), expected)
+    # Columns are selected by name, and batching does not change the result
+    assert np.array_equal(loaded.predict(X_test[X_test.columns[::-1]], batch_rows=97), expected)
+    assert np.array_equal(loaded.predict(X_test.to_numpy()[:1]), expected[:1])
+
+
+def test_load_maps_the_traversal_layout(forest_data, tmp_path):
+    model, X_test = forest_data
+    compile_forest(model, str(tmp_path / 'compiled'))
+    loaded = CompiledForest.load(str(tmp_path / 'compiled'))
+    # Everything predict walks is memory-mapped as saved; nothing is built on first call
+    for name in COMPILED_ARRAYS:
+        assert isinstance(getattr(loaded, name), np.memmap)
+    assert loaded.children.dtype == np.intp and loaded.threshold.dtype == np.float32
+    assert np.array_equal(loaded.predict(X_test[:1]), model.predict(X_test[:1]))
+
+
+def test_large_batches_use_the_pickled_model(forest_data, tmp_path):
+    model, X_test = forest_data
+    model_path = str(tmp_path / 'model.pkl')
+    save_model(copy.copy(model).set_params(n_jobs=-1), model_path)  # pickled for parallel use
+    compile_forest(model, str(tmp_path / 'compiled'), model_path=model_path)
+    loaded = CompiledForest.load(str(tmp_path / 'compiled'))
+    expected = model.predict(X_test)
+
+    assert np.array_equal(loaded.predict(X_test[:100], bulk_rows=100), expected[:100])
+    assert loaded._model is None  # small batches never load the pickle
+    assert np.array_equal(loaded.predict(X_test, bulk_rows=100), expected)
+    assert loaded._model is not None and loaded._model.n_jobs == 1
+
+    # Without a pickle every batch size takes the array path
+    compile_forest(model, str(tmp_path / 'alone'))
+    alone = CompiledForest.load(str(tmp_path / 'alone'))
+    assert np.array_equal(alone.predict(X_test, bulk_rows=100), expected)
+    assert alone.sklearn_model() is None
+
+
+def test_leaves_match_sklearn_apply(forest_data):
+    model, X_test = forest_data
+    compiled = CompiledForest.from_sklearn(model)
+    X = np.ascontiguousarray(X_test.to_numpy(), dtype=np.float32)
+    leaves = compiled._leaves(X, compiled.roots) - compiled.roots[:, None]
+    assert np.array_equal(leaves.T, model.apply(X_test))
+
+
+def test_rejects_other_models():
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = RandomForestClassifier(n_estimators=2).fit([[0], [1]], [0, 1])
+    with pytest.raises(ValueError):
+        CompiledForest.from_sklearn(model)
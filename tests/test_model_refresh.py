@@ -0,0 +1,90 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import model_trainer
+from model_trainer import CompiledForest, holdout_rows, load_model, load_refresh_state
+
+N_ESTIMATORS, REFRESH_TREES, MAX_TREES = 12, 4, 14
+
+
+def features(n, seed, flip=False):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'runtimeMinutes': rng.normal(100, 20, n).round(),
+        'numVotes': rng.integers(10, 10000, n),
+        'startYear': rng.integers(1960, 2024, n),
+        'genres': rng.choice(['Drama', 'Comedy', 'Comedy,Drama', 'Horror'], n),
+        'directors': [f"d{i}" for i in rng.integers(0, 50, n)],
+    })
+    rating = 5 + (data['runtimeMinutes'] - 100) / 20 + (data['genres'] == 'Drama') + rng.normal(0, 0.3, n)
+    data['averageRating'] = (10 - rating if flip else rating).round(2)
+    data.insert(0, 'tconst', [f"tt{seed:02d}{i:05d}" for i in range(n)])
+    return data
+
+
+def train_side(data):
+    """Rows of `data` in the training split."""
+    return data[~holdout_rows(data.set_index('tconst'))]
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    model_path = str(tmp_path / 'model' / 'random_forest_model.pkl')
+
+    def train(data, *flags):
+        csv = tmp_path / 'final_features.csv'
+        data.to_csv(csv, index=False)
+        monkeypatch.setattr(sys, 'argv', [
+            'model_trainer.py', '--input', str(csv), '--output', model_path, '--jobs', '1',
+            '--n-estimators', str(N_ESTIMATORS), '--refresh-trees', str(REFRESH_TREES), '--max-trees', str(MAX_TREES),
+            '--compiled-output', str(tmp_path / 'compiled'), '--encoder-output', str(tmp_path / 'encoder.json'),
+            *flags])
+        model_trainer.main()
+        state, known = load_refresh_state(model_path)
+        return state, known, load_model(model_path)
+
+    return train
+
+
+def test_refresh_new_rows_noop_and_drift_fallback(run, tmp_path):
+    first = features(800, 1)
+    state, known, model = run(first, '--refresh')  # no state yet: full training
+    assert state['generation'] == 0 and state['refreshes'] == []
+    assert len(model.estimators_) == N_ESTIMATORS
+    assert set(state['target_encode']) == {'genres', 'directors'}
+    reference_rmse = state['reference']['rmse']
+
+    # New and re-rated titles: warm-start trees on the training rows among them only,
+    # oldest trees retired
+    added = features(300, 2)
+    changed = first.iloc[::40].assign(averageRating=lambda d: d['averageRating'] + 0.5)
+    grown = pd.concat([first.drop(changed.index), changed, added], ignore_index=True)
+    state, known_after, model = run(grown, '--refresh')
+    assert state['generation'] == 1
+    last = state['refreshes'][-1]
+    # Old titles keep their side of the split, so exactly the added and changed training titles are refreshed
+    assert last['rows'] == len(train_side(pd.concat([changed, added])))
+    assert len(known_after) == len(known) + last['rows']
+    # Drift is measured on the whole test partition, which no tree was fitted on
+    assert last['test_rows'] == len(grown) - len(train_side(grown))
+    assert (last['trees'], last['retired']) == (MAX_TREES, N_ESTIMATORS + REFRESH_TREES - MAX_TREES)
+    assert len(model.estimators_) == MAX_TREES
+    X = pd.DataFrame(np.ones((3, len(model.feature_names_in_))), columns=model.feature_names_in_)
+    assert np.array_equal(CompiledForest.load(str(tmp_path / 'compiled')).predict(X), model.predict(X))
+
+    # Same dump again: nothing new, the forest is left as it is
+    before = [tree.tree_.node_count for tree in model.estimators_]
+    state, known_noop, model = run(grown, '--refresh')
+    assert state['generation'] == 2 and state['refreshes'][-1]['rows'] == 0
+    assert [tree.tree_.node_count for tree in model.estimators_] == before
+    assert np.array_equal(known_noop, known_after)
+
+    # Ratings that no longer follow the old relationship: the refresh drifts past the
+    # threshold and is replaced by a full retrain
+    state, _, model = run(features(1100, 3, flip=True), '--refresh')
+    assert state['generation'] == 0 and state['refreshes'] == []
+    assert len(model.estimators_) == N_ESTIMATORS
+    assert state['reference']['rmse'] != reference_rmse  # the new full retrain is the new reference
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reservoir_sample import allocate, sample_csv, sort_keys, strata_keys
+
+
+@pytest.fixture(scope='module')
+def basics_csv(tmp_path_factory):
+    rng = np.random.default_rng(4)
+    n = 5000
+    data = pd.DataFrame({
+        'tconst': [f"tt{i:07d}" for i in rng.permutation(n * 3)[:n]],
+        'titleType': rng.choice(['movie', 'short', 'tvEpisode'], n, p=[0.6, 0.3, 0.1]),
+        'startYear': np.where(rng.random(n) < 0.05, np.nan, rng.integers(1920, 2024, n)),
+        'averageRating': np.where(rng.random(n) < 0.2, np.nan, rng.uniform(1, 10, n).round(1)),
+    })
+    path = tmp_path_factory.mktemp('basics') / 'basics.csv'
+    data.to_csv(path, index=False)
+    return str(path), data
+
+
+@pytest.mark.parametrize('key_column', ['tconst', None])
+def test_sample_does_not_depend_on_chunk_size(basics_csv, key_column):
+    path, _ = basics_csv
+    reference, reference_stats = sample_csv(path, 400, seed=7, key_column=key_column, chunk_size=100_000)
+    for chunk_size in (29, 256, 999):
+        sample, stats = sample_csv(path, 400, seed=7, key_column=key_column, chunk_size=chunk_size)
+        pd.testing.assert_frame_equal(sample, reference)
+        pd.testing.assert_frame_equal(stats, reference_stats)
+    other_seed, _ = sample_csv(path, 400, seed=8, key_column=key_column)
+    assert not other_seed['tconst'].equals(reference['tconst'])
+
+
+def test_sample_is_bottom_k_per_stratum(basics_csv):
+    path, data = basics_csv
+    sample, stats = sample_csv(path, 400, seed=7, key_column='tconst', chunk_size=333)
+    data = data.assign(key=sort_keys(data, 'tconst', 7, None), stratum=strata_keys(data))
+    assert stats['population'].to_dict() == data['stratum'].value_counts().to_dict()
+    assert stats['sampled'].sum() == len(sample) == 400
+    expected = [group.nsmallest(stats.loc[stratum, 'sampled'], 'key')
+                for stratum, group in data.groupby('stratum') if stats.loc[stratum, 'sampled']]
+    expected = pd.concat(expected).sort_index()
+    assert sample['tconst'].tolist() == expected['tconst'].tolist()  # in file order
+
+
+def test_id_keys_select_the_same_titles_across_files(basics_csv, tmp_path):
+    path, data = basics_csv
+    subset = tmp_path / 'subset.csv'
+    data.iloc[::2].to_csv(subset, index=False)
+    whole = set(sample_csv(path, 5000, seed=7, key_column='tconst')[0]['tconst'])
+    assert len(whole) == len(data)  # asking for everything returns everything
+    full, _ = sample_csv(path, 200, seed=7, key_column='tconst', type_column=None, year_column=None,
+                         rating_column=None)
+    half, _ = sample_csv(str(subset), 100, seed=7, key_column='tconst', type_column=None, year_column=None,
+                         rating_column=None)
+    # Bottom-k by the same hash: every sampled subset title with a key below the full
+    # sample's cut-off is in the full sample too
+    keys = dict(zip(data['tconst'], sort_keys(data, 'tconst', 7, None)))
+    cut = max(keys[t] for t in full['tconst'])
+    assert {t for t in half['tconst'] if keys[t] <= cut} <= set(full['tconst'])
+
+
+def test_allocate():
+    counts = pd.Series({'a': 70, 'b': 20, 'c': 10})
+    assert allocate(counts, 10).to_dict() == {'a': 7, 'b': 2, 'c': 1}
+    assert allocate(counts, 15).sum() == 15
+    assert allocate(counts, 30, 'equal').to_dict() == {'a': 10, 'b': 10, 'c': 10}
+    assert allocate(counts, 45, 'equal').to_dict() == {'a': 18, 'b': 17, 'c': 10}
+    assert allocate(counts, 500).equals(counts)
+    with pytest.raises(ValueError):
+        allocate(counts, 10, 'random')
@@ -0,0 +1,99 @@
+import json
+import random
+
+import numpy as np
+
+from script_dedup import canonical_script_files, deduplicate, script_signature, shingle_hashes
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+
+
+def write_script(path, words):
+    # Lines of 12 words, like dialogue blocks
+    with open(path, 'w') as f:
+        f.write('\n'.join(' '.join(words[i:i + 12]) for i in range(0, len(words), 12)))
+
+
+def edit(words, rate, rng):
+    """A later draft: `rate` of the words replaced and a short scene appended."""
+    draft = [rng.choice(VOCABULARY) if rng.random() < rate else word for word in words]
+    return draft + [rng.choice(VOCABULARY) for _ in range(100)]
+
+
+def exact_jaccard(a, b):
+    a, b = set(shingle_hashes(a).tolist()), set(shingle_hashes(b).tolist())
+    return len(a & b) / len(a | b)
+
+
+def test_near_duplicates_are_found(tmp_path):
+    rng = random.Random(7)
+    scripts = {f"film{i:02d}.txt": [rng.choice(VOCABULARY) for _ in range(3000)] for i in range(30)}
+    planted = {}
+    for i in range(10):
+        original = f"film{i:02d}.txt"
+        draft = edit(scripts[original], 0.02, rng)
+        planted[f"film{i:02d}_draft.txt"] = original
+        scripts[f"film{i:02d}_draft.txt"] = draft
+        assert exact_jaccard(scripts[original], draft) > 0.75
+    # An unrelated rewrite sharing a quarter of its text is not a duplicate
+    scripts['film29_loose.txt'] = scripts['film29.txt'][:750] + [rng.choice(VOCABULARY) for _ in range(2250)]
+    for name, words in scripts.items():
+        write_script(tmp_path / name, words)
+
+    canonical, report = deduplicate(str(tmp_path), cache_file=None)
+
+    clusters = {frozenset([c['canonical'], *c['duplicates']]) for c in report['clusters']}
+    assert clusters == {frozenset([draft, original]) for draft, original in planted.items()}
+    # The longer draft is kept
+    assert sorted(set(scripts) - set(canonical)) == sorted(planted.values())
+    assert report['candidate_pairs_checked'] < report['all_pairs'] // 10
+
+
+def test_signature_estimates_jaccard_and_ignores_block_size(tmp_path):
+    rng = random.Random(3)
+    words = [rng.choice(VOCABULARY) for _ in range(4000)]
+    write_script(tmp_path / 'a.txt', words)
+    for rate in (0.01, 0.05, 0.1):
+        draft = edit(words, rate, rng)
+        write_script(tmp_path / 'b.txt', draft)
+        a, n_words = script_signature(str(tmp_path / 'a.txt'))
+        b, _ = script_signature(str(tmp_path / 'b.txt'))
+        assert n_words == len(words)
+        assert abs(np.mean(a == b) - exact_jaccard(words, draft)) < 0.12  # ~3 standard errors at 128 hashes
+    streamed, _ = script_signature(str(tmp_path / 'a.txt'), block_size=97)
+    assert np.array_equal(streamed, a)
+
+
+def test_rerun_uses_cache_and_report(tmp_path):
+    scripts_dir, processed = tmp_path / 'scripts', tmp_path / 'processed'
+    scripts_dir.mkdir()
+    rng = random.Random(5)
+    words = [rng.choice(VOCABULARY) for _ in range(2000)]
+    write_script(scripts_dir / 'a.txt', words)
+    write_script(scripts_dir / 'a_draft.txt', edit(words, 0.01, rng))
+    write_script(scripts_dir / 'b.txt', [rng.choice(VOCABULARY) for _ in range(2000)])
+    cache = str(processed / 'cache.npz')
+
+    _, first = deduplicate(str(scripts_dir), cache_file=cache)
+    _, second = deduplicate(str(scripts_dir), cache_file=cache)
+    assert (first['signatures_computed'], second['signatures_computed']) == (3, 0)
+    assert second['clusters'] == first['clusters']
+
+    report = processed / 'report.json'
+    report.write_text(json.dumps(second))
+    assert canonical_script_files(str(scripts_dir), str(report)) == ['a_draft.txt', 'b.txt']
+
+
+def test_empty_scripts_are_not_clustered(tmp_path):
+    rng = random.Random(2)
+    words = [rng.choice(VOCABULARY) for _ in range(1000)]
+    write_script(tmp_path / 'a.txt', words)
+    write_script(tmp_path / 'b.txt', [rng.choice(VOCABULARY) for _ in range(1000)])
+    for name, text in (('empty.txt', ''), ('blank.txt', ' \n\n  \t\n'), ('punctuation.txt', '-- ... !!')):
+        (tmp_path / name).write_text(text)
+        assert script_signature(str(tmp_path / name)) == (None, 0)
+    assert script_signature(str(tmp_path / 'a.txt'))[0] is not None
+
+    canonical, report = deduplicate(str(tmp_path), cache_file=None)
+    assert report['clusters'] == []
+    assert canonical == ['a.txt', 'b.txt', 'blank.txt', 'empty.txt', 'punctuation.txt']
@@ -0,0 +1,66 @@
+import builtins
+import os
+import random
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from bulk_sentiment import BulkSentiment, score_files
+from screenplay_parser import script_arc_features
+from script_features import script_feature_frame
+from text_stats import script_stats
+
+WORDS = "the a man woman walks into room looks at door and says not very good bad happy terrible dark quiet".split()
+
+
+@pytest.fixture
+def script_paths(tmp_path):
+    rng = random.Random(5)
+    paths = []
+    for i in range(6):
+        lines = ['FADE IN:', '']
+        for scene in range(rng.randint(2, 6)):
+            lines += [f"{rng.choice(['INT.', 'EXT.'])} HOUSE {scene} - {rng.choice(['DAY', 'NIGHT'])}", '',
+                      ' '.join(rng.choices(WORDS, k=20)).capitalize() + '.', '',
+                      f"          {rng.choice(['JOHN', 'MARY (V.O.)'])}",
+                      f"     {' '.join(rng.choices(WORDS, k=8)).capitalize()}!", '']
+        path = tmp_path / f"film{i}.txt"
+        path.write_text('\n'.join(lines), encoding='utf-8')
+        paths.append(str(path))
+    (tmp_path / 'empty.txt').write_text('')
+    return paths + [str(tmp_path / 'empty.txt')]
+
+
+def three_pass_frame(paths, analyzer):
+    """The features as separate script_stats, script_arc_features and score_files passes give them."""
+    rows = []
+    for path in paths:
+        features = script_stats(path)
+        features.update(script_arc_features(path, analyzer))
+        features['script_name'] = os.path.basename(path)
+        rows.append(features)
+    frame = pd.DataFrame(rows)
+    sentiment = score_files(paths, analyzer)
+    frame['sentiment_polarity'] = sentiment['polarity'].values
+    frame['sentiment_subjectivity'] = sentiment['subjectivity'].values
+    return frame
+
+
+def test_single_read_matches_separate_passes(script_paths, monkeypatch):
+    analyzer = BulkSentiment()
+    expected = three_pass_frame(script_paths, analyzer)
+
+    opened, real_open = Counter(), builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        opened[str(file)] += 1
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', counting_open)
+    frame = script_feature_frame(script_paths, analyzer)
+    monkeypatch.undo()
+
+    assert opened == Counter(script_paths)  # every script read exactly once
+    pd.testing.assert_frame_equal(frame, expected)
+    assert frame['scene_count'].iloc[-1] == 0 and frame['word_count'].iloc[-1] == 0
@@ -0,0 +1,121 @@
+import json
+import os
+import random
+import time
+
+import pandas as pd
+import pytest
+
+import shard_queue
+from shard_queue import ShardQueue, run_local, run_script_features, work
+
+WORDS = "the a man woman walks into room looks at door and says good bad happy terrible dark quiet".split()
+
+
+@pytest.fixture
+def scripts_dir(tmp_path):
+    directory = tmp_path / 'scripts'
+    directory.mkdir()
+    rng = random.Random(11)
+    for i in range(8):
+        lines = ['FADE IN:', '']
+        for scene in range(rng.randint(3, 6)):
+            lines += [f"INT. HOUSE {scene} - DAY", '', ' '.join(rng.choices(WORDS, k=20)).capitalize() + '.', '',
+                      '          JOHN', f"     {' '.join(rng.choices(WORDS, k=8)).capitalize()}!", '']
+        (directory / f"film{i}.txt").write_text('\n'.join(lines))
+    return str(directory)
+
+
+def serial_features(scripts_dir, tmp_path):
+    paths = sorted(os.path.join(scripts_dir, f) for f in os.listdir(scripts_dir))
+    run_script_features(paths, {}, str(tmp_path / 'serial'))
+    return pd.read_csv(tmp_path / 'serial.csv')
+
+
+def expire(queue, unit, seconds=3600):
+    old = time.time() - seconds
+    os.utime(queue.lease_path(unit), (old, old))
+
+
+def test_crashed_lease_is_reclaimed_and_merge_matches_serial(scripts_dir, tmp_path):
+    queue = ShardQueue.create(str(tmp_path / 'queue'), 'script_features', scripts_dir, n_units=3, lease_timeout=60)
+    crashed = queue.unit_ids()[0]
+    assert queue.acquire(crashed, 'crashed-worker') is not None  # never released
+    assert queue.acquire(crashed, 'other') is None  # still live
+    expire(queue, crashed)
+    assert queue.status()['expired'] == 1
+
+    assert work(queue.root, 'survivor', heartbeat=0.2, poll=0.1) == len(queue.unit_ids())
+    with open(queue.done_path(crashed)) as f:
+        assert json.load(f)['attempt'] == 2
+    assert os.listdir(os.path.join(queue.root, 'leases')) == []
+
+    output = str(tmp_path / 'merged.csv')
+    assert queue.merge(output) == 8
+    pd.testing.assert_frame_equal(pd.read_csv(output), serial_features(scripts_dir, tmp_path))
+
+
+def test_unit_fails_after_max_attempts(scripts_dir, tmp_path):
+    queue = ShardQueue.create(str(tmp_path / 'queue'), 'script_features', scripts_dir, n_units=2, max_attempts=2)
+    unit = queue.unit_ids()[0]
+    for _ in range(2):
+        assert queue.acquire(unit, 'crashing') is not None
+        expire(queue, unit)
+    assert queue.acquire(unit, 'next') is None
+    assert queue.status()['failed'] == 1
+    work(queue.root, 'next', heartbeat=0.2, poll=0.1)  # the other units still run
+    assert queue.status()['done'] == len(queue.unit_ids()) - 1
+    with pytest.raises(RuntimeError):
+        queue.merge(str(tmp_path / 'merged.csv'))
+    assert queue.merge(str(tmp_path / 'partial.csv'), allow_partial=True) < 8
+    assert queue.requeue_failed() == [unit]
+
+
+def test_takeover_does_not_steal_a_fresh_lease(scripts_dir, tmp_path, monkeypatch):
+    queue = ShardQueue.create(str(tmp_path / 'queue'), 'script_features', scripts_dir, n_units=2)
+    unit = queue.unit_ids()[0]
+    queue.acquire(unit, 'crashed-worker')
+    expire(queue, unit)
+
+    # A faster worker takes the expired lease over after the slow one judged it expired,
+    # but before the slow one's rename runs
+    real_rename, raced = os.rename, []
+
+    def racing_rename(src, dst):
+        if not raced:
+            raced.append(None)
+            raced[0] = queue.acquire(unit, 'fast')
+        return real_rename(src, dst)
+
+    monkeypatch.setattr(shard_queue.os, 'rename', racing_rename)
+    assert queue.acquire(unit, 'slow') is None
+    fast = raced[0]
+    assert fast is not None and fast.owned()
+    assert sorted(os.listdir(os.path.join(queue.root, 'leases'))) == [unit + '.lease']
+
+
+def test_late_heartbeat_keeps_the_lease(scripts_dir, tmp_path, monkeypatch):
+    queue = ShardQueue.create(str(tmp_path / 'queue'), 'script_features', scripts_dir, n_units=2)
+    unit = queue.unit_ids()[0]
+    owner = queue.acquire(unit, 'stalled')
+    expire(queue, unit)
+    real_rename = os.rename
+
+    def heartbeat_then_rename(src, dst):
+        os.utime(src)
+        return real_rename(src, dst)
+
+    monkeypatch.setattr(shard_queue.os, 'rename', heartbeat_then_rename)
+    assert queue.acquire(unit, 'impatient') is None
+    assert owner.owned()
+
+
+def test_local_workers_survive_a_crash(scripts_dir, tmp_path):
+    root = str(tmp_path / 'queue')
+    queue = ShardQueue.create(root, 'script_features', scripts_dir, n_units=4, lease_timeout=2)
+    exit_codes = run_local(root, workers=2, heartbeat=0.5, poll=0.2, crash_after=0)
+    assert sorted(exit_codes) == [0, 1]
+    assert queue.status()['done'] == len(queue.unit_ids())
+    output = str(tmp_path / 'merged.csv')
+    queue.merge(output)
+    pd.testing.assert_frame_equal(pd.read_csv(output), serial_features(scripts_dir, tmp_path))
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import HyperLogLog, Moments, QuantileSketch, TableProfile, TopK
+
+
+def chunks(values, size):
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def test_moments_match_pandas_after_merge():
+    values = np.random.default_rng(0).lognormal(size=20000)
+    merged = Moments()
+    for chunk in chunks(values, 3000):
+        merged.merge(Moments().update(chunk))
+    summary, series = merged.summary(), pd.Series(values)
+    assert summary['mean'] == pytest.approx(series.mean(), rel=1e-12)
+    assert summary['std'] == pytest.approx(series.std(), rel=1e-12)
+    assert summary['skew'] == pytest.approx(series.skew(), rel=1e-3)
+    assert (summary['min'], summary['max']) == (values.min(), values.max())
+
+
+def test_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(1).normal(100, 30, size=50000)
+    sketch = QuantileSketch(relative_accuracy=0.005)
+    for chunk in chunks(values, 7000):
+        sketch.update(chunk)
+    qs = [0.01, 0.25, 0.5, 0.75, 0.99]
+    exact = np.quantile(values, qs, method='lower')
+    for estimate, truth in zip(sketch.quantiles(qs), exact):
+        assert abs(estimate - truth) <= 0.005 * abs(truth) + 1e-9
+
+
+@pytest.mark.parametrize('distinct', [1000, 100000])
+def test_hyperloglog_error_bound(distinct):
+    values = np.random.default_rng(2).permutation(np.arange(distinct).repeat(2))
+    merged = HyperLogLog()
+    for chunk in chunks(values, 25000):
+        merged.merge(HyperLogLog().update(chunk))
+    single = HyperLogLog().update(values)
+    assert np.array_equal(merged.registers, single.registers)
+    standard_error = 1.04 / np.sqrt(merged.m)
+    assert abs(merged.count() - distinct) <= 4 * standard_error * distinct
+
+
+def test_hyperloglog_counts_mixed_dtype_chunks_once():
+    ints = np.arange(1000)
+    sketch = HyperLogLog().update(ints).update(ints.astype(float)).update(ints.astype(np.int32))
+    assert np.array_equal(sketch.registers, HyperLogLog().update(ints).registers)
+    assert abs(sketch.count() - 1000) <= 20
+    # A column that picks up a NaN in one chunk is read as float there
+    column = TableProfile()
+    column.update(pd.DataFrame({'year': ints[:600]}))
+    column.update(pd.DataFrame({'year': np.append(ints[400:].astype(float), np.nan)}))
+    assert abs(column.columns['year'].summary()['unique'] - 1000) <= 20
+    # Non-integral floats still count as their own values
+    halves = HyperLogLog().update(ints).update(ints + 0.5)
+    assert abs(halves.count() - 2000) <= 40
+
+
+def test_topk_keeps_heavy_hitters_within_error():
+    rng = np.random.default_rng(3)
+    values = np.concatenate([np.repeat(['a', 'b', 'c'], [5000, 3000, 2000]), rng.integers(0, 50000, 40000).astype(str)])
+    rng.shuffle(values)
+    merged = TopK(capacity=50)
+    for chunk in chunks(values, 9000):
+        merged.merge(TopK(capacity=50).update(chunk))
+    top = merged.top(3)
+    assert list(top.index) == ['a', 'b', 'c']
+    exact = pd.Series(values).value_counts()
+    for key, count in top.items():
+        assert exact[key] - merged.error <= count <= exact[key]
+    assert merged.error <= len(values) / 51
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from target_encoder import TargetEncoder
+
+SMOOTHING = 5.0
+
+
+@pytest.fixture(scope='module')
+def credits():
+    rng = np.random.default_rng(9)
+    n = 600
+    directors = [f"d{i}" for i in range(40)]
+    genres = ['Drama', 'Comedy', 'Comedy,Drama', 'Horror', 'Action,Drama']
+    X = pd.DataFrame({
+        'genres': rng.choice(genres, n).astype(object),
+        'directors': ['|'.join(rng.choice(directors, rng.integers(0, 3))) for _ in range(n)],
+    }, index=pd.RangeIndex(1000, 1000 + n))
+    X.loc[X.index[::17], 'genres'] = np.nan
+    X.loc[X.index[::23], 'directors'] = 'd1|d1'  # a level listed twice counts once
+    y = rng.normal(6, 1.5, n)
+    return X, y
+
+
+def levels(value, sep):
+    if not isinstance(value, str):
+        return []
+    parts = value.split(sep) if sep else [value]
+    return list(dict.fromkeys(part.strip() for part in parts if part.strip() not in ('', '\\N')))
+
+
+def naive_encode(values, sep, y, use, prior):
+    """Mean and max encoding of each row's levels, from the rows where `use` is True."""
+    stats = {}
+    for value, target in zip(values[use], y[use]):
+        for level in levels(value, sep):
+            total, count = stats.get(level, (0.0, 0))
+            stats[level] = (total + target, count + 1)
+    encoded = []
+    for value in values:
+        codes = [(stats.get(level, (0.0, 0))[0] + SMOOTHING * prior) / (stats.get(level, (0.0, 0))[1] + SMOOTHING)
+                 for level in levels(value, sep)]
+        encoded.append((np.mean(codes), max(codes)) if codes else (prior, prior))
+    return np.array(encoded)
+
+
+def test_out_of_fold_matches_naive_loop(credits):
+    X, y = credits
+    encoder = TargetEncoder(['genres', 'directors'], smoothing=SMOOTHING, n_folds=4, random_state=3)
+    encoded = encoder.fit_transform(X, y)
+    assert list(encoded.columns) == ['genres_te', 'directors_te', 'directors_te_max']
+    assert encoded.index.equals(X.index)
+
+    folds = encoder.fold_ids(len(X))
+    for column, sep in encoder.columns.items():
+        values = X[column].to_numpy()
+        expected = np.empty((len(X), 2))
+        for fold in range(4):
+            own = folds == fold
+            prior = y[~own].mean()
+            expected[own] = naive_encode(values, sep, y, ~own, prior)[own]
+        np.testing.assert_allclose(encoded[f'{column}_te'], expected[:, 0], rtol=1e-12)
+        if sep:
+            np.testing.assert_allclose(encoded[f'{column}_te_max'], expected[:, 1], rtol=1e-12)
+
+
+def test_transform_uses_whole_training_set(credits, tmp_path):
+    X, y = credits
+    encoder = TargetEncoder(['genres', 'directors'], smoothing=SMOOTHING).fit(X, y)
+    new = pd.DataFrame({'genres': ['Drama', 'Western', None], 'directors': ['d1|unknown', '', 'd2']})
+    encoded = encoder.transform(new)
+    use = np.ones(len(X), dtype=bool)
+    for column, sep in encoder.columns.items():
+        expected = naive_encode(np.concatenate([X[column].to_numpy(), new[column].to_numpy()]), sep,
+                                np.concatenate([y, np.zeros(3)]), np.concatenate([use, np.zeros(3, bool)]),
+                                y.mean())[len(X):]
+        np.testing.assert_allclose(encoded[f'{column}_te'], expected[:, 0], rtol=1e-12)
+    assert encoded.loc[1, 'genres_te'] == pytest.approx(y.mean())  # unseen level -> prior
+
+    encoder.save(str(tmp_path / 'encoder.json'))
+    loaded = TargetEncoder.load(str(tmp_path / 'encoder.json'))
+    pd.testing.assert_frame_equal(loaded.transform(new), encoded)
+
+
+def test_fit_transform_refits_the_whole_set(credits):
+    X, y = credits
+    encoder = TargetEncoder(['directors'], smoothing=SMOOTHING)
+    encoder.fit_transform(X, y)
+    reference = TargetEncoder(['directors'], smoothing=SMOOTHING).fit(X, y)
+    pd.testing.assert_frame_equal(encoder.transform(X), reference.transform(X))
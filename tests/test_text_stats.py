@@ -0,0 +1,76 @@
+import re
+
+import pytest
+
+from text_stats import count_text, script_stats, stats_from_counts
+
+SCENE = """\
+FADE IN:
+
+INT. HOSPITAL CORRIDOR - NIGHT
+
+Fluorescent lights flicker over an empty corridor. DR. ELENA MARSH, forties, exhausted, walks past a row of closed doors. She stops at the last one and listens.
+
+                    ELENA
+          Is anybody there? I heard you calling.
+
+Silence. She pushes the door open. The room is dark except for the glow of a heart monitor.
+
+                    ELENA (CONT'D)
+          Mr. Alvarez, you shouldn't be awake. It's nearly three in the morning.
+
+MIGUEL ALVAREZ, seventies, sits upright in bed, staring at the window.
+
+                    MIGUEL
+          I was waiting for my daughter. She promised she would come tonight.
+
+Elena hesitates. She checks his chart, then sets it down gently.
+
+                    ELENA
+          Visiting hours ended a long time ago. I'll make sure she knows you asked for her.
+
+                    MIGUEL
+          You're kind. Everyone here is kind. But nobody tells me the truth.
+
+She pulls a chair beside the bed and sits.
+
+                    ELENA
+          Then let's start with the truth. What would you like to know?
+
+EXT. HOSPITAL PARKING LOT - CONTINUOUS
+
+Rain hammers the asphalt. A young woman, SOFIA, runs from a taxi toward the entrance, clutching a bouquet of wilted flowers.
+
+                                        CUT TO:
+"""
+
+# textstat 0.7.3 (the version requirements.txt pins) on SCENE
+TEXTSTAT_FLESCH_KINCAID, TEXTSTAT_READING_EASE = 3.9, 80.78
+
+
+@pytest.fixture
+def scene_path(tmp_path):
+    path = tmp_path / 'scene.txt'
+    path.write_text(SCENE, encoding='utf-8')
+    return str(path)
+
+
+def test_block_size_does_not_change_the_stats(scene_path):
+    reference = script_stats(scene_path)
+    for block_size in (1, 5, 64, 333, len(SCENE) - 1):
+        assert script_stats(scene_path, block_size=block_size) == reference
+    assert reference == stats_from_counts(count_text(SCENE))  # the whole text at once
+
+
+def test_counts_on_a_fixed_text():
+    counts = count_text("Don't stop. Walk away!")
+    assert (counts['words'], counts['sentences'], counts['syllables'], counts['characters']) == (5, 2, 6, 19)
+    assert count_text('') == count_text(' \n ') == {key: 0 for key in counts}
+
+
+def test_scene_counts_and_readability(scene_path):
+    stats = script_stats(scene_path)
+    assert stats['word_count'] == len(re.findall(r'\w+', SCENE))  # the original word_count definition
+    assert (stats['sentence_count'], stats['syllable_count'], stats['char_count']) == (29, 279, 890)
+    assert stats['flesch_kincaid'] == pytest.approx(TEXTSTAT_FLESCH_KINCAID, abs=0.5)
+    assert stats['flesch_reading_ease'] == pytest.approx(TEXTSTAT_READING_EASE, abs=5)